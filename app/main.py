@@ -5,12 +5,20 @@ from fastapi.middleware.cors import CORSMiddleware
 # Import custom documentation service
 from .services.custom_docs_service import add_custom_docs_route
 
+# Import shared OpenAI client registry
+from .services.client_registry import client_registry, prewarm_default_client
+
+# Import request instrumentation
+from .services.metrics_middleware import MetricsMiddleware
+from .services.tracing_middleware import TracingMiddleware
+
 # Import routes
 from .routes.meal_routes import router as meal_router
 from .routes.reasoning_routes import router as reasoning_router
 from .routes.voice_routes import router as voice_router   
 from .routes.substitution_routes import router as substitution_router
 from .routes.diet_coach_routes import router as diet_coach_router
+from .routes.metrics_routes import router as metrics_router
 
 # Create FastAPI app
 app = FastAPI(
@@ -53,17 +61,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id"],
 )
 
+# Record per-route latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Trace IDs and Server-Timing breakdowns
+app.add_middleware(TracingMiddleware)
+
 # Add custom documentation
 add_custom_docs_route(app)
 
+# Warm up pooled upstream connections
+@app.on_event("startup")
+async def startup_prewarm_clients():
+    await prewarm_default_client()
+
+@app.on_event("shutdown")
+async def shutdown_close_clients():
+    await client_registry.aclose()
+
 # Include routers
 app.include_router(meal_router, prefix="", tags=["Meals"])
 app.include_router(reasoning_router, prefix="", tags=["Nutrition"])
 app.include_router(voice_router, prefix="", tags=["Voice"])
 app.include_router(substitution_router, prefix="", tags=["Tools"])
 app.include_router(diet_coach_router, prefix="", tags=["Diet Coach"]) 
+app.include_router(metrics_router, prefix="")
 
 
 
@@ -1,16 +1,26 @@
 # app/models/__init__.py
 from .common_models import ApiKeyRequest, ErrorResponse
-from .meal_models import MealRequest, MealResponse
+from .meal_models import MealRequest, MealResponse, MealWithReasoningResponse
 from .reasoning_models import ReasoningRequest, ReasoningResponse, ReasoningHighlights
 from .voice_models import VoiceInputRequest, VoiceInputResponse  
-from .substitution_models import SubstitutionOption, SubstitutionRequest, SubstitutionResponse
+from .substitution_models import (
+    SubstitutionOption,
+    SubstitutionRequest,
+    SubstitutionResponse,
+    SubstitutionBatchItem,
+    SubstitutionBatchRequest,
+    SubstitutionBatchResult,
+    SubstitutionBatchResponse
+)
 from .diet_coach_models import DietCoachRequest, DietCoachResponse
+from .meal_plan_models import MealPlanRequest, MealPlanResponse, MealPlanDay, PlannedMeal
 
 __all__ = [
     "ApiKeyRequest",
     "ErrorResponse",
     "MealRequest",
     "MealResponse",
+    "MealWithReasoningResponse",
     "ReasoningRequest",
     "ReasoningResponse",
     "ReasoningHighlights",
@@ -18,7 +28,15 @@ __all__ = [
     "VoiceInputResponse",
     "SubstitutionRequest",
     "SubstitutionResponse",
+    "SubstitutionBatchItem",
+    "SubstitutionBatchRequest",
+    "SubstitutionBatchResult",
+    "SubstitutionBatchResponse",
     "DietCoachRequest",
-    "DietCoachResponse"
+    "DietCoachResponse",
+    "MealPlanRequest",
+    "MealPlanResponse",
+    "MealPlanDay",
+    "PlannedMeal"
 
 ]
\ No newline at end of file
@@ -17,6 +17,15 @@ class DietCoachRequest(ApiKeyRequest):
         default=None,
         description="Optional user ID for session management"
     )
+    debug: bool = Field(
+        default=False,
+        description="Trace this request and return the timing breakdown in the response"
+    )
+    deadline_ms: Optional[int] = Field(
+        default=None,
+        ge=100,
+        description="Optional time budget for this turn; the server's own limit still applies"
+    )
 
 class DietCoachResponse(BaseModel):
     """Response model from diet coach."""
@@ -26,3 +35,7 @@ class DietCoachResponse(BaseModel):
     conversation_id: str = Field(description="Conversation ID for future reference")
     user_id: str = Field(description="User ID for session management")
     data: Optional[Dict[str, Any]] = Field(description="Any structured data returned")
+    debug: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="Trace ID and span timings, present when the request set debug"
+    )
@@ -2,6 +2,7 @@
 from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from .common_models import ApiKeyRequest
+from .reasoning_models import ReasoningHighlights
 
 class MealRequest(ApiKeyRequest):
     """Request model for generating a single meal."""
@@ -38,6 +39,10 @@ class MealRequest(ApiKeyRequest):
         description="Preferred cuisine type",
         example="Mediterranean"
     )
+    include_reasoning: bool = Field(
+        default=False,
+        description="Also return the nutritional reasoning, written in the same completion as the recipe"
+    )
 
     @validator('meal_type')
     def validate_meal_type(cls, v):
@@ -64,4 +69,9 @@ class MealResponse(BaseModel):
     ingredients: List[str]
     instructions: str
     estimated_calories: Optional[int] = None
-    dietary_info: Optional[str] = None
\ No newline at end of file
+    dietary_info: Optional[str] = None
+
+class MealWithReasoningResponse(MealResponse):
+    """Response model for a meal generated together with its reasoning."""
+    reasoning: Optional[ReasoningHighlights]
+    reasoning_error: Optional[str] = None
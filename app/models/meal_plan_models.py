@@ -0,0 +1,107 @@
+# app/models/meal_plan_models.py
+from pydantic import BaseModel, Field, validator
+from typing import Dict, List, Optional
+from .common_models import ApiKeyRequest
+from .meal_models import MealResponse
+
+ALLOWED_MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack", "dessert"]
+
+class MealPlanRequest(ApiKeyRequest):
+    """Request model for generating a multi-day meal plan."""
+    days: int = Field(
+        default=7,
+        description="Number of days in the plan",
+        ge=1,
+        le=14,
+        example=7
+    )
+    meal_types: List[str] = Field(
+        default=["breakfast", "lunch", "dinner"],
+        description="Meals to generate for each day",
+        example=["breakfast", "lunch", "dinner"]
+    )
+    include_ingredients: Optional[List[str]] = Field(
+        default=[],
+        description="Ingredients to try to use across the plan (up to 5)",
+        example=["chicken breast", "spinach"],
+        max_items=5
+    )
+    dietary_preferences: Optional[List[str]] = Field(
+        default=[],
+        description="List of dietary preferences and specializations",
+        example=["vegetarian", "pre-diabetic"]
+    )
+    allergies: Optional[List[str]] = Field(
+        default=[],
+        description="List of food allergies to avoid",
+        example=["nuts", "shellfish"]
+    )
+    max_calories: Optional[int] = Field(
+        default=None,
+        description="Maximum calories per meal slot",
+        gt=0,
+        le=2000,
+        example=600
+    )
+    calories_by_meal_type: Optional[Dict[str, int]] = Field(
+        default=None,
+        description="Per-meal-type calorie caps, overriding max_calories for those slots",
+        example={"breakfast": 400, "dinner": 700}
+    )
+    cuisine_type: Optional[str] = Field(
+        default=None,
+        description="Preferred cuisine type",
+        example="Mediterranean"
+    )
+
+    @validator('meal_types')
+    def validate_meal_types(cls, v):
+        cleaned = [meal_type.strip().lower() for meal_type in v if meal_type.strip()]
+        if not cleaned:
+            raise ValueError("meal_types must contain at least one meal type")
+        for meal_type in cleaned:
+            if meal_type not in ALLOWED_MEAL_TYPES:
+                raise ValueError(f"meal_types entries must be one of: {', '.join(ALLOWED_MEAL_TYPES)}")
+        if len(set(cleaned)) != len(cleaned):
+            raise ValueError("meal_types cannot contain duplicates")
+        return cleaned
+
+    @validator('calories_by_meal_type')
+    def validate_calories_by_meal_type(cls, v):
+        if v is None:
+            return v
+        cleaned = {}
+        for meal_type, calories in v.items():
+            meal_type = meal_type.strip().lower()
+            if meal_type not in ALLOWED_MEAL_TYPES:
+                raise ValueError(f"calories_by_meal_type keys must be one of: {', '.join(ALLOWED_MEAL_TYPES)}")
+            if not 0 < calories <= 2000:
+                raise ValueError("calories_by_meal_type values must be between 1 and 2000")
+            cleaned[meal_type] = calories
+        return cleaned
+
+    @validator('include_ingredients')
+    def validate_include_ingredients(cls, v):
+        if v is None:
+            return []
+        return [ingredient.strip() for ingredient in v if ingredient.strip()]
+
+class PlannedMeal(BaseModel):
+    """One generated meal slot in a plan."""
+    day: int
+    meal_type: str
+    meal: MealResponse
+    attempts: int = Field(description="Generations needed to satisfy the plan constraints")
+
+class MealPlanDay(BaseModel):
+    """All meals for one day of a plan."""
+    day: int
+    meals: List[PlannedMeal]
+
+class MealPlanResponse(BaseModel):
+    """Response model for a complete meal plan."""
+    days: List[MealPlanDay]
+    warnings: List[str] = Field(
+        default=[],
+        description="Slots that could not fully meet the variety or calorie constraints"
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from .common_models import ApiKeyRequest
 
@@ -27,4 +27,51 @@ class SubstitutionResponse(BaseModel):
     """Response model with substitution alternatives."""
     original_ingredient: str
     reason: str
-    substitutions: List[SubstitutionOption]
\ No newline at end of file
+    substitutions: List[SubstitutionOption]
+
+class SubstitutionBatchItem(BaseModel):
+    """One ingredient in a batch substitution request."""
+    original_ingredient: str = Field(
+        description="The ingredient to find substitutions for",
+        example="butter"
+    )
+    reason: str = Field(
+        description="Reason for substitution",
+        example="dairy-free"
+    )
+    recipe_context: Optional[str] = Field(
+        default=None,
+        description="Optional context about how the ingredient is used",
+        example="shortbread cookies"
+    )
+
+class SubstitutionBatchRequest(ApiKeyRequest):
+    """Request model for finding substitutions for several ingredients at once."""
+    items: List[SubstitutionBatchItem] = Field(
+        description="Ingredients to substitute (up to 50)",
+        max_items=50
+    )
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not v:
+            raise ValueError("items must contain at least one ingredient")
+        if len(v) > 50:
+            raise ValueError("items cannot have more than 50 entries")
+        return v
+
+class SubstitutionBatchResult(BaseModel):
+    """Substitutions (or the error) for one batch item, in input order."""
+    original_ingredient: str
+    reason: str
+    recipe_context: Optional[str] = None
+    substitutions: List[SubstitutionOption] = []
+    error: Optional[str] = Field(default=None, description="Why this item failed, if it did")
+    cached: bool = Field(default=False, description="Whether the answer came from the response cache")
+
+class SubstitutionBatchResponse(BaseModel):
+    """Response model for a batch substitution request."""
+    results: List[SubstitutionBatchResult]
+    unique_requests: int = Field(description="Distinct items after canonicalization")
+    cache_hits: int = Field(description="Distinct items answered from the cache")
+    upstream_calls: int = Field(description="Distinct items sent to the model")
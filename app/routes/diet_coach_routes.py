@@ -1,7 +1,10 @@
 # app/routes/diet_coach_routes.py
 from fastapi import APIRouter, HTTPException
 from app.models.diet_coach_models import DietCoachRequest, DietCoachResponse
-from app.services.diet_coach_services import process_diet_coach_request
+from app.services.diet_coach_services import process_diet_coach_request_async, stream_diet_coach_request
+from app.services.sse_service import event_stream_response
+from app.services.tracing import force_sample
+from app.services.concurrency_limiter import UpstreamOverloadedError, set_priority, upstream_limiter
 
 router = APIRouter()
 
@@ -27,12 +30,54 @@ async def api_diet_coach(request: DietCoachRequest):
     ```
     """
     try:
-        result = process_diet_coach_request(
+        set_priority("diet_coach")
+        
+        # Debug requests are always traced so the breakdown can be returned
+        trace = force_sample() if request.debug else None
+        
+        result = await process_diet_coach_request_async(
             message=request.message,
             conversation_id=request.conversation_id,
             user_id=request.user_id,  # Pass user_id to service
-            api_key=request.api_key
+            api_key=request.api_key,
+            deadline_seconds=request.deadline_ms / 1000 if request.deadline_ms else None
         )
+        if trace is not None:
+            result["debug"] = trace.to_dict()
         return result
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/diet-coach/stream")
+async def api_diet_coach_stream(request: DietCoachRequest):
+    """
+    Streaming version of the diet coach using server-sent events.
+    
+    Events are emitted as they happen:
+    - `session`: conversation and user IDs for this turn
+    - `intent`: the detected intent and the tools that will run
+    - `tool`: one per finished tool, with its structured result or error
+    - `token`: fragments of the coach response as they are generated
+    - `done`: the complete response, identical to `/diet-coach`
+    
+    Conversation history is updated exactly as in `/diet-coach` once the
+    stream completes.
+    """
+    try:
+        set_priority("diet_coach")
+        upstream_limiter.check_admission()
+        
+        events = stream_diet_coach_request(
+            message=request.message,
+            conversation_id=request.conversation_id,
+            user_id=request.user_id,
+            api_key=request.api_key,
+            deadline_seconds=request.deadline_ms / 1000 if request.deadline_ms else None
+        )
+        return event_stream_response(events)
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,17 +1,21 @@
 # app/routes/meal_routes.py
 from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
+from typing import Dict, Any, Union
 
 # Import models
-from app.models.meal_models import MealRequest, MealResponse
+from app.models.meal_models import MealRequest, MealResponse, MealWithReasoningResponse
+from app.models.meal_plan_models import MealPlanRequest
 
 # Import services
-from app.services.meal_service import generate_meal
+from app.services.meal_service import generate_meal_async, stream_generate_meal
+from app.services.meal_plan_service import stream_meal_plan
+from app.services.sse_service import event_stream_response
+from app.services.concurrency_limiter import UpstreamOverloadedError, set_priority, upstream_limiter
 
 # Create router
 router = APIRouter()
 
-@router.post("/generate-meal", response_model=MealResponse)
+@router.post("/generate-meal", response_model=Union[MealWithReasoningResponse, MealResponse])
 async def api_generate_meal(request: MealRequest):
     """
     Generate a customized meal recipe based on preferences.
@@ -19,6 +23,10 @@ async def api_generate_meal(request: MealRequest):
     This endpoint creates a meal recipe with the specified parameters such as meal type, 
     dietary preferences, allergies, and desired ingredients.
     
+    Set `include_reasoning` to get the `/meal-reasoning` highlights in the same
+    response. Both are written by one completion, which is quicker than
+    calling the two endpoints in turn.
+    
     Example request:
     ```json
     {
@@ -30,15 +38,102 @@ async def api_generate_meal(request: MealRequest):
     ```
     """
     try:
-        result = generate_meal(
+        set_priority("generate_meal")
+        
+        result = await generate_meal_async(
             api_key=request.api_key,
             meal_type=request.meal_type,
             dietary_preferences=request.dietary_preferences,
             allergies=request.allergies,
             max_calories=request.max_calories,
             cuisine_type=request.cuisine_type,
-            include_ingredients=request.include_ingredients
+            include_ingredients=request.include_ingredients,
+            include_reasoning=request.include_reasoning
         )
         return result
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate-meal/stream")
+async def api_generate_meal_stream(request: MealRequest):
+    """
+    Streaming version of meal generation using server-sent events.
+    
+    Events are emitted while the recipe is being written:
+    - `meal_name`: the meal name, as soon as it is complete
+    - `ingredient`: each ingredient with its index, as it closes
+    - `instructions`: new fragments of the instructions text
+    - `done`: the complete meal, validated against `MealResponse`
+    
+    Accepts the same request body as `/generate-meal`; `include_reasoning` is
+    not supported here and is ignored.
+    """
+    try:
+        set_priority("generate_meal")
+        upstream_limiter.check_admission()
+        
+        events = stream_generate_meal(
+            api_key=request.api_key,
+            meal_type=request.meal_type,
+            dietary_preferences=request.dietary_preferences,
+            allergies=request.allergies,
+            max_calories=request.max_calories,
+            cuisine_type=request.cuisine_type,
+            include_ingredients=request.include_ingredients
+        )
+        return event_stream_response(events)
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@router.post("/generate-meal-plan")
+async def api_generate_meal_plan(request: MealPlanRequest):
+    """
+    Generate a multi-day meal plan using server-sent events.
+    
+    All meal slots are generated in parallel, so a week takes about as long
+    as a single meal. Dishes are never repeated, main ingredients are spread
+    across the plan, and each slot stays within its calorie cap.
+    
+    Events:
+    - `meal`: each meal slot as soon as it is accepted
+    - `day`: a whole day once all of its meals are in
+    - `done`: the complete plan, validated against `MealPlanResponse`
+    
+    Example request:
+    ```json
+    {
+      "days": 7,
+      "meal_types": ["breakfast", "lunch", "dinner"],
+      "dietary_preferences": ["vegetarian"],
+      "max_calories": 600,
+      "calories_by_meal_type": {"breakfast": 400}
+    }
+    ```
+    """
+    try:
+        set_priority("meal_plan")
+        upstream_limiter.check_admission()
+        
+        events = stream_meal_plan(
+            api_key=request.api_key,
+            days=request.days,
+            meal_types=request.meal_types,
+            include_ingredients=request.include_ingredients,
+            dietary_preferences=request.dietary_preferences,
+            allergies=request.allergies,
+            max_calories=request.max_calories,
+            calories_by_meal_type=request.calories_by_meal_type,
+            cuisine_type=request.cuisine_type
+        )
+        return event_stream_response(events)
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,120 @@
+# app/routes/metrics_routes.py
+from typing import Any, Dict, List, Tuple
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services.metrics import metrics
+from app.services.client_registry import client_registry
+from app.services.concurrency_limiter import upstream_limiter
+from app.services.resilience import circuit_breakers
+from app.services.model_router import model_router
+from app.services.provider_pool import provider_pool
+from app.services.llm_cassette import llm_cassette
+from app.services.response_cache import response_cache
+from app.services.single_flight import single_flight
+from app.services.substitution_services import substitution_batcher
+from app.services.diet_coach_services import conversation_store
+
+router = APIRouter()
+
+
+def _collect_component_stats() -> List[Tuple[str, str, str, List[Tuple[Dict[str, str], Any]]]]:
+    """Export the counters components already keep as Prometheus families."""
+    cache = response_cache.stats()
+    flights = single_flight.stats()
+    batcher = substitution_batcher.stats()
+    clients = client_registry.stats()
+    store = conversation_store.stats()
+    cassette = llm_cassette.stats()
+    limiter = upstream_limiter.stats()
+    breakers = circuit_breakers.stats()
+    routes = model_router.stats()
+    endpoints = provider_pool.stats()
+
+    cache_endpoints = cache["endpoints"].items()
+    flight_endpoints = flights["endpoints"].items()
+    return [
+        ("dietdraft_cache_requests_total", "counter", "Response cache lookups by endpoint and result.", [
+            ({"endpoint": endpoint, "result": result}, counts[result])
+            for endpoint, counts in cache_endpoints for result in ("hits", "misses")
+        ]),
+        ("dietdraft_cache_evictions_total", "counter", "Response cache evictions by endpoint.", [
+            ({"endpoint": endpoint}, counts["evictions"]) for endpoint, counts in cache_endpoints
+        ]),
+        ("dietdraft_cache_entries", "gauge", "Entries currently in the response cache.", [
+            ({}, cache["entries"])
+        ]),
+        ("dietdraft_single_flight_calls_total", "counter", "Calls by endpoint, split into leaders and coalesced waiters.", [
+            ({"endpoint": endpoint, "role": role}, counts[role])
+            for endpoint, counts in flight_endpoints for role in ("leaders", "coalesced")
+        ]),
+        ("dietdraft_single_flight_in_flight", "gauge", "Distinct upstream calls currently shared.", [
+            ({}, flights["in_flight"])
+        ]),
+        ("dietdraft_substitution_batches_total", "counter", "Micro-batches sent upstream.", [
+            ({}, batcher["batches"])
+        ]),
+        ("dietdraft_substitution_batched_items_total", "counter", "Substitution lookups sent in micro-batches.", [
+            ({}, batcher["items"])
+        ]),
+        ("dietdraft_openai_clients", "gauge", "Pooled upstream clients.", [
+            ({}, clients["clients"])
+        ]),
+        ("dietdraft_openai_client_requests_total", "counter", "Client registry lookups by result.", [
+            ({"result": "hit"}, clients["hits"]),
+            ({"result": "miss"}, clients["misses"]),
+            ({"result": "eviction"}, clients["evictions"])
+        ]),
+        ("dietdraft_conversation_sessions", "gauge", "Conversations held by the store.", [
+            ({"backend": store["backend"]}, store["sessions"])
+        ]),
+        ("dietdraft_conversation_resident_bytes", "gauge", "Bytes held by the conversation store.", [
+            ({"backend": store["backend"]}, store["resident_bytes"])
+        ]),
+        ("dietdraft_upstream_concurrency_limit", "gauge", "Current adaptive limit on concurrent upstream calls.", [
+            ({}, limiter["limit"])
+        ]),
+        ("dietdraft_upstream_in_flight", "gauge", "Upstream calls holding a limiter slot.", [
+            ({}, limiter["in_flight"])
+        ]),
+        ("dietdraft_upstream_queued", "gauge", "Upstream calls waiting for a limiter slot.", [
+            ({}, limiter["queued"])
+        ]),
+        ("dietdraft_upstream_limiter_requests_total", "counter", "Limiter decisions: admitted, rejected (queue full) or timed out in the queue.", [
+            ({"result": result}, limiter[result]) for result in ("admitted", "rejected", "timeouts")
+        ]),
+        ("dietdraft_upstream_limit_decreases_total", "counter", "Multiplicative decreases after upstream overload signals.", [
+            ({}, limiter["decreases"])
+        ]),
+        ("dietdraft_circuit_breaker_open", "gauge", "1 while a key's circuit breaker is open or half-open.", [
+            ({"upstream": b["upstream"], "key": b["key"]}, 0 if b["state"] == "closed" else 1) for b in breakers
+        ]),
+        ("dietdraft_circuit_breaker_consecutive_failures", "gauge", "Consecutive upstream failures per key.", [
+            ({"upstream": b["upstream"], "key": b["key"]}, b["failures"]) for b in breakers
+        ]),
+        ("dietdraft_model_route_latency_seconds", "gauge", "Moving average latency per stage and routing candidate.", [
+            ({"stage": r["stage"], "target": r["target"]}, r["latency_ewma"]) for r in routes
+        ]),
+        ("dietdraft_endpoint_in_flight", "gauge", "Upstream attempts in flight per pool endpoint.", [
+            ({"endpoint": e["endpoint"]}, e["in_flight"]) for e in endpoints
+        ]),
+        ("dietdraft_endpoint_available", "gauge", "1 while a pool endpoint is in rotation, 0 while ejected.", [
+            ({"endpoint": e["endpoint"]}, 1 if e["available"] else 0) for e in endpoints
+        ]),
+        ("dietdraft_endpoint_latency_seconds", "gauge", "Moving average attempt latency per pool endpoint.", [
+            ({"endpoint": e["endpoint"]}, e["latency_ewma"]) for e in endpoints if e["latency_ewma"] is not None
+        ]),
+        ("dietdraft_llm_cassette_requests_total", "counter", "Completions recorded to or replayed from the cassette.", [
+            ({"mode": cassette["mode"], "result": result}, cassette[result])
+            for result in ("recorded", "replayed", "misses")
+        ]),
+    ]
+
+
+metrics.register_collector(_collect_component_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def api_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
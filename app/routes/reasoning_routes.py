@@ -6,7 +6,8 @@ from typing import Dict, Any
 from app.models.reasoning_models import ReasoningRequest, ReasoningResponse
 
 # Import services
-from app.services.reasoning_services import generate_meal_reasoning
+from app.services.reasoning_services import generate_meal_reasoning_async
+from app.services.concurrency_limiter import UpstreamOverloadedError, set_priority
 
 # Create router
 router = APIRouter()
@@ -35,7 +36,9 @@ async def api_meal_reasoning(request: ReasoningRequest):
     ```
     """
     try:
-        result = generate_meal_reasoning(
+        set_priority("meal_reasoning")
+        
+        result = await generate_meal_reasoning_async(
             api_key=request.api_key,
             meal_name=request.meal_name,
             ingredients=request.ingredients,
@@ -43,5 +46,7 @@ async def api_meal_reasoning(request: ReasoningRequest):
             dietary_preferences=request.dietary_preferences
         )
         return result
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
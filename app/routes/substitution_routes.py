@@ -1,7 +1,14 @@
 # app/routes/substitution_routes.py
 from fastapi import APIRouter, HTTPException
-from app.models.substitution_models import SubstitutionRequest, SubstitutionResponse, SubstitutionOption
-from app.services.substitution_services import find_substitutions
+from app.models.substitution_models import (
+    SubstitutionRequest,
+    SubstitutionResponse,
+    SubstitutionOption,
+    SubstitutionBatchRequest,
+    SubstitutionBatchResponse
+)
+from app.services.substitution_services import find_substitutions_async, find_substitutions_batch_async
+from app.services.concurrency_limiter import UpstreamOverloadedError, set_priority
 
 router = APIRouter()
 
@@ -23,12 +30,50 @@ async def api_find_substitutions(request: SubstitutionRequest):
     ```
     """
     try:
-        result = find_substitutions(
+        set_priority("find_substitutions")
+        
+        result = await find_substitutions_async(
             original_ingredient=request.original_ingredient,
             reason=request.reason,
             recipe_context=request.recipe_context,
             api_key=request.api_key
         )
         return result
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/find-substitutions/batch", response_model=SubstitutionBatchResponse)
+async def api_find_substitutions_batch(request: SubstitutionBatchRequest):
+    """
+    Find substitutions for several ingredients in one request.
+    
+    Duplicate items (ignoring case and spacing) are only looked up once,
+    cached answers are reused, and the rest run in parallel. Results come
+    back in the same order as `items`; an item that fails carries its own
+    `error` instead of failing the whole batch.
+    
+    Example request:
+    ```json
+    {
+      "items": [
+        {"original_ingredient": "butter", "reason": "dairy-free", "recipe_context": "cookies"},
+        {"original_ingredient": "eggs", "reason": "vegan", "recipe_context": "cookies"}
+      ]
+    }
+    ```
+    """
+    try:
+        set_priority("find_substitutions")
+        
+        result = await find_substitutions_batch_async(
+            requests=[item.model_dump() for item in request.items],
+            api_key=request.api_key
+        )
+        return result
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -7,7 +7,8 @@ from typing import Dict, Any
 from app.models.voice_models import VoiceInputRequest, VoiceInputResponse
 
 # Import service
-from app.services.voice_parser_service import parse_voice_to_json
+from app.services.voice_parser_service import parse_voice_to_json_async
+from app.services.concurrency_limiter import UpstreamOverloadedError, set_priority
 
 # Create router
 router = APIRouter()
@@ -29,15 +30,19 @@ async def api_parse_voice(request: VoiceInputRequest):
     ```
     """
     try:
+        set_priority("parse_voice")
+        
         if not request.voice_text:
             raise ValueError("Voice text cannot be empty")
         
         # Parse the voice input using LLM
-        result = parse_voice_to_json(
+        result = await parse_voice_to_json_async(
             voice_text=request.voice_text,
             api_key=request.api_key
         )
         
         return result
+    except UpstreamOverloadedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,14 +1,34 @@
 # app/services/__init__.py
-from app.services.meal_service import generate_meal
-from app.services.reasoning_services import generate_meal_reasoning
+from app.services.meal_service import generate_meal, generate_meal_async, stream_generate_meal
+from app.services.meal_plan_service import stream_meal_plan
+from app.services.reasoning_services import generate_meal_reasoning, generate_meal_reasoning_async
 from app.services.custom_docs_service import add_custom_docs_route
-from app.services.diet_coach_services import process_diet_coach_request
+from app.services.voice_parser_service import parse_voice_to_json, parse_voice_to_json_async
+from app.services.substitution_services import (
+    find_substitutions,
+    find_substitutions_async,
+    find_substitutions_batch_async
+)
+from app.services.diet_coach_services import (
+    process_diet_coach_request,
+    process_diet_coach_request_async,
+    stream_diet_coach_request
+)
 
 __all__ = [
     "generate_meal",
+    "generate_meal_async",
+    "stream_generate_meal",
+    "stream_meal_plan",
     "generate_meal_reasoning",
+    "generate_meal_reasoning_async",
     "add_custom_docs_route",
     "parse_voice_to_json",
+    "parse_voice_to_json_async",
     "find_substitutions",
-    "process_diet_coach_request"
+    "find_substitutions_async",
+    "find_substitutions_batch_async",
+    "process_diet_coach_request",
+    "process_diet_coach_request_async",
+    "stream_diet_coach_request"
 ]
\ No newline at end of file
@@ -0,0 +1,200 @@
+# app/services/client_registry.py
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+from dotenv import load_dotenv
+
+from app.services.provider_pool import provider_pool
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+class _ClientEntry:
+    """A cached client together with its bookkeeping."""
+
+    def __init__(self, client: AsyncOpenAI, http_client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        self.client = client
+        self.http_client = http_client
+        self.loop = loop
+        self.last_used = time.monotonic()
+        self.in_flight = 0
+
+
+class ClientRegistry:
+    """
+    Shared AsyncOpenAI clients keyed by API key and base URL.
+
+    Each client owns a bounded keep-alive connection pool. Idle clients are
+    evicted least-recently-used first once the registry is over capacity or
+    a client has been idle longer than the TTL. Clients with requests in
+    flight are never evicted.
+    """
+
+    def __init__(
+        self,
+        max_clients: int = 32,
+        idle_ttl: float = 600.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0
+    ):
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self._clients: "OrderedDict[Tuple[str, str], _ClientEntry]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def resolve_base_url(base_url: Optional[str] = None) -> str:
+        return (base_url or os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+
+    def _build(self, api_key: str, base_url: str, loop: asyncio.AbstractEventLoop) -> _ClientEntry:
+        # Supplying our own http client also sidesteps the "proxies" TypeError
+        # some hosts trigger when OpenAI builds its default client
+        http_client = httpx.AsyncClient(
+            limits=self.limits,
+            timeout=httpx.Timeout(600.0, connect=5.0),
+            follow_redirects=True
+        )
+        # Retries are handled by app.services.resilience, with a shared budget
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        return _ClientEntry(client, http_client, loop)
+
+    def _entry(self, api_key: str, base_url: Optional[str] = None) -> _ClientEntry:
+        loop = asyncio.get_running_loop()
+        key = (api_key, self.resolve_base_url(base_url))
+        entry = self._clients.get(key)
+
+        # Connection pools are bound to the loop that opened them
+        if entry is not None and entry.loop is not loop:
+            del self._clients[key]
+            entry = None
+
+        if entry is not None:
+            self.hits += 1
+            self._clients.move_to_end(key)
+        else:
+            self.misses += 1
+            entry = self._build(key[0], key[1], loop)
+            self._clients[key] = entry
+
+        entry.last_used = time.monotonic()
+        # The entry being handed out is never a candidate, even before it is leased
+        self._evict(keep=key)
+        return entry
+
+    @asynccontextmanager
+    async def lease(self, api_key: str, base_url: Optional[str] = None) -> AsyncIterator[AsyncOpenAI]:
+        """Borrow a client for one request so it cannot be evicted mid-call."""
+        entry = self._entry(api_key, base_url)
+        entry.in_flight += 1
+        try:
+            yield entry.client
+        finally:
+            entry.in_flight -= 1
+            entry.last_used = time.monotonic()
+
+    def _evict(self, keep: Optional[Tuple[str, str]] = None) -> None:
+        now = time.monotonic()
+        for key in list(self._clients.keys()):
+            entry = self._clients[key]
+            over_capacity = len(self._clients) > self.max_clients
+            expired = now - entry.last_used > self.idle_ttl
+            if not (over_capacity or expired):
+                break
+            if entry.in_flight or key == keep:
+                continue
+            del self._clients[key]
+            self.evictions += 1
+            self._close(entry)
+
+    def _close(self, entry: _ClientEntry) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if entry.loop is not loop:
+            return
+        task = loop.create_task(entry.http_client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def prewarm(self, api_key: str, base_url: Optional[str] = None, connections: int = 2) -> None:
+        """
+        Open keep-alive connections ahead of the first real request.
+
+        Issues lightweight GET /models calls so TCP and TLS handshakes are
+        paid at startup. Failures are ignored; the pool just stays cold.
+        """
+        entry = self._entry(api_key, base_url)
+        url = f"{self.resolve_base_url(base_url)}/models"
+        headers = {"Authorization": f"Bearer {api_key}"}
+
+        async def warm() -> None:
+            try:
+                await entry.http_client.get(url, headers=headers, timeout=5.0)
+            except httpx.HTTPError:
+                pass
+
+        await asyncio.gather(*(warm() for _ in range(connections)))
+
+    async def aclose(self) -> None:
+        """Close every pooled client."""
+        entries = list(self._clients.values())
+        self._clients.clear()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(entry.http_client.aclose() for entry in entries if entry.loop is loop),
+            return_exceptions=True
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return registry counters."""
+        return {
+            "clients": len(self._clients),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+client_registry = ClientRegistry(
+    max_clients=int(os.getenv("OPENAI_CLIENT_CACHE_SIZE", "32")),
+    idle_ttl=float(os.getenv("OPENAI_CLIENT_IDLE_TTL", "600")),
+    max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "30"))
+)
+
+
+async def prewarm_default_client() -> None:
+    """Pre-warm the pool for the server-side API key, and each provider pool endpoint, if configured."""
+    key = os.getenv("OPENAI_API_KEY")
+    if not key:
+        return
+    connections = int(os.getenv("OPENAI_PREWARM_CONNECTIONS", "2"))
+    if connections <= 0:
+        return
+    if not provider_pool.enabled:
+        await client_registry.prewarm(key, connections=connections)
+        return
+    await asyncio.gather(*(
+        client_registry.prewarm(endpoint.api_key() or key, endpoint.base_url, connections=connections)
+        for endpoint in provider_pool.endpoints
+    ))
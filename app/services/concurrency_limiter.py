@@ -0,0 +1,207 @@
+# app/services/concurrency_limiter.py
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional
+import openai
+from dotenv import load_dotenv
+
+from app.services.deadline import DeadlineExceededError, remaining
+
+# Load environment variables
+load_dotenv()
+
+LIMITER_ENABLED = os.getenv("LLM_LIMITER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Lower runs first. Interactive, short calls go ahead of bulk generation.
+ENDPOINT_PRIORITIES = {
+    "parse_voice": 0,
+    "diet_coach": 1,
+    "find_substitutions": 1,
+    "generate_meal": 2,
+    "meal_reasoning": 2,
+    "meal_plan": 3,
+}
+DEFAULT_PRIORITY = 2
+
+_request_priority: ContextVar[int] = ContextVar("dietdraft_upstream_priority", default=DEFAULT_PRIORITY)
+
+
+class UpstreamOverloadedError(Exception):
+    """Raised when an upstream call is shed instead of queued; routes answer 429."""
+
+    status_code = 429
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def set_priority(endpoint: str) -> None:
+    """Set the upstream priority for the rest of the current request."""
+    _request_priority.set(ENDPOINT_PRIORITIES.get(endpoint, DEFAULT_PRIORITY))
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Caps concurrent upstream calls with an AIMD-adjusted limit.
+
+    While calls succeed and the limit is actually in use it grows by about
+    one per limit's worth of completions; an overload signal from upstream
+    (rate limit, timeout, 503) cuts it by `backoff`, at most once per
+    `decrease_interval` so one burst of failures counts once. Calls over the
+    limit wait in a priority queue of at most `max_queue` entries; a full
+    queue, or a wait longer than `max_wait`, raises UpstreamOverloadedError
+    with a Retry-After estimate.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 20,
+        min_limit: float = 2,
+        max_limit: float = 200,
+        max_queue: int = 200,
+        max_wait: float = 10.0,
+        backoff: float = 0.7,
+        decrease_interval: float = 1.0
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.backoff = backoff
+        self.decrease_interval = decrease_interval
+        self._in_flight = 0
+        self._queued = 0
+        self._waiters: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._last_decrease = 0.0
+        self._latency = 1.0
+        self.admitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.decreases = 0
+
+    def _capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    def _retry_after(self) -> int:
+        """Seconds until the current queue should have drained."""
+        return max(1, math.ceil((self._queued + 1) / self._capacity() * self._latency))
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self._capacity():
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int) -> None:
+        if self._in_flight < self._capacity() and not self._queued:
+            self._in_flight += 1
+            return
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise UpstreamOverloadedError("Upstream is at capacity, please retry", self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._sequence), future])
+        self._queued += 1
+        self._wake()
+        # Never queue past the request deadline
+        request_left = remaining()
+        wait = self.max_wait if request_left is None else min(self.max_wait, request_left)
+        try:
+            await asyncio.wait_for(future, wait)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            if wait < self.max_wait:
+                raise DeadlineExceededError("Request deadline exceeded waiting for upstream capacity")
+            raise UpstreamOverloadedError("Timed out waiting for upstream capacity, please retry", self._retry_after())
+        except asyncio.CancelledError:
+            # Granted just as we were cancelled: hand the slot on
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            self._queued -= 1
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def _on_complete(self, latency: float, overloaded: bool, saturated: bool) -> None:
+        self._latency = 0.9 * self._latency + 0.1 * latency
+        if overloaded:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.decrease_interval:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.decreases += 1
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def check_admission(self) -> None:
+        """
+        Shed a request up front when the queue is already full.
+
+        For streaming routes, whose upstream calls start after the 200
+        response has been sent and so can no longer turn into a 429.
+        """
+        if LIMITER_ENABLED and self._queued >= self.max_queue:
+            self.rejected += 1
+            raise UpstreamOverloadedError("Upstream is at capacity, please retry", self._retry_after())
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[int] = None) -> AsyncIterator[None]:
+        """Hold one upstream slot for the duration of the block."""
+        if not LIMITER_ENABLED:
+            yield
+            return
+        await self._acquire(_request_priority.get() if priority is None else priority)
+        self.admitted += 1
+        saturated = self._in_flight >= self._capacity()
+        start = time.perf_counter()
+        overloaded = False
+        try:
+            yield
+        except Exception as e:
+            overloaded = is_overload_error(e)
+            raise
+        finally:
+            self._on_complete(time.perf_counter() - start, overloaded, saturated)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "decreases": self.decreases
+        }
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """True for upstream errors that mean "send less": 429, 503 and timeouts."""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code == 503
+
+
+upstream_limiter = AdaptiveConcurrencyLimiter(
+    initial_limit=float(os.getenv("LLM_CONCURRENCY_INITIAL", "20")),
+    min_limit=float(os.getenv("LLM_CONCURRENCY_MIN", "2")),
+    max_limit=float(os.getenv("LLM_CONCURRENCY_MAX", "200")),
+    max_queue=int(os.getenv("LLM_QUEUE_MAX", "200")),
+    max_wait=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "10"))
+)
@@ -0,0 +1,472 @@
+# app/services/conversation_store.py
+import os
+import json
+import time
+import sqlite3
+import threading
+import itertools
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from dotenv import load_dotenv
+
+from app.services.metrics import metrics
+
+# Load environment variables
+load_dotenv()
+
+VACUUM_FAILURES = metrics.counter(
+    "dietdraft_conversation_vacuum_failures_total",
+    "Background conversation vacuum runs that failed."
+)
+
+
+def make_message(role: str, content: str) -> Dict[str, Any]:
+    """Build a conversation message stamped with the current UTC time."""
+    return {
+        "role": role,
+        "content": content,
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def _summary_is_newer(summary: Dict[str, Any], current: Optional[Dict[str, Any]]) -> bool:
+    """Whether summary covers later messages than current; summaries without an id mark never win."""
+    if current is None or not isinstance(current.get("through"), int):
+        return True
+    return summary.get("through", 0) > current["through"]
+
+
+class ConversationStore(ABC):
+    """Storage backend for diet coach conversation histories."""
+
+    @abstractmethod
+    def get_history(self, session_key: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Return the messages for a session, or None if it does not exist.
+
+        Args:
+            session_key: Session identifier ("user_id:conversation_id")
+            limit: Only return the most recent messages, oldest first
+        """
+
+    @abstractmethod
+    def append(self, session_key: str, message: Dict[str, Any]) -> None:
+        """
+        Append a message, creating the session if needed.
+
+        Sets message["id"], which increases with every append to the session
+        and is what summaries record as the point they cover.
+        """
+
+    @abstractmethod
+    def get_summary(self, session_key: str) -> Optional[Dict[str, Any]]:
+        """Return the rolling summary for a session, if one has been written."""
+
+    @abstractmethod
+    def set_summary(self, session_key: str, summary: Dict[str, Any]) -> None:
+        """
+        Store the rolling summary for an existing session.
+
+        Ignored if the stored summary already covers messages up to the same
+        or a later id (summary["through"]), so an update that finishes late
+        cannot replace a newer one.
+        """
+
+    @abstractmethod
+    def delete(self, session_key: str) -> None:
+        """Remove a session."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Return store counters."""
+
+
+class _Session:
+    __slots__ = ("messages", "sizes", "summary", "summary_size", "bytes", "last_access")
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+        self.sizes: List[int] = []
+        self.summary: Optional[Dict[str, Any]] = None
+        self.summary_size = 0
+        self.bytes = 0
+        self.last_access = time.time()
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Bounded in-process conversation store.
+
+    Enforces a maximum number of sessions (least recently used evicted
+    first), a per-session message cap (oldest messages dropped), an idle
+    TTL, and a total byte budget across all sessions.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        max_messages: int = 50,
+        ttl_seconds: float = 6 * 3600,
+        max_bytes: int = 64 * 1024 * 1024
+    ):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = {"capacity": 0, "ttl": 0, "bytes": 0}
+        self.trimmed_messages = 0
+        self._message_ids = itertools.count(1)
+
+    def get_history(self, session_key: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            self._expire(time.time())
+            session = self._sessions.get(session_key)
+            if session is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touch(session_key, session)
+            if limit is not None:
+                return session.messages[-limit:] if limit > 0 else []
+            return list(session.messages)
+
+    def append(self, session_key: str, message: Dict[str, Any]) -> None:
+        size = len(json.dumps(message))
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            session = self._sessions.get(session_key)
+            if session is None:
+                session = _Session()
+                self._sessions[session_key] = session
+            self._touch(session_key, session)
+
+            message["id"] = next(self._message_ids)
+            session.messages.append(message)
+            session.sizes.append(size)
+            session.bytes += size
+            self._bytes += size
+
+            while len(session.messages) > self.max_messages:
+                self._drop_oldest_message(session)
+
+            while len(self._sessions) > self.max_sessions:
+                self._evict_lru("capacity")
+
+            while self._bytes > self.max_bytes:
+                if len(self._sessions) > 1:
+                    self._evict_lru("bytes")
+                elif len(session.messages) > 1:
+                    self._drop_oldest_message(session)
+                else:
+                    break
+
+    def get_summary(self, session_key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(session_key)
+            return session.summary if session is not None else None
+
+    def set_summary(self, session_key: str, summary: Dict[str, Any]) -> None:
+        size = len(json.dumps(summary))
+        with self._lock:
+            session = self._sessions.get(session_key)
+            if session is None or not _summary_is_newer(summary, session.summary):
+                return
+            session.bytes += size - session.summary_size
+            self._bytes += size - session.summary_size
+            session.summary = summary
+            session.summary_size = size
+
+    def delete(self, session_key: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(session_key, None)
+            if session is not None:
+                self._bytes -= session.bytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "messages": sum(len(s.messages) for s in self._sessions.values()),
+                "resident_bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": dict(self.evictions),
+                "trimmed_messages": self.trimmed_messages
+            }
+
+    def _touch(self, session_key: str, session: _Session) -> None:
+        session.last_access = time.time()
+        self._sessions.move_to_end(session_key)
+
+    def _expire(self, now: float) -> None:
+        # Sessions are kept in access order, so expired ones sit at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.last_access <= self.ttl_seconds:
+                break
+            self._evict_lru("ttl")
+
+    def _evict_lru(self, reason: str) -> None:
+        _, session = self._sessions.popitem(last=False)
+        self._bytes -= session.bytes
+        self.evictions[reason] += 1
+
+    def _drop_oldest_message(self, session: _Session) -> None:
+        session.messages.pop(0)
+        size = session.sizes.pop(0)
+        session.bytes -= size
+        self._bytes -= size
+        self.trimmed_messages += 1
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Conversation store in a WAL-mode SQLite database.
+
+    Every uvicorn worker on a host can open the same file, so follow-up
+    turns find their history regardless of which worker serves them.
+    Appends are single small transactions, recent-history reads use the
+    (session_key, id) index, and a background thread deletes sessions
+    that have been idle longer than the TTL, `vacuum_batch` at a time so
+    no worker's append waits long for the write lock.
+    """
+
+    def __init__(
+        self,
+        path: str = "dietdraft_conversations.db",
+        max_messages: int = 50,
+        ttl_seconds: float = 6 * 3600,
+        vacuum_interval: float = 300.0,
+        vacuum_batch: int = 200
+    ):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.vacuum_interval = vacuum_interval
+        self.vacuum_batch = vacuum_batch
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired_sessions = 0
+        self._init_schema()
+        self._stop = threading.Event()
+        self._vacuum_thread: Optional[threading.Thread] = None
+        if vacuum_interval > 0:
+            self._vacuum_thread = threading.Thread(
+                target=self._vacuum_loop, name="conversation-vacuum", daemon=True
+            )
+            self._vacuum_thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._connect()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_key TEXT PRIMARY KEY,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_key TEXT NOT NULL,
+                message TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_key, id);
+            CREATE TABLE IF NOT EXISTS summaries (
+                session_key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL
+            );
+        """)
+
+    def get_history(self, session_key: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT last_access FROM sessions WHERE session_key = ?", (session_key,)
+        ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl_seconds:
+            with self._counter_lock:
+                self.misses += 1
+            return None
+
+        if limit is None:
+            limit = self.max_messages
+        rows = conn.execute(
+            "SELECT id, message FROM messages WHERE session_key = ? ORDER BY id DESC LIMIT ?",
+            (session_key, max(limit, 0))
+        ).fetchall()
+        with self._counter_lock:
+            self.hits += 1
+        return [dict(json.loads(message), id=message_id) for message_id, message in reversed(rows)]
+
+    def append(self, session_key: str, message: Dict[str, Any]) -> None:
+        conn = self._connect()
+        now = time.time()
+        expired = False
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # An expired session the vacuum has not reached yet starts over;
+            # otherwise refreshing last_access would bring its old messages back
+            row = conn.execute(
+                "SELECT last_access FROM sessions WHERE session_key = ?", (session_key,)
+            ).fetchone()
+            if row is not None and now - row[0] > self.ttl_seconds:
+                conn.execute("DELETE FROM messages WHERE session_key = ?", (session_key,))
+                conn.execute("DELETE FROM summaries WHERE session_key = ?", (session_key,))
+                expired = True
+            conn.execute(
+                "INSERT INTO sessions (session_key, last_access) VALUES (?, ?) "
+                "ON CONFLICT(session_key) DO UPDATE SET last_access = excluded.last_access",
+                (session_key, now)
+            )
+            # The row id doubles as the message id, increasing across every worker
+            message_id = conn.execute(
+                "INSERT INTO messages (session_key, message) VALUES (?, ?)",
+                (session_key, json.dumps(message))
+            ).lastrowid
+            # Enforce the per-session cap using the (session_key, id) index
+            conn.execute(
+                "DELETE FROM messages WHERE session_key = ? AND id <= ("
+                "SELECT id FROM messages WHERE session_key = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_key, session_key, self.max_messages)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        message["id"] = message_id
+        if expired:
+            with self._counter_lock:
+                self.expired_sessions += 1
+
+    def get_summary(self, session_key: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT summary FROM summaries JOIN sessions USING (session_key) "
+            "WHERE session_key = ? AND last_access >= ?",
+            (session_key, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_summary(self, session_key: str, summary: Dict[str, Any]) -> None:
+        # Summaries from before message ids recorded a timestamp; any id-based one replaces them
+        self._connect().execute(
+            "INSERT INTO summaries (session_key, summary) "
+            "SELECT session_key, ? FROM sessions WHERE session_key = ? "
+            "ON CONFLICT(session_key) DO UPDATE SET summary = excluded.summary "
+            "WHERE json_type(summaries.summary, '$.through') IS NOT 'integer' "
+            "OR json_extract(summaries.summary, '$.through') < json_extract(excluded.summary, '$.through')",
+            (json.dumps(summary), session_key)
+        )
+
+    def delete(self, session_key: str) -> None:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM messages WHERE session_key = ?", (session_key,))
+            conn.execute("DELETE FROM summaries WHERE session_key = ?", (session_key,))
+            conn.execute("DELETE FROM sessions WHERE session_key = ?", (session_key,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def vacuum(self) -> int:
+        """
+        Delete sessions idle longer than the TTL and return how many were removed.
+
+        Each batch is its own short write transaction, with a pause between
+        batches so appends from other workers, which run on their event
+        loops, get the lock rather than waiting out the whole sweep.
+        """
+        conn = self._connect()
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                keys = [key for (key,) in conn.execute(
+                    "SELECT session_key FROM sessions WHERE last_access < ? LIMIT ?",
+                    (cutoff, self.vacuum_batch)
+                )]
+                placeholders = ",".join("?" * len(keys))
+                for table in ("messages", "summaries", "sessions") if keys else ():
+                    conn.execute(f"DELETE FROM {table} WHERE session_key IN ({placeholders})", keys)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            removed += len(keys)
+            with self._counter_lock:
+                self.expired_sessions += len(keys)
+            if len(keys) < self.vacuum_batch or self._stop.wait(0.01):
+                break
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        return removed
+
+    def _vacuum_loop(self) -> None:
+        while not self._stop.wait(self.vacuum_interval):
+            try:
+                self.vacuum()
+            except sqlite3.Error:
+                VACUUM_FAILURES.inc()
+
+    def close(self) -> None:
+        """Stop the vacuum thread and close this thread's connection."""
+        self._stop.set()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        with self._counter_lock:
+            return {
+                "backend": "sqlite",
+                "sessions": sessions,
+                "messages": messages,
+                "resident_bytes": page_count * page_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": {"ttl": self.expired_sessions}
+            }
+
+
+def create_conversation_store() -> ConversationStore:
+    """Build the conversation store configured through the environment."""
+    if os.getenv("CONVERSATION_STORE", "memory").lower() == "sqlite":
+        return SQLiteConversationStore(
+            path=os.getenv("CONVERSATION_DB_PATH", "dietdraft_conversations.db"),
+            max_messages=int(os.getenv("CONVERSATION_MAX_MESSAGES", "50")),
+            ttl_seconds=float(os.getenv("CONVERSATION_TTL_SECONDS", str(6 * 3600))),
+            vacuum_interval=float(os.getenv("CONVERSATION_VACUUM_INTERVAL", "300")),
+            vacuum_batch=int(os.getenv("CONVERSATION_VACUUM_BATCH", "200"))
+        )
+    return InMemoryConversationStore(
+        max_sessions=int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000")),
+        max_messages=int(os.getenv("CONVERSATION_MAX_MESSAGES", "50")),
+        ttl_seconds=float(os.getenv("CONVERSATION_TTL_SECONDS", str(6 * 3600))),
+        max_bytes=int(os.getenv("CONVERSATION_MAX_BYTES", str(64 * 1024 * 1024)))
+    )
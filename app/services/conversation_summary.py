@@ -0,0 +1,180 @@
+# app/services/conversation_summary.py
+import os
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+from dotenv import load_dotenv
+
+from app.services.conversation_store import ConversationStore
+from app.services.llm_client import create_chat_completion
+from app.services.metrics import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Latest messages never folded into the summary, so prompts always carry them verbatim
+RECENT_MESSAGES = int(os.getenv("COACH_RECENT_MESSAGES", "4"))
+
+# Unsummarized tokens (beyond the recent messages) that trigger a re-summary
+SUMMARY_TRIGGER_TOKENS = int(os.getenv("COACH_SUMMARY_TRIGGER_TOKENS", "400"))
+
+# Upper bound on the summary itself
+SUMMARY_MAX_TOKENS = int(os.getenv("COACH_SUMMARY_MAX_TOKENS", "150"))
+
+# Background summary updates, kept referenced until they finish
+_pending_updates: Set[asyncio.Task] = set()
+
+SUMMARY_UPDATE_FAILURES = metrics.counter(
+    "dietdraft_summary_update_failures_total",
+    "Background conversation summary updates that failed."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def unsummarized_messages(
+    conversation_history: List[Dict[str, Any]],
+    summary: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """Return the messages newer than the point the summary covers."""
+    if not summary:
+        return conversation_history
+    # Message ids from the store; a summary from before ids existed covers nothing
+    through = summary.get("through")
+    if not isinstance(through, int):
+        through = 0
+    return [msg for msg in conversation_history if msg.get("id", 0) > through]
+
+
+def build_conversation_context(
+    conversation_history: List[Dict[str, Any]],
+    summary: Optional[Dict[str, Any]],
+    token_budget: int,
+    heading: str = "Recent conversation:"
+) -> str:
+    """
+    Build "summary + messages it does not cover" context under a token ceiling.
+
+    The current message (last item of the history) is excluded. Messages
+    newer than the summary, which are at least the last RECENT_MESSAGES
+    plus any not yet folded in, are added newest first until the budget is
+    spent; the one that crosses the budget is truncated and older ones are
+    dropped.
+
+    Args:
+        conversation_history: Messages including the current user message
+        summary: Rolling summary for the session, if any
+        token_budget: Maximum estimated tokens for the whole context
+        heading: Label placed before the recent messages
+    """
+    previous = unsummarized_messages(conversation_history[:-1], summary)
+    summary_text = (summary or {}).get("text", "")
+    if not previous and not summary_text:
+        return ""
+
+    remaining = token_budget
+    sections = []
+    if summary_text:
+        summary_text = summary_text[:min(SUMMARY_MAX_TOKENS, token_budget) * 4]
+        sections.append(f"Conversation summary: {summary_text}")
+        remaining -= estimate_tokens(sections[0])
+
+    lines: List[str] = []
+    for msg in reversed(previous):
+        if remaining <= 0:
+            break
+        role = "User" if msg["role"] == "user" else "Diet Coach"
+        line = f"{role}: {msg['content']}"
+        cost = estimate_tokens(line)
+        if cost > remaining:
+            line = line[:remaining * 4] + "..."
+            cost = remaining
+        lines.append(line)
+        remaining -= cost
+
+    if lines:
+        sections.append(heading + "\n" + "\n".join(reversed(lines)))
+    return "\n".join(sections) + "\n"
+
+
+async def update_summary(
+    store: ConversationStore,
+    session_key: str,
+    conversation_history: List[Dict[str, Any]],
+    summary: Optional[Dict[str, Any]],
+    api_key: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Fold older turns into the rolling summary once they exceed the trigger.
+
+    Only messages older than the last RECENT_MESSAGES and not yet covered
+    by the summary are sent, together with the previous summary, so each
+    update costs roughly the same no matter how long the session runs.
+
+    Returns:
+        The new summary, or None if no update was needed or it failed
+    """
+    pending = unsummarized_messages(conversation_history, summary)[:-RECENT_MESSAGES or None]
+    if not pending:
+        return None
+    pending_text = "\n".join(
+        f"{'User' if msg['role'] == 'user' else 'Diet Coach'}: {msg['content']}" for msg in pending
+    )
+    if estimate_tokens(pending_text) < SUMMARY_TRIGGER_TOKENS:
+        return None
+
+    previous_summary = (summary or {}).get("text", "")
+    prompt = f"""
+    Update the running summary of a conversation between a user and their diet coach.
+    
+    Current summary: {previous_summary or "(none yet)"}
+    
+    New messages:
+    {pending_text}
+    
+    Write a single compact paragraph that keeps the user's goals, dietary preferences,
+    allergies, meals already suggested, and open questions. Drop small talk.
+    """
+
+    try:
+        response = await create_chat_completion(
+            api_key,
+            stage="summary",
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You maintain concise running summaries of diet coaching conversations."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=SUMMARY_MAX_TOKENS
+        )
+        new_summary = {
+            "text": response.choices[0].message.content.strip(),
+            "through": pending[-1].get("id", 0)
+        }
+    except Exception:
+        SUMMARY_UPDATE_FAILURES.inc()
+        return None
+
+    store.set_summary(session_key, new_summary)
+    return new_summary
+
+
+def schedule_summary_update(
+    store: ConversationStore,
+    session_key: str,
+    conversation_history: List[Dict[str, Any]],
+    summary: Optional[Dict[str, Any]],
+    api_key: str
+) -> None:
+    """Run update_summary in the background so it never delays a response."""
+    task = asyncio.create_task(
+        update_summary(store, session_key, list(conversation_history), summary, api_key)
+    )
+    _pending_updates.add(task)
+    task.add_done_callback(_pending_updates.discard)
@@ -0,0 +1,73 @@
+# app/services/deadline.py
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("dietdraft_deadline", default=None)
+
+
+class DeadlineExceededError(Exception):
+    """Raised instead of starting upstream work once the request deadline has passed."""
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when there is none."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceededError if the current deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceededError("Request deadline exceeded")
+
+
+def _narrowed(seconds: Optional[float], reserve: float) -> Optional[float]:
+    deadline = _deadline.get()
+    if seconds is not None:
+        own = time.monotonic() + seconds
+        deadline = own if deadline is None else min(deadline, own)
+    if deadline is not None:
+        deadline -= reserve
+    return deadline
+
+
+def start_deadline(seconds: Optional[float] = None, reserve: float = 0.0) -> None:
+    """
+    Tighten the deadline for the rest of the current task.
+
+    For async generators, which cannot hold a scope open across yields; the
+    streaming response runs in its own task, so the setting stays local to it.
+    """
+    _deadline.set(_narrowed(seconds, reserve))
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None, reserve: float = 0.0) -> Iterator[None]:
+    """
+    Run a block under a deadline no later than the enclosing one.
+
+    Args:
+        seconds: Budget for the block from now, or None to keep the enclosing deadline
+        reserve: Seconds to hold back from the block for work that follows it
+    """
+    token = _deadline.set(_narrowed(seconds, reserve))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def no_deadline() -> Iterator[None]:
+    """Detach background work started in the block from the request deadline."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
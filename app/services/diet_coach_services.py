@@ -3,43 +3,243 @@ import os
 import json
 import uuid
 import re
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+import time
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional, Tuple
 from dotenv import load_dotenv
 
+from app.services.llm_client import create_chat_completion, resolve_api_key, run_sync, stream_chat_completion
+
 # Import tool services
-from app.services.meal_service import generate_meal
-from app.services.substitution_services import find_substitutions
-from app.services.reasoning_services import generate_meal_reasoning
+from app.services.meal_service import generate_meal_async
+from app.services.substitution_services import canonical_substitution_request, find_substitutions_async
+from app.services.tool_scheduler import ToolOutcome, ToolScheduler
+from app.services.concurrency_limiter import UpstreamOverloadedError
+from app.services.conversation_store import create_conversation_store, make_message
+from app.services.conversation_summary import build_conversation_context, schedule_summary_update
+from app.services.intent_classifier import classify_intent
+from app.services.metrics import COACH_STAGE_SECONDS, ERRORS
+from app.services.tracing import record_span, span
+from app.services.deadline import deadline_scope, no_deadline, remaining, start_deadline
 
 load_dotenv()
 
-# Simple in-memory conversation storage with better session management
-conversations = {}
+# Bounded conversation storage with better session management
+conversation_store = create_conversation_store()
+
+# Token ceilings for the conversation context in each prompt
+INTENT_CONTEXT_TOKENS = int(os.getenv("COACH_INTENT_CONTEXT_TOKENS", "250"))
+COACH_CONTEXT_TOKENS = int(os.getenv("COACH_RESPONSE_CONTEXT_TOKENS", "400"))
+
+# Local intent classifications at or above this confidence skip the LLM
+LOCAL_INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_INTENT_CONFIDENCE_THRESHOLD", "0.85"))
+
+# Time budget for a whole turn; clients may ask for less, not more
+COACH_DEADLINE_SECONDS = float(os.getenv("DIET_COACH_DEADLINE_SECONDS", "25"))
+# Held back from intent and tools so the coach response always gets a turn
+COACH_RESPONSE_RESERVE_SECONDS = float(os.getenv("COACH_RESPONSE_RESERVE_SECONDS", "6"))
+
+COACH_FALLBACK_RESPONSE = "I'm here to help you with your nutrition goals! I'm having a technical moment - could you tell me again what you'd like to work on?"
+
+# Public tool names for scheduler node prefixes
+_TOOL_NAMES = {
+    "substitution": "find_substitutions",
+    "meal": "generate_meal",
+    "reasoning": "meal_reasoning"
+}
 
 def process_diet_coach_request(
     message: str,
     conversation_id: Optional[str] = None,
     user_id: Optional[str] = None,
-    api_key: Optional[str] = None
+    api_key: Optional[str] = None,
+    deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Synchronous wrapper around process_diet_coach_request_async for non-async callers.
+    """
+    return run_sync(process_diet_coach_request_async(
+        message=message,
+        conversation_id=conversation_id,
+        user_id=user_id,
+        api_key=api_key,
+        deadline_seconds=deadline_seconds
+    ))
+
+def _turn_budget(deadline_seconds: Optional[float]) -> Tuple[Optional[float], float]:
+    """Overall seconds for this turn and the share reserved for the coach response."""
+    budget = COACH_DEADLINE_SECONDS if COACH_DEADLINE_SECONDS > 0 else None
+    if deadline_seconds is not None:
+        budget = deadline_seconds if budget is None else min(budget, deadline_seconds)
+    if budget is None:
+        return None, 0.0
+    return budget, min(COACH_RESPONSE_RESERVE_SECONDS, budget / 3)
+
+async def process_diet_coach_request_async(
+    message: str,
+    conversation_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    api_key: Optional[str] = None,
+    deadline_seconds: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Main diet coach processing function with improved session management.
     
+    The turn runs under a deadline: intent analysis and tools must finish
+    early enough to leave the coach response its reserve, tools still
+    running then are cancelled, and the coach answers with what completed.
+    
     Args:
         message: User's message
         conversation_id: Optional conversation ID for context
         user_id: Optional user ID for session management
         api_key: OpenAI API key
+        deadline_seconds: Optional client budget, capped by DIET_COACH_DEADLINE_SECONDS
         
     Returns:
         Dict with coach response and tool results
     """
     # Get API key
-    key = api_key or os.getenv("OPENAI_API_KEY")
-    if not key:
-        raise ValueError("OpenAI API key is required")
+    key = resolve_api_key(api_key)
+    budget, reserve = _turn_budget(deadline_seconds)
+    
+    with deadline_scope(budget):
+        with span("session.load"):
+            user_id, conversation_id, session_key, conversation_history, summary = _open_session(
+                message, conversation_id, user_id
+            )
+        
+        with deadline_scope(reserve=reserve):
+            # Step 1: Analyze user intent with conversation context
+            with span("intent"):
+                intent_analysis = await analyze_user_intent_with_context(message, conversation_history, key, summary)
+            
+            # Step 2: Execute appropriate tools
+            tool_execution = await execute_tools(intent_analysis, key)
+        
+        # Step 3: Generate coaching response
+        with span("coach_response"):
+            coach_response = await generate_coach_response_with_context(
+                message=message,
+                conversation_history=conversation_history,
+                intent_analysis=intent_analysis,
+                tool_execution=tool_execution,
+                api_key=key,
+                summary=summary
+            )
+    
+    with span("session.save"):
+        _record_coach_response(session_key, conversation_history, summary, coach_response, key)
+    
+    return _build_coach_result(
+        coach_response, intent_analysis, tool_execution, conversation_id, user_id
+    )
+
+def stream_diet_coach_request(
+    message: str,
+    conversation_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    api_key: Optional[str] = None,
+    deadline_seconds: Optional[float] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of process_diet_coach_request_async.
+    
+    Returns an async iterator of progress events, each a dict with "event"
+    and "data" keys: "session" immediately, "intent" once intent analysis is
+    done, "tool" as each tool finishes, "token" for each fragment of the
+    coach response, and finally "done" with the same payload the
+    non-streaming endpoint returns.
+    
+    Args:
+        message: User's message
+        conversation_id: Optional conversation ID for context
+        user_id: Optional user ID for session management
+        api_key: OpenAI API key
+        deadline_seconds: Optional client budget, capped by DIET_COACH_DEADLINE_SECONDS
+    """
+    # Resolve the key up front so a missing key fails before streaming starts
+    key = resolve_api_key(api_key)
+    return _stream_diet_coach_events(message, conversation_id, user_id, key, deadline_seconds)
+
+async def _stream_diet_coach_events(
+    message: str,
+    conversation_id: Optional[str],
+    user_id: Optional[str],
+    key: str,
+    deadline_seconds: Optional[float] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    # Spans and deadline scopes must not be held open across a yield, so they
+    # wrap awaits only; the turn's own deadline lasts for the response task
+    budget, reserve = _turn_budget(deadline_seconds)
+    start_deadline(budget)
+    
+    with span("session.load"):
+        user_id, conversation_id, session_key, conversation_history, summary = _open_session(
+            message, conversation_id, user_id
+        )
+    
+    yield {"event": "session", "data": {"conversation_id": conversation_id, "user_id": user_id}}
+    
+    # Step 1: Analyze user intent with conversation context
+    with span("intent"), deadline_scope(reserve=reserve):
+        intent_analysis = await analyze_user_intent_with_context(message, conversation_history, key, summary)
+    yield {
+        "event": "intent",
+        "data": {
+            "intent": intent_analysis.get("intent"),
+            "tools_needed": intent_analysis.get("tools_needed", [])
+        }
+    }
     
+    # Step 2: Execute tools, forwarding each result as soon as it lands
+    tool_events: asyncio.Queue = asyncio.Queue()
+    with deadline_scope(reserve=reserve):
+        # The task copies the narrowed deadline when it is created
+        tools_task = asyncio.create_task(
+            execute_tools(intent_analysis, key, on_tool_complete=tool_events.put_nowait)
+        )
+    tools_task.add_done_callback(lambda _: tool_events.put_nowait(None))
+    try:
+        while True:
+            tool_event = await tool_events.get()
+            if tool_event is None:
+                break
+            yield {"event": "tool", "data": tool_event}
+        tool_execution = await tools_task
+    finally:
+        tools_task.cancel()
+    
+    # Step 3: Stream the coaching response
+    fragments = []
+    async for fragment in stream_coach_response_with_context(
+        message=message,
+        conversation_history=conversation_history,
+        intent_analysis=intent_analysis,
+        tool_execution=tool_execution,
+        api_key=key,
+        summary=summary
+    ):
+        fragments.append(fragment)
+        yield {"event": "token", "data": {"content": fragment}}
+    coach_response = "".join(fragments)
+    
+    with span("session.save"):
+        _record_coach_response(session_key, conversation_history, summary, coach_response, key)
+    
+    yield {
+        "event": "done",
+        "data": _build_coach_result(
+            coach_response, intent_analysis, tool_execution, conversation_id, user_id
+        )
+    }
+
+def _open_session(
+    message: str,
+    conversation_id: Optional[str],
+    user_id: Optional[str]
+) -> Tuple[str, str, str, List[Dict], Optional[Dict[str, Any]]]:
+    """Resolve IDs, load the conversation history and summary, and append the user message."""
     # Generate user_id if not provided (anonymous user)
     if not user_id:
         user_id = str(uuid.uuid4())
@@ -48,52 +248,54 @@ def process_diet_coach_request(
     if not conversation_id:
         conversation_id = str(uuid.uuid4())
     
-    # Get or create conversation history in memory
+    # Get or create conversation history from the store
     # Using user_id as part of the key for better session management
     session_key = f"{user_id}:{conversation_id}"
+    conversation_history = conversation_store.get_history(session_key)
+    summary = None
     
-    if session_key not in conversations:
-        conversations[session_key] = []
+    if conversation_history is None:
+        conversation_history = []
         print(f"Created new conversation: {session_key}")
     else:
-        print(f"Continuing conversation: {session_key} (has {len(conversations[session_key])} messages)")
-    
-    conversation_history = conversations[session_key]
+        summary = conversation_store.get_summary(session_key)
+        print(f"Continuing conversation: {session_key} (has {len(conversation_history)} messages)")
     
     # Add user message to history
-    conversation_history.append({
-        "role": "user",
-        "content": message,
-        "timestamp": "now"
-    })
-    
-    # Step 1: Analyze user intent with conversation context
-    intent_analysis = analyze_user_intent_with_context(message, conversation_history, key)
-    
-    # Step 2: Execute appropriate tools
-    tool_execution = execute_tools(intent_analysis, key)
-    
-    # Step 3: Generate coaching response
-    coach_response = generate_coach_response_with_context(
-        message=message,
-        conversation_history=conversation_history,
-        intent_analysis=intent_analysis,
-        tool_execution=tool_execution,
-        api_key=key
-    )
+    user_message = make_message("user", message)
+    conversation_history.append(user_message)
+    conversation_store.append(session_key, user_message)
     
-    # Add coach response to history
-    conversation_history.append({
-        "role": "assistant",
-        "content": coach_response,
-        "timestamp": "now"
-    })
-    
-    # Update conversation storage
-    conversations[session_key] = conversation_history
+    return user_id, conversation_id, session_key, conversation_history, summary
+
+def _record_coach_response(
+    session_key: str,
+    conversation_history: List[Dict],
+    summary: Optional[Dict[str, Any]],
+    coach_response: str,
+    api_key: str
+) -> None:
+    """Append the coach response to the history, persist it and refresh the rolling summary."""
+    # Add coach response to history and update conversation storage
+    assistant_message = make_message("assistant", coach_response)
+    conversation_history.append(assistant_message)
+    conversation_store.append(session_key, assistant_message)
     
     print(f"Updated conversation {session_key}: now has {len(conversation_history)} messages")
     
+    # Fold older turns into the summary once they outgrow the token budget;
+    # the update runs in the background, outside this request's deadline
+    with no_deadline():
+        schedule_summary_update(conversation_store, session_key, conversation_history, summary, api_key)
+
+def _build_coach_result(
+    coach_response: str,
+    intent_analysis: Dict[str, Any],
+    tool_execution: Dict[str, Any],
+    conversation_id: str,
+    user_id: str
+) -> Dict[str, Any]:
+    """Build the DietCoachResponse payload."""
     return {
         "response": coach_response,
         "action_taken": intent_analysis.get("intent"),
@@ -103,23 +305,30 @@ def process_diet_coach_request(
         "data": tool_execution.get("results", {})
     }
 
-def analyze_user_intent_with_context(
+async def analyze_user_intent_with_context(
     message: str, 
     conversation_history: List[Dict], 
-    api_key: str
+    api_key: str,
+    summary: Optional[Dict[str, Any]] = None,
+    use_local_classifier: bool = True
 ) -> Dict[str, Any]:
     """
-    Analyze user message with conversation context (simplified for in-memory version).
-    """
-    client = OpenAI(api_key=api_key)
+    Analyze user message with conversation context (rolling summary plus recent turns).
     
-    # Build context from conversation history
-    context_text = ""
-    if len(conversation_history) > 2:  # More than just current message
-        context_text = "Recent conversation:\n"
-        for msg in conversation_history[-6:-1]:  # Last few messages, excluding current
-            role = "User" if msg["role"] == "user" else "Diet Coach"
-            context_text += f"{role}: {msg['content'][:100]}...\n"
+    The local intent classifier answers first; the LLM is only called when
+    its confidence is below LOCAL_INTENT_CONFIDENCE_THRESHOLD.
+    """
+    start = time.perf_counter()
+    if use_local_classifier:
+        local_analysis = classify_intent(message, conversation_history, summary)
+        if local_analysis["confidence"] >= LOCAL_INTENT_CONFIDENCE_THRESHOLD:
+            COACH_STAGE_SECONDS.observe(time.perf_counter() - start, stage="intent:local")
+            return local_analysis
+    
+    # Build context from the summary and recent history, excluding the current message
+    context_text = build_conversation_context(
+        conversation_history, summary, INTENT_CONTEXT_TOKENS, heading="Recent conversation:"
+    )
     
     prompt = f"""
     Analyze this user message in context:
@@ -159,7 +368,9 @@ def analyze_user_intent_with_context(
     """
     
     try:
-        response = client.chat.completions.create(
+        response = await create_chat_completion(
+            api_key,
+            stage="intent",
             model="gpt-3.5-turbo",
             messages=[
                 {
@@ -173,10 +384,20 @@ def analyze_user_intent_with_context(
             response_format={"type": "json_object"}
         )
         
-        return json.loads(response.choices[0].message.content)
+        analysis = json.loads(response.choices[0].message.content)
+        COACH_STAGE_SECONDS.observe(time.perf_counter() - start, stage="intent:llm")
+        return analysis
+    except UpstreamOverloadedError:
+        # Shed or circuit open: let the route answer 429/503 with Retry-After
+        ERRORS.inc(component="intent")
+        COACH_STAGE_SECONDS.observe(time.perf_counter() - start, stage="intent:llm")
+        raise
     except Exception as e:
+        ERRORS.inc(component="intent")
+        COACH_STAGE_SECONDS.observe(time.perf_counter() - start, stage="intent:llm")
+        
         # Enhanced fallback with conversation awareness
-        has_previous_context = len(conversation_history) > 2
+        has_previous_context = len(conversation_history) > 2 or bool(summary)
         
         return {
             "intent": "follow_up" if has_previous_context else "generate_recipe",
@@ -188,13 +409,36 @@ def analyze_user_intent_with_context(
             "context_understanding": "Fallback analysis due to parsing error"
         }
 
-def execute_tools(intent_analysis: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+def _dedupe_substitution_requests(requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop substitution requests that repeat an earlier ingredient/reason pair."""
+    seen = set()
+    unique = []
+    for sub_req in requests:
+        canonical = canonical_substitution_request(
+            sub_req.get("ingredient", ""), sub_req.get("reason", "dietary preference")
+        )
+        if canonical not in seen:
+            seen.add(canonical)
+            unique.append(sub_req)
+    return unique
+
+
+async def execute_tools(
+    intent_analysis: Dict[str, Any],
+    api_key: str,
+    on_tool_complete: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
     """
     Execute the appropriate tools based on intent analysis.
     
+    Independent tools run concurrently; when meal reasoning is needed too it
+    is written by the same completion as the meal.
+    
     Args:
         intent_analysis: Results from analyze_user_intent
         api_key: OpenAI API key
+        on_tool_complete: Optional callback receiving a tool event
+            ({"tool", "result", "error"}) as each tool finishes
         
     Returns:
         Dict with tool results
@@ -202,94 +446,199 @@ def execute_tools(intent_analysis: Dict[str, Any], api_key: str) -> Dict[str, An
     tools_used = []
     tool_results = {}
     extracted_info = intent_analysis.get("extracted_info", {})
+    tools_needed = intent_analysis.get("tools_needed", [])
+    scheduler = ToolScheduler()
     
     # Handle substitution requests
-    if "find_substitutions" in intent_analysis.get("tools_needed", []):
-        substitution_requests = extracted_info.get("substitution_requests", [])
-        if substitution_requests:
-            substitution_results = []
-            for sub_req in substitution_requests:
-                try:
-                    result = find_substitutions(
-                        original_ingredient=sub_req.get("ingredient", ""),
-                        reason=sub_req.get("reason", "dietary preference"),
-                        api_key=api_key
-                    )
-                    substitution_results.append(result)
-                    tools_used.append("find_substitutions")
-                except Exception as e:
-                    tool_results[f"substitution_error"] = str(e)
-            
-            if substitution_results:
-                tool_results["substitutions"] = substitution_results
+    substitution_requests = []
+    if "find_substitutions" in tools_needed:
+        substitution_requests = _dedupe_substitution_requests(extracted_info.get("substitution_requests", []))
+        for index, sub_req in enumerate(substitution_requests):
+            scheduler.add(
+                f"substitution:{index}",
+                lambda deps, sub_req=sub_req: find_substitutions_async(
+                    original_ingredient=sub_req.get("ingredient", ""),
+                    reason=sub_req.get("reason", "dietary preference"),
+                    api_key=api_key
+                )
+            )
     
     # Handle meal generation
-    if "generate_meal" in intent_analysis.get("tools_needed", []):
-        try:
-            # Build meal request from extracted info
-            meal_params = {}
-            
-            if extracted_info.get("ingredients"):
-                meal_params["include_ingredients"] = extracted_info["ingredients"]
-            
-            if extracted_info.get("dietary_preferences"):
-                meal_params["dietary_preferences"] = extracted_info["dietary_preferences"]
-            
-            if extracted_info.get("meal_type"):
-                meal_params["meal_type"] = extracted_info["meal_type"]
-            
-            if extracted_info.get("allergies"):
-                meal_params["allergies"] = extracted_info["allergies"]
-            
-            # Generate meal with extracted parameters
-            meal_result = generate_meal(api_key=api_key, **meal_params)
-            tool_results["meal"] = meal_result
-            tools_used.append("generate_meal")
-            
-        except Exception as e:
-            tool_results["meal_error"] = str(e)
-    
-    # Handle nutritional reasoning (if meal was generated)
-    if "meal_reasoning" in intent_analysis.get("tools_needed", []) and "meal" in tool_results:
-        try:
-            meal = tool_results["meal"]
-            reasoning_result = generate_meal_reasoning(
-                api_key=api_key,
-                meal_name=meal.get("meal_name", "Generated Meal"),
-                ingredients=meal.get("ingredients", []),
-                dietary_preferences=extracted_info.get("dietary_preferences", [])
+    if "generate_meal" in tools_needed:
+        # Build meal request from extracted info
+        meal_params = {}
+        
+        if extracted_info.get("ingredients"):
+            meal_params["include_ingredients"] = extracted_info["ingredients"]
+        
+        if extracted_info.get("dietary_preferences"):
+            meal_params["dietary_preferences"] = extracted_info["dietary_preferences"]
+        
+        if extracted_info.get("meal_type"):
+            meal_params["meal_type"] = extracted_info["meal_type"]
+        
+        if extracted_info.get("allergies"):
+            meal_params["allergies"] = extracted_info["allergies"]
+        
+        # Generate meal with extracted parameters; when reasoning is also
+        # needed it is written in the same completion and split off here so
+        # the meal result keeps its usual shape
+        include_reasoning = "meal_reasoning" in tools_needed
+        written_reasoning: Dict[str, Any] = {}
+        
+        async def meal_tool(deps: Dict[str, Any]) -> Dict[str, Any]:
+            meal = await generate_meal_async(api_key=api_key, include_reasoning=include_reasoning, **meal_params)
+            if include_reasoning:
+                meal = dict(meal)
+                written_reasoning["reasoning"] = meal.pop("reasoning")
+                written_reasoning["error"] = meal.pop("reasoning_error", None)
+            return meal
+        
+        scheduler.add("meal", meal_tool)
+        
+        # Handle nutritional reasoning (taken from the generated meal)
+        if include_reasoning:
+            scheduler.add(
+                "reasoning",
+                lambda deps: _reasoning_from_meal(deps["meal"], written_reasoning["reasoning"], written_reasoning["error"]),
+                depends_on=["meal"]
             )
-            tool_results["reasoning"] = reasoning_result
-            tools_used.append("meal_reasoning")
-            
-        except Exception as e:
-            tool_results["reasoning_error"] = str(e)
+    
+    def report(name: str, outcome: ToolOutcome) -> None:
+        if on_tool_complete is None or outcome.skipped:
+            return
+        on_tool_complete({
+            "tool": _TOOL_NAMES[name.split(":")[0]],
+            "result": outcome.result,
+            "error": outcome.error
+        })
+    
+    # Tools still running at the deadline are cancelled and reported as timed out
+    with span("tools", count=len(scheduler)):
+        outcomes = await scheduler.run(on_complete=report, timeout=remaining())
+    for name, outcome in outcomes.items():
+        if outcome.skipped:
+            continue
+        stage = f"tool:{_TOOL_NAMES[name.split(':')[0]]}"
+        COACH_STAGE_SECONDS.observe(outcome.elapsed, stage=stage)
+        if outcome.error is not None:
+            ERRORS.inc(component=stage)
+    
+    # Collect results in the same shape and order as sequential execution
+    substitution_results = []
+    for index in range(len(substitution_requests)):
+        outcome = outcomes[f"substitution:{index}"]
+        if outcome.ok:
+            substitution_results.append(outcome.result)
+            tools_used.append("find_substitutions")
+        else:
+            tool_results["substitution_error"] = outcome.error
+    
+    if substitution_results:
+        tool_results["substitutions"] = substitution_results
+    
+    for name in ("meal", "reasoning"):
+        outcome = outcomes.get(name)
+        if outcome is None or outcome.skipped:
+            continue
+        if outcome.ok:
+            tool_results[name] = outcome.result
+            tools_used.append(_TOOL_NAMES[name])
+        else:
+            tool_results[f"{name}_error"] = outcome.error
     
     return {
         "tools_used": tools_used,
         "results": tool_results
     }
 
-def generate_coach_response_with_context(
+async def _reasoning_from_meal(
+    meal: Dict[str, Any],
+    reasoning: Optional[Dict[str, str]],
+    error: Optional[str]
+) -> Dict[str, Any]:
+    """Shape the reasoning written alongside a meal like a meal_reasoning result."""
+    if reasoning is None:
+        # Fails only the reasoning tool; the meal result stands
+        raise Exception(error or "Failed to generate meal reasoning")
+    return {
+        "meal_name": meal.get("meal_name", "Generated Meal"),
+        "reasoning": reasoning
+    }
+
+async def generate_coach_response_with_context(
     message: str,
     conversation_history: List[Dict],
     intent_analysis: Dict[str, Any],
     tool_execution: Dict[str, Any],
-    api_key: str
+    api_key: str,
+    summary: Optional[Dict[str, Any]] = None
 ) -> str:
     """
     Generate a personalized coaching response with conversation context.
     """
-    client = OpenAI(api_key=api_key)
+    try:
+        with COACH_STAGE_SECONDS.time(stage="coach_response"):
+            response = await create_chat_completion(
+                api_key,
+                stage="coach",
+                **_build_coach_request(message, conversation_history, intent_analysis, tool_execution, summary)
+            )
+        
+        return response.choices[0].message.content
+    except UpstreamOverloadedError:
+        ERRORS.inc(component="coach_response")
+        raise
+    except Exception as e:
+        ERRORS.inc(component="coach_response")
+        return COACH_FALLBACK_RESPONSE
+
+async def stream_coach_response_with_context(
+    message: str,
+    conversation_history: List[Dict],
+    intent_analysis: Dict[str, Any],
+    tool_execution: Dict[str, Any],
+    api_key: str,
+    summary: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream the coaching response fragment by fragment.
     
-    # Build rich context from conversation history
-    history_context = ""
-    if len(conversation_history) > 2:
-        recent_messages = conversation_history[-6:-1]  # Last few exchanges, excluding current
-        history_context = "Conversation context:\n"
-        for msg in recent_messages:
-            role = "User" if msg["role"] == "user" else "Diet Coach"
-            history_context += f"{role}: {msg['content'][:150]}...\n"
+    Falls back to the canned response if the upstream call fails before
+    any content has been produced, unless it was refused for overload,
+    which is passed on so the client sees when to retry.
+    """
+    produced = False
+    start = time.perf_counter()
+    try:
+        async for fragment in stream_chat_completion(
+            api_key,
+            stage="coach",
+            **_build_coach_request(message, conversation_history, intent_analysis, tool_execution, summary)
+        ):
+            produced = True
+            yield fragment
+    except Exception as e:
+        ERRORS.inc(component="coach_response")
+        if not produced and isinstance(e, UpstreamOverloadedError):
+            raise
+        if not produced:
+            yield COACH_FALLBACK_RESPONSE
+    COACH_STAGE_SECONDS.observe(time.perf_counter() - start, stage="coach_response")
+    record_span("coach_response", start)
+
+def _build_coach_request(
+    message: str,
+    conversation_history: List[Dict],
+    intent_analysis: Dict[str, Any],
+    tool_execution: Dict[str, Any],
+    summary: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Build the chat completion parameters for the coaching response."""
+    # Build rich context from the summary and recent history
+    history_context = build_conversation_context(
+        conversation_history, summary, COACH_CONTEXT_TOKENS, heading="Conversation context:"
+    )
     
     # Build tool results context with better formatting
     tool_results = tool_execution.get("results", {})
@@ -343,20 +692,15 @@ def generate_coach_response_with_context(
     integrate the results naturally into your coaching advice.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an experienced diet coach who maintains context across conversations and provides personalized guidance. Be warm, knowledgeable, and helpful."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=600
-        )
-        
-        return response.choices[0].message.content
-    except Exception as e:
-        return "I'm here to help you with your nutrition goals! I'm having a technical moment - could you tell me again what you'd like to work on?"
\ No newline at end of file
+    return {
+        "model": "gpt-3.5-turbo",
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are an experienced diet coach who maintains context across conversations and provides personalized guidance. Be warm, knowledgeable, and helpful."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 600
+    }
\ No newline at end of file
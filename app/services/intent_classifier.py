@@ -0,0 +1,197 @@
+# app/services/intent_classifier.py
+import os
+import re
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.voice_rule_parser import DIETS, parse_rules_with_negation
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "data", "intent_model.json")
+
+# Tools each intent triggers, mirroring what the intent-analysis prompt asks for
+INTENT_TOOLS = {
+    "generate_recipe": ["generate_meal"],
+    "find_substitutions": ["find_substitutions"],
+    "analyze_nutrition": ["meal_reasoning"],
+    "general_question": [],
+    "follow_up": [],
+}
+
+_TOKEN = re.compile(r"[a-z']+")
+_SUBSTITUTION = re.compile(
+    r"\b(?:substitute(?: for)?|substitution for|replace|swap(?: out)?|alternatives? (?:to|for)|"
+    r"instead of|replacement for|use instead of)\s+(?:the |my |some )?"
+    r"([a-z' ]+?)(?=\s*(?:,|\bwith\b|\bfor\b|\bbecause\b|\bsince\b|\bto make\b|\bin\b|\bas\b|[.?!]|$))"
+)
+_SUBSTITUTION_SUFFIX = re.compile(r"\b([a-z']+(?: [a-z']+)?) (?:substitutes?|alternatives?|replacements?)\b")
+_NUTRITION = re.compile(
+    r"\b(?:calories in|how many calories|how healthy|is (?:it |this |that )?healthy|nutrition(?:al)? "
+    r"(?:facts|value|info|information|benefits)|macros|how much (?:protein|fat|sugar|fiber|carbs))\b"
+)
+_MEAL_REQUEST = re.compile(
+    r"\b(?:recipe|make me|give me|cook|suggest|idea for|ideas for|something for|what should i "
+    r"(?:eat|make|cook|have)|breakfast|lunch|dinner|supper|snack|dessert|meal)\b"
+)
+_EXPLAIN = re.compile(r"\b(?:why|explain|benefits|nutrition(?:al)?|how healthy)\b")
+_REFERENCE = re.compile(
+    r"\b(?:it|that|this|those|them|again|another|instead|previous|earlier|same|the recipe|the meal|"
+    r"the dish|you suggested|you gave)\b"
+)
+_PRONOUNS = {"it", "that", "this", "those", "them", "one"}
+_LEADING_FILLER = re.compile(r"^(?:(?:a|an|the|my|some|any|good|great|best|healthy|healthier|what's|whats|is there)\s+)+")
+_ALLERGY_WORDS = re.compile(r"\ballerg(?:y|ic|ies)\b")
+_HEALTHIER_WORDS = re.compile(r"\b(?:healthier|lower calorie|low calorie|lighter|less fat|less sugar)\b")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased unigrams and bigrams used as model features."""
+    words = _TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class IntentModel:
+    """Multinomial logistic regression over TF-IDF features, loaded from JSON."""
+
+    def __init__(self, classes: List[str], idf: Dict[str, float], weights: Dict[str, Dict[str, float]], bias: Dict[str, float]):
+        self.classes = classes
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def load(cls, path: str = MODEL_PATH) -> Optional["IntentModel"]:
+        """Load the shipped artifact, or return None if it is missing."""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["classes"], data["idf"], data["weights"], data["bias"])
+
+    def features(self, text: str) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        for token in tokenize(text):
+            if token in self.idf:
+                counts[token] = counts.get(token, 0.0) + 1.0
+        vector = {token: count * self.idf[token] for token, count in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {token: v / norm for token, v in vector.items()}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        vector = self.features(text)
+        scores = {
+            label: self.bias[label] + sum(self.weights[label].get(t, 0.0) * v for t, v in vector.items())
+            for label in self.classes
+        }
+        top = max(scores.values())
+        exp = {label: math.exp(score - top) for label, score in scores.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+
+_model = IntentModel.load()
+
+
+def _substitution_reason(text: str) -> str:
+    for match in re.finditer(r"\b(" + "|".join(re.escape(d) for d in sorted(DIETS, key=len, reverse=True)) + r")\b",
+                             text.replace("-", " ")):
+        return DIETS[match.group(1)]
+    if _ALLERGY_WORDS.search(text):
+        return "allergy"
+    if _HEALTHIER_WORDS.search(text):
+        return "healthier option"
+    return "dietary preference"
+
+
+def _substitution_requests(text: str) -> Tuple[List[Dict[str, str]], bool]:
+    """Extract (ingredient, reason) pairs; the flag is True if an ingredient is only a pronoun."""
+    captured = [m.group(1) for m in _SUBSTITUTION.finditer(text)]
+    captured += [m.group(1) for m in _SUBSTITUTION_SUFFIX.finditer(text)]
+    reason = _substitution_reason(text)
+    requests: List[Dict[str, str]] = []
+    pronoun_only = False
+    for phrase in captured:
+        for ingredient in re.split(r"\s*(?:,|\band\b|\bor\b)\s*", phrase):
+            ingredient = _LEADING_FILLER.sub("", ingredient.strip() + " ").strip()
+            if not ingredient:
+                continue
+            if ingredient in _PRONOUNS:
+                pronoun_only = True
+                continue
+            if all(req["ingredient"] != ingredient for req in requests):
+                requests.append({"ingredient": ingredient, "reason": reason})
+    return requests, pronoun_only
+
+
+def classify_intent(
+    message: str,
+    conversation_history: List[Dict[str, Any]],
+    summary: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Classify a diet coach message locally, without an LLM call.
+
+    Keyword rules decide the intent when they fire; otherwise the shipped
+    TF-IDF logistic-regression model does. Follow-ups that point back at
+    earlier turns get a low confidence, since resolving them needs the
+    conversation context only the LLM sees, as do messages ruling something
+    out in a way the rules could not parse.
+
+    Args:
+        message: Current user message
+        conversation_history: History including the current message
+        summary: Rolling conversation summary, if any
+
+    Returns:
+        Dict in the same shape as analyze_user_intent_with_context, including
+        a "confidence" between 0 and 1
+    """
+    text = message.lower()
+    has_context = len(conversation_history) > 2 or bool(summary)
+    references_previous = has_context and bool(_REFERENCE.search(text))
+
+    parsed, rule_confidence, unhandled_negation = parse_rules_with_negation(message)
+    substitution_requests, pronoun_only = _substitution_requests(text)
+    probabilities = _model.predict_proba(message) if _model else {}
+    model_intent = max(probabilities, key=probabilities.get) if probabilities else None
+
+    if substitution_requests:
+        intent, confidence = "find_substitutions", 0.95
+    elif _NUTRITION.search(text):
+        intent, confidence = "analyze_nutrition", 0.9
+    elif _MEAL_REQUEST.search(text):
+        intent, confidence = "generate_recipe", 0.9
+        # The request is only as reliable as the ingredients parsed out of it
+        if parsed["include_ingredients"] or parsed["allergies"]:
+            confidence = min(confidence, rule_confidence)
+    elif model_intent:
+        intent, confidence = model_intent, probabilities[model_intent]
+    else:
+        intent, confidence = "general_question", 0.0
+
+    # Rules and model disagreeing is a sign the message is not as easy as it looks
+    if model_intent and model_intent != intent:
+        confidence *= 0.75
+
+    tools_needed = list(INTENT_TOOLS.get(intent, []))
+    if intent == "generate_recipe" and _EXPLAIN.search(text):
+        tools_needed.append("meal_reasoning")
+    if intent == "find_substitutions" and not substitution_requests:
+        confidence = min(confidence, 0.5)
+    if references_previous or pronoun_only or unhandled_negation or intent == "follow_up":
+        confidence = min(confidence, 0.5)
+
+    return {
+        "intent": intent,
+        "tools_needed": tools_needed,
+        "extracted_info": {
+            "ingredients": parsed["include_ingredients"],
+            "dietary_preferences": parsed["dietary_preferences"],
+            "substitution_requests": substitution_requests,
+            "meal_type": parsed["meal_type"],
+            "allergies": parsed["allergies"],
+            "references_previous": references_previous
+        },
+        "confidence": round(confidence, 3),
+        "context_understanding": "Local classifier"
+    }
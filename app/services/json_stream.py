@@ -0,0 +1,139 @@
+# app/services/json_stream.py
+import re
+import json
+from typing import Any, List, Optional, Tuple
+
+# A trailing escape that cannot be decoded yet: a lone backslash, a partial
+# \uXXXX sequence, or a high surrogate still waiting for its pair
+_INCOMPLETE_ESCAPE = re.compile(r"(?<!\\)(?:\\\\)*(\\(u[0-9a-fA-F]{0,3})?|\\u[dD][89abAB][0-9a-fA-F]{2})$")
+
+
+class IncrementalJSONParser:
+    """
+    Incrementally parse a streamed top-level JSON object.
+
+    Text is fed in arbitrary chunks and events are returned as soon as they
+    can be determined:
+
+    - ("delta", key, text): new characters of a top-level string value
+    - ("item", key, index, value): an element of a top-level array closed
+    - ("field", key, value): a top-level value is complete
+
+    Only the outermost object is tracked in detail; nested values are
+    decoded with json.loads once they close.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._string_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+        self._emitted = 0
+        self.done = False
+
+    def feed(self, text: str) -> List[Tuple[Any, ...]]:
+        """Consume more text and return any events it completes."""
+        self._buffer += text
+        events: List[Tuple[Any, ...]] = []
+        buffer = self._buffer
+
+        while self._pos < len(buffer) and not self.done:
+            i = self._pos
+            c = buffer[i]
+            self._pos += 1
+            depth = len(self._stack)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._close_string(i, events)
+                continue
+
+            if c.isspace() or c == ":":
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._mark_value_start(i, depth)
+            elif c in "{[":
+                self._mark_value_start(i, depth)
+                if depth == 1 and c == "[":
+                    self._item_index = 0
+                self._stack.append(c)
+                if len(self._stack) == 1:
+                    self._expect_key = True
+            elif c in "}]":
+                if depth == 1 and self._value_start is not None:
+                    self._emit_field(buffer[self._value_start:i], events)
+                if depth == 2 and self._stack[-1] == "[" and self._item_start is not None:
+                    self._emit_item(buffer[self._item_start:i], events)
+                self._stack.pop()
+                if len(self._stack) == 1 and self._value_start is not None:
+                    self._emit_field(buffer[self._value_start:i + 1], events)
+                elif not self._stack:
+                    self.done = True
+            elif c == ",":
+                if depth == 1:
+                    if self._value_start is not None:
+                        self._emit_field(buffer[self._value_start:i], events)
+                    self._expect_key = True
+                elif depth == 2 and self._stack[-1] == "[" and self._item_start is not None:
+                    self._emit_item(buffer[self._item_start:i], events)
+            else:
+                self._mark_value_start(i, depth)
+
+        if self._in_string and self._is_streaming_value():
+            self._emit_delta(self._buffer[self._string_start + 1:self._pos], events)
+        return events
+
+    def _mark_value_start(self, i: int, depth: int) -> None:
+        if depth == 1 and not self._expect_key and self._value_start is None:
+            self._value_start = i
+        elif depth == 2 and self._stack[-1] == "[" and self._item_start is None:
+            self._item_start = i
+
+    def _is_streaming_value(self) -> bool:
+        return len(self._stack) == 1 and self._value_start is not None and self._value_start == self._string_start
+
+    def _close_string(self, i: int, events: List[Tuple[Any, ...]]) -> None:
+        if len(self._stack) != 1:
+            return
+        if self._expect_key:
+            self._key = json.loads(self._buffer[self._string_start:i + 1])
+            self._expect_key = False
+            self._emitted = 0
+        elif self._is_streaming_value():
+            self._emit_delta(self._buffer[self._string_start + 1:i], events)
+            self._emit_field(self._buffer[self._string_start:i + 1], events)
+
+    def _emit_delta(self, raw: str, events: List[Tuple[Any, ...]]) -> None:
+        # Trimming a partial low surrogate can expose its high surrogate
+        match = _INCOMPLETE_ESCAPE.search(raw)
+        while match:
+            raw = raw[:match.start(1)]
+            match = _INCOMPLETE_ESCAPE.search(raw)
+        decoded = json.loads(f'"{raw}"')
+        if len(decoded) > self._emitted:
+            events.append(("delta", self._key, decoded[self._emitted:]))
+            self._emitted = len(decoded)
+
+    def _emit_item(self, raw: str, events: List[Tuple[Any, ...]]) -> None:
+        events.append(("item", self._key, self._item_index, json.loads(raw)))
+        self._item_index += 1
+        self._item_start = None
+
+    def _emit_field(self, raw: str, events: List[Tuple[Any, ...]]) -> None:
+        events.append(("field", self._key, json.loads(raw)))
+        self._value_start = None
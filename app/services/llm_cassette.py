@@ -0,0 +1,185 @@
+# app/services/llm_cassette.py
+import os
+import json
+import time
+import zlib
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Request fields that change how a reply is delivered but not what it says
+_TRANSPORT_PARAMS = {"stream", "stream_options", "timeout", "extra_headers"}
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recording matches a request."""
+
+
+def cassette_key(params: Dict[str, Any]) -> str:
+    """Stable hash of model, messages and generation parameters."""
+    relevant = {k: v for k, v in params.items() if k not in _TRANSPORT_PARAMS}
+    payload = json.dumps(relevant, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _pack(value: Any) -> bytes:
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> Any:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class LLMCassette:
+    """
+    Record/replay store for upstream chat completions.
+
+    In "record" mode every completion is stored, compressed, in SQLite
+    together with how long it took. In "replay" mode requests are answered
+    from the store without touching the network; a request with no
+    recording raises CassetteMissError. Replay latency is "none", "recorded"
+    (the captured timings, including the spacing of streamed chunks) or a
+    fixed number of milliseconds.
+    """
+
+    def __init__(self, mode: str = "off", path: str = "llm_cassette.db", replay_latency: str = "none"):
+        if mode not in ("off", "record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.mode = mode
+        self.path = path
+        self.replay_latency = replay_latency
+        self._local = threading.local()
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+        if mode != "off":
+            self._connect().executescript("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT NOT NULL,
+                    stream INTEGER NOT NULL,
+                    model TEXT,
+                    request BLOB NOT NULL,
+                    response BLOB NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    recorded_at REAL NOT NULL,
+                    PRIMARY KEY (key, stream)
+                );
+            """)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _store(self, params: Dict[str, Any], stream: bool, response: Any, latency: float) -> None:
+        self._connect().execute(
+            "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                cassette_key(params), int(stream), params.get("model"), _pack(params),
+                _pack(response), latency * 1000, time.time()
+            )
+        )
+        self.recorded += 1
+
+    def _load(self, params: Dict[str, Any], stream: bool) -> Tuple[Any, float]:
+        row = self._connect().execute(
+            "SELECT response, latency_ms FROM completions WHERE key = ? AND stream = ?",
+            (cassette_key(params), int(stream))
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            raise CassetteMissError(
+                f"No recorded completion for this request (model={params.get('model')}, stream={stream})"
+            )
+        self.replayed += 1
+        return _unpack(row[0]), row[1] / 1000
+
+    def _delay(self, recorded: float) -> float:
+        if self.replay_latency == "none":
+            return 0.0
+        if self.replay_latency == "recorded":
+            return recorded
+        return float(self.replay_latency) / 1000
+
+    def record(self, params: Dict[str, Any], response: Any, latency: float) -> None:
+        """Store a non-streaming completion (an OpenAI ChatCompletion)."""
+        self._store(params, False, response.model_dump(mode="json"), latency)
+
+    def record_stream(
+        self,
+        params: Dict[str, Any],
+        fragments: List[Tuple[float, str]],
+        usage: Optional[Any],
+        latency: float
+    ) -> None:
+        """Store a streamed completion as (offset seconds, text) fragments plus usage."""
+        response = {
+            "fragments": fragments,
+            "usage": usage.model_dump(mode="json") if usage is not None else None
+        }
+        self._store(params, True, response, latency)
+
+    async def replay(self, params: Dict[str, Any]) -> Any:
+        """Return the recorded ChatCompletion for params."""
+        from openai.types.chat import ChatCompletion
+
+        response, latency = self._load(params, False)
+        delay = self._delay(latency)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatCompletion.model_validate(response)
+
+    async def replay_stream(self, params: Dict[str, Any]) -> AsyncIterator[Tuple[str, Optional[Any]]]:
+        """
+        Yield the recorded (text, None) fragments, then ("", usage) if usage was recorded.
+
+        With "recorded" latency each fragment arrives at its captured offset;
+        a fixed latency is spent once, before the first fragment.
+        """
+        from openai.types import CompletionUsage
+
+        response, _ = self._load(params, True)
+        if self.replay_latency not in ("none", "recorded"):
+            await asyncio.sleep(self._delay(0.0))
+        start = time.perf_counter()
+        for offset, text in response["fragments"]:
+            if self.replay_latency == "recorded":
+                wait = offset - (time.perf_counter() - start)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            yield text, None
+        if response.get("usage"):
+            yield "", CompletionUsage.model_validate(response["usage"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "misses": self.misses
+        }
+
+
+llm_cassette = LLMCassette(
+    mode=os.getenv("LLM_CASSETTE_MODE", "off").lower(),
+    path=os.getenv("LLM_CASSETTE_PATH", "llm_cassette.db"),
+    replay_latency=os.getenv("LLM_CASSETTE_REPLAY_LATENCY", "none").lower()
+)
@@ -0,0 +1,254 @@
+# app/services/llm_client.py
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Coroutine, Optional, Tuple, TypeVar
+import openai
+from dotenv import load_dotenv
+
+from app.services.client_registry import client_registry
+from app.services.concurrency_limiter import UpstreamOverloadedError, upstream_limiter
+from app.services.deadline import check_deadline
+from app.services.llm_cassette import llm_cassette
+from app.services.metrics import ERRORS, LLM_REQUEST_SECONDS, record_usage
+from app.services.model_router import model_router
+from app.services.provider_pool import Endpoint, EndpointLease, provider_pool
+from app.services.resilience import breaker_guard, call_with_retries, circuit_breakers
+from app.services.tracing import record_span, span
+
+# Load environment variables
+load_dotenv()
+
+T = TypeVar("T")
+
+
+def resolve_api_key(api_key: Optional[str] = None) -> str:
+    """
+    Resolve the OpenAI API key from the request or the environment.
+
+    Args:
+        api_key: OpenAI API key (optional if set in environment)
+
+    Returns:
+        The API key to use for upstream calls
+    """
+    key = api_key or os.getenv("OPENAI_API_KEY")
+    if not key:
+        raise ValueError("OpenAI API key is required")
+    return key
+
+
+def _pooled(base_url: Optional[str]) -> bool:
+    """A stage routed to its own base URL keeps it; otherwise configured pool endpoints are used."""
+    return base_url is None and provider_pool.enabled
+
+
+def _pick_endpoint(api_key: str) -> Tuple[Endpoint, str]:
+    """Least-loaded pool endpoint whose circuit breaker would take a call, with the key to use on it."""
+    endpoint = provider_pool.pick(
+        lambda e: circuit_breakers.get(e.api_key() or api_key, e.base_url).accepting()
+    )
+    return endpoint, endpoint.api_key() or api_key
+
+
+@asynccontextmanager
+async def _pooled_attempt(api_key: str, timeout: float) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Lease a pool endpoint for one unary attempt behind that endpoint's own breaker.
+
+    Picking per attempt, after the limiter slot is held, keeps the in-flight
+    counts honest and lets a retry move to another endpoint. The breaker
+    guard sits inside the lease so the pool sees deadline cut-offs already
+    told apart from upstream timeouts.
+    """
+    endpoint, key = _pick_endpoint(api_key)
+    async with provider_pool.lease(endpoint):
+        with breaker_guard(circuit_breakers.get(key, endpoint.base_url), timeout):
+            yield key, endpoint.base_url
+
+
+async def create_chat_completion(api_key: str, stage: Optional[str] = None, **params: Any) -> Any:
+    """
+    Issue a chat completion request without blocking the event loop.
+
+    Args:
+        api_key: OpenAI API key
+        stage: Pipeline stage making the call, used to look up its model route
+        **params: Keyword arguments forwarded to chat.completions.create
+
+    Returns:
+        The OpenAI chat completion response
+    """
+    params, target = model_router.route(stage, params)
+    api_key = (target.api_key() if target else None) or api_key
+    base_url = target.base_url if target else None
+    model = params.get("model", "")
+    stage_label = stage or ""
+    pooled = _pooled(base_url)
+    start = time.perf_counter()
+
+    async def attempt(timeout: float) -> Any:
+        async with upstream_limiter.slot():
+            if llm_cassette.replaying:
+                return await llm_cassette.replay(params)
+            attempt_start = time.perf_counter()
+            if pooled:
+                async with _pooled_attempt(api_key, timeout) as (key, url):
+                    async with client_registry.lease(key, url) as client:
+                        response = await client.chat.completions.create(timeout=timeout, **params)
+            else:
+                async with client_registry.lease(api_key, base_url) as client:
+                    response = await client.chat.completions.create(timeout=timeout, **params)
+            if llm_cassette.recording:
+                llm_cassette.record(params, response, time.perf_counter() - attempt_start)
+            return response
+
+    try:
+        with span("llm", model=model, stage=stage_label):
+            # Pooled attempts guard each endpoint's breaker themselves
+            breaker_url = None if pooled else client_registry.resolve_base_url(base_url)
+            response = await call_with_retries(api_key, breaker_url, attempt)
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        LLM_REQUEST_SECONDS.observe(elapsed, model=model, stage=stage_label, stream="false", outcome="error")
+        ERRORS.inc(component="llm")
+        model_router.observe(stage, target, elapsed, ok=False)
+        if isinstance(e, openai.RateLimitError):
+            raise _rate_limited(e) from e
+        raise
+    elapsed = time.perf_counter() - start
+    LLM_REQUEST_SECONDS.observe(elapsed, model=model, stage=stage_label, stream="false", outcome="ok")
+    model_router.observe(stage, target, elapsed)
+    record_usage(model, getattr(response, "usage", None))
+    return response
+
+
+async def stream_chat_completion(api_key: str, stage: Optional[str] = None, **params: Any) -> AsyncIterator[str]:
+    """
+    Stream a chat completion, yielding content deltas as they arrive.
+
+    Args:
+        api_key: OpenAI API key
+        stage: Pipeline stage making the call, used to look up its model route
+        **params: Keyword arguments forwarded to chat.completions.create
+
+    Yields:
+        Text fragments of the assistant message
+    """
+    params, target = model_router.route(stage, params)
+    api_key = (target.api_key() if target else None) or api_key
+    base_url = target.base_url if target else None
+    model = params.get("model", "")
+    stage_label = stage or ""
+    # Ask for a final usage chunk so streamed tokens are counted too
+    params.setdefault("stream_options", {"include_usage": True})
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        async for text, usage in _stream_deltas(api_key, base_url, params, start):
+            if text:
+                yield text
+            if usage is not None:
+                record_usage(model, usage)
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        # The consumer stopped reading; not an upstream failure
+        outcome = "cancelled"
+        raise
+    except Exception as e:
+        ERRORS.inc(component="llm")
+        if isinstance(e, openai.RateLimitError):
+            raise _rate_limited(e) from e
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        LLM_REQUEST_SECONDS.observe(elapsed, model=model, stage=stage_label, stream="true", outcome=outcome)
+        if outcome != "cancelled":
+            model_router.observe(stage, target, elapsed, ok=outcome == "ok")
+        record_span("llm-stream", start, model=model, stage=stage_label, outcome=outcome)
+
+
+async def _stream_deltas(
+    api_key: str,
+    base_url: Optional[str],
+    params: dict,
+    start: float
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield (text, usage) pairs from upstream, or from the cassette when replaying."""
+    async with upstream_limiter.slot():
+        if llm_cassette.replaying:
+            async for item in llm_cassette.replay_stream(params):
+                yield item
+            return
+
+        fragments = []
+        usage = None
+        async with _stream_upstream(api_key, base_url) as (key, url, lease), client_registry.lease(key, url) as client:
+            # Only opening the stream is retried; after text has gone out a
+            # retry would repeat it
+            stream = await call_with_retries(
+                key,
+                client_registry.resolve_base_url(url),
+                lambda timeout: client.chat.completions.create(stream=True, timeout=timeout, **params)
+            )
+            async for chunk in stream:
+                if lease is not None:
+                    lease.first_token()
+                # Read timeouts bound each chunk; this bounds the whole stream
+                check_deadline()
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    if llm_cassette.recording:
+                        fragments.append((round(time.perf_counter() - start, 4), text))
+                    yield text, None
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage
+                    yield "", usage
+    # Only complete streams are recorded; an abandoned one never reaches here
+    if llm_cassette.recording:
+        llm_cassette.record_stream(params, fragments, usage, time.perf_counter() - start)
+
+
+@asynccontextmanager
+async def _stream_upstream(
+    api_key: str,
+    base_url: Optional[str]
+) -> AsyncIterator[Tuple[str, Optional[str], Optional[EndpointLease]]]:
+    """
+    Backend for a whole stream, which stays on the endpoint it opened on.
+
+    Pooled streams lease the endpoint for their full length so in-flight
+    counts stay right; their latency is recorded at the first chunk.
+    """
+    if not _pooled(base_url):
+        yield api_key, base_url, None
+        return
+    endpoint, key = _pick_endpoint(api_key)
+    async with provider_pool.lease(endpoint) as lease:
+        yield key, endpoint.base_url, lease
+
+
+def _rate_limited(error: "openai.RateLimitError") -> UpstreamOverloadedError:
+    """Translate an upstream 429 so routes can pass its Retry-After on."""
+    retry_after = error.response.headers.get("retry-after", "") if error.response is not None else ""
+    try:
+        seconds = max(1, int(float(retry_after)))
+    except ValueError:
+        seconds = 1
+    return UpstreamOverloadedError("Upstream rate limit reached, please retry", seconds)
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run an async service coroutine from synchronous code.
+
+    Kept for scripts and callers outside the event loop; routes should
+    await the async service functions directly.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError("Synchronous service called from a running event loop; await the async version instead")
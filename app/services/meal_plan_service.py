@@ -0,0 +1,269 @@
+# app/services/meal_plan_service.py
+import os
+import re
+import asyncio
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Any, Set
+
+from dotenv import load_dotenv
+
+from app.models.meal_models import MealResponse
+from app.models.meal_plan_models import MealPlanDay, MealPlanResponse, PlannedMeal
+from app.services.llm_client import resolve_api_key
+from app.services.meal_service import generate_meal_async
+from app.services.concurrency_limiter import UpstreamOverloadedError
+
+# Load environment variables
+load_dotenv()
+
+# Meal slots generated at once per plan; a week of three meals fits in one wave
+PLAN_CONCURRENCY = int(os.getenv("MEAL_PLAN_CONCURRENCY", "21"))
+
+# Regenerations allowed per slot when it repeats a dish, overuses an ingredient
+# or goes over its calorie cap
+PLAN_MAX_RETRIES = int(os.getenv("MEAL_PLAN_MAX_RETRIES", "2"))
+
+# How many meals in one plan may share the same main ingredient
+PLAN_MAX_INGREDIENT_REPEATS = int(os.getenv("MEAL_PLAN_MAX_INGREDIENT_REPEATS", "3"))
+
+# Rotated across slots so parallel generations start out different
+_STYLE_ROTATION = [
+    "baked or roasted",
+    "quick stovetop",
+    "fresh or no-cook",
+    "simmered",
+    "grilled",
+    "one-pan",
+    "steamed"
+]
+
+# Ingredients too common to count against variety
+_STAPLES = {
+    "salt", "pepper", "black pepper", "water", "oil", "olive oil", "vegetable oil",
+    "garlic", "onion", "butter", "sugar", "flour", "lemon juice", "vinegar",
+    "cooking spray", "salt and pepper", "herbs", "spices"
+}
+
+_QUANTITY = re.compile(
+    r"\d+(?:[./]\d+)?\s*(?:g|kg|ml|oz|lbs?)\b|"
+    r"^[\d\s/.¼-¾⅐-⅞-]+|"
+    r"\b(cups?|tbsp|tablespoons?|tsp|teaspoons?|oz|ounces?|lbs?|pounds?|grams?|g|kg|ml|l|"
+    r"pinch|dash|cloves?|slices?|cans?|pieces?|handful|large|medium|small|whole|of)\b"
+)
+_PREPARATION = re.compile(r"\(.*?\)|,.*$|\b(chopped|diced|minced|sliced|fresh|cooked|grated|to taste|optional)\b")
+
+
+def stream_meal_plan(
+    api_key: Optional[str] = None,
+    days: int = 7,
+    meal_types: Optional[List[str]] = None,
+    include_ingredients: Optional[List[str]] = None,
+    dietary_preferences: Optional[List[str]] = None,
+    allergies: Optional[List[str]] = None,
+    max_calories: Optional[int] = None,
+    calories_by_meal_type: Optional[Dict[str, int]] = None,
+    cuisine_type: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Generate a multi-day meal plan, streaming days as they complete.
+
+    Every slot is generated with generate_meal_async, up to
+    MEAL_PLAN_CONCURRENCY at a time. A finished slot is only accepted if its
+    meal name is new to the plan, none of its main ingredients is already
+    used PLAN_MAX_INGREDIENT_REPEATS times, and it is within the slot's
+    calorie cap; otherwise it is regenerated with the conflicts listed in
+    the prompt.
+
+    Returns an async iterator of events, each a dict with "event" and "data"
+    keys: "meal" as each slot is accepted, "day" once all of a day's slots
+    are in, and finally "done" with the plan validated against
+    MealPlanResponse.
+
+    Args:
+        api_key: OpenAI API key (optional if set in environment)
+        days: Number of days in the plan
+        meal_types: Meals per day (defaults to breakfast, lunch and dinner)
+        include_ingredients: Ingredients to try to use across the plan
+        dietary_preferences: List of dietary preferences
+        allergies: List of allergies to avoid
+        max_calories: Maximum calories per meal slot
+        calories_by_meal_type: Per-meal-type caps overriding max_calories
+        cuisine_type: Preferred cuisine type
+    """
+    # Resolve the key up front so a missing key fails before streaming starts
+    key = resolve_api_key(api_key)
+    planner = _MealPlanner(
+        api_key=key,
+        days=days,
+        meal_types=meal_types or ["breakfast", "lunch", "dinner"],
+        include_ingredients=include_ingredients or [],
+        dietary_preferences=dietary_preferences or [],
+        allergies=allergies or [],
+        max_calories=max_calories,
+        calories_by_meal_type=calories_by_meal_type or {},
+        cuisine_type=cuisine_type
+    )
+    return planner.events()
+
+
+class _MealPlanner:
+    """Per-request state: accepted meal names and ingredient usage across the plan."""
+
+    def __init__(
+        self,
+        api_key: str,
+        days: int,
+        meal_types: List[str],
+        include_ingredients: List[str],
+        dietary_preferences: List[str],
+        allergies: List[str],
+        max_calories: Optional[int],
+        calories_by_meal_type: Dict[str, int],
+        cuisine_type: Optional[str]
+    ):
+        self.api_key = api_key
+        self.days = days
+        self.meal_types = meal_types
+        self.include_ingredients = include_ingredients
+        self.dietary_preferences = dietary_preferences
+        self.allergies = allergies
+        self.max_calories = max_calories
+        self.calories_by_meal_type = calories_by_meal_type
+        self.cuisine_type = cuisine_type
+
+        # Requested ingredients are meant to repeat, so they never count against variety
+        self.exempt = _STAPLES | {_core_ingredient(item) for item in include_ingredients}
+        self.used_names: Set[str] = set()
+        self.ingredient_counts: Counter = Counter()
+        self.warnings: List[str] = []
+        self.semaphore = asyncio.Semaphore(PLAN_CONCURRENCY)
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        slots = [(day, meal_type) for day in range(1, self.days + 1) for meal_type in self.meal_types]
+        tasks = [
+            asyncio.create_task(self._generate_slot(day, meal_type, index))
+            for index, (day, meal_type) in enumerate(slots)
+        ]
+        by_day: Dict[int, Dict[str, PlannedMeal]] = {day: {} for day in range(1, self.days + 1)}
+        failed: Dict[int, int] = {day: 0 for day in range(1, self.days + 1)}
+        finished_days: List[MealPlanDay] = []
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                day, meal_type, planned = await next_done
+                if planned is None:
+                    failed[day] += 1
+                else:
+                    by_day[day][meal_type] = planned
+                    yield {"event": "meal", "data": planned.model_dump()}
+
+                if len(by_day[day]) + failed[day] == len(self.meal_types):
+                    plan_day = MealPlanDay(
+                        day=day,
+                        meals=[by_day[day][m] for m in self.meal_types if m in by_day[day]]
+                    )
+                    finished_days.append(plan_day)
+                    yield {"event": "day", "data": plan_day.model_dump()}
+        finally:
+            # Client went away or a slot raised: stop paying for the rest
+            for task in tasks:
+                task.cancel()
+
+        finished_days.sort(key=lambda plan_day: plan_day.day)
+        plan = MealPlanResponse(days=finished_days, warnings=self.warnings)
+        yield {"event": "done", "data": plan.model_dump()}
+
+    async def _generate_slot(self, day: int, meal_type: str, index: int):
+        calorie_cap = self.calories_by_meal_type.get(meal_type, self.max_calories)
+        style = _STYLE_ROTATION[index % len(_STYLE_ROTATION)]
+        extra = [f"Day {day} of a {self.days}-day plan; prefer a {style} dish"]
+        meal = None
+        problems: List[str] = []
+
+        for attempt in range(1, PLAN_MAX_RETRIES + 2):
+            try:
+                async with self.semaphore:
+                    meal_data = await generate_meal_async(
+                        api_key=self.api_key,
+                        meal_type=meal_type,
+                        include_ingredients=self.include_ingredients,
+                        dietary_preferences=self.dietary_preferences,
+                        allergies=self.allergies,
+                        max_calories=calorie_cap,
+                        cuisine_type=self.cuisine_type,
+                        extra_requirements=extra + self._avoid_requirements()
+                    )
+                meal = MealResponse(**meal_data)
+            except UpstreamOverloadedError:
+                # Retrying into a saturated upstream only adds load
+                raise
+            except Exception as e:
+                problems = [f"generation failed ({str(e)})"]
+                continue
+
+            # Check and claim without awaiting in between, so concurrent slots
+            # cannot both take the same name
+            problems = self._conflicts(meal, calorie_cap)
+            if not problems:
+                self._claim(meal)
+                return day, meal_type, PlannedMeal(day=day, meal_type=meal_type, meal=meal, attempts=attempt)
+
+        if meal is None:
+            self.warnings.append(f"Day {day} {meal_type}: {'; '.join(problems)}")
+            return day, meal_type, None
+
+        # Out of retries: keep the last meal rather than leaving a gap
+        self._claim(meal)
+        self.warnings.append(f"Day {day} {meal_type}: {'; '.join(problems)}")
+        return day, meal_type, PlannedMeal(
+            day=day, meal_type=meal_type, meal=meal, attempts=PLAN_MAX_RETRIES + 1
+        )
+
+    def _avoid_requirements(self) -> List[str]:
+        """Prompt lines listing what the rest of the plan has already used."""
+        requirements = []
+        if self.used_names:
+            requirements.append(f"Do NOT repeat these dishes already in the plan: {', '.join(sorted(self.used_names))}")
+        overused = self._overused_ingredients()
+        if overused:
+            requirements.append(f"Do NOT use these ingredients, the plan already has enough of them: {', '.join(overused)}")
+        return requirements
+
+    def _overused_ingredients(self) -> List[str]:
+        return sorted(
+            ingredient for ingredient, count in self.ingredient_counts.items()
+            if count >= PLAN_MAX_INGREDIENT_REPEATS
+        )
+
+    def _conflicts(self, meal: MealResponse, calorie_cap: Optional[int]) -> List[str]:
+        problems = []
+        if _normalize_name(meal.meal_name) in self.used_names:
+            problems.append(f"repeated dish '{meal.meal_name}'")
+
+        overused = set(self._overused_ingredients())
+        repeated = sorted(overused & self._main_ingredients(meal))
+        if repeated:
+            problems.append(f"overused ingredients {', '.join(repeated)}")
+
+        if calorie_cap and meal.estimated_calories and meal.estimated_calories > calorie_cap:
+            problems.append(f"{meal.estimated_calories} calories is over the {calorie_cap} limit")
+        return problems
+
+    def _claim(self, meal: MealResponse) -> None:
+        self.used_names.add(_normalize_name(meal.meal_name))
+        self.ingredient_counts.update(self._main_ingredients(meal))
+
+    def _main_ingredients(self, meal: MealResponse) -> Set[str]:
+        cores = {_core_ingredient(item) for item in meal.ingredients}
+        return {core for core in cores if core and core not in self.exempt}
+
+
+def _normalize_name(name: str) -> str:
+    return re.sub(r"[^a-z0-9 ]", "", name.lower()).strip()
+
+
+def _core_ingredient(text: str) -> str:
+    """Reduce '2 cups chopped broccoli, steamed' to 'broccoli'."""
+    core = _PREPARATION.sub(" ", text.lower())
+    core = _QUANTITY.sub(" ", core)
+    return " ".join(core.split())
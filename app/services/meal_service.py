@@ -1,13 +1,30 @@
 # app/services/meal_service.py
-import os
 import json
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
+from typing import AsyncIterator, Dict, List, Optional, Any
+from pydantic import ValidationError
 from dotenv import load_dotenv
 
+from app.models.meal_models import MealResponse
+from app.services.json_stream import IncrementalJSONParser
+from app.services.llm_client import create_chat_completion, resolve_api_key, run_sync, stream_chat_completion
+from app.services.metrics import metrics
+from app.services.reasoning_services import generate_meal_reasoning_async
+from app.services.response_cache import make_cache_key, normalize_list, normalize_text
+from app.services.single_flight import single_flight
+from app.services.tracing import traced
+from app.services.concurrency_limiter import UpstreamOverloadedError
+
 # Load environment variables
 load_dotenv()
 
+REASONING_FALLBACKS = metrics.counter(
+    "dietdraft_meal_reasoning_fallbacks_total",
+    "Combined meal generations whose reasoning was missing and was requested separately, by outcome.",
+    ["outcome"]
+)
+
+_REASONING_FIELDS = ("key_ingredient_choices", "nutritional_benefits", "dietary_alignment")
+
 def generate_meal(
     api_key: Optional[str] = None,
     meal_type: Optional[str] = None,
@@ -15,7 +32,35 @@ def generate_meal(
     dietary_preferences: Optional[List[str]] = None,
     allergies: Optional[List[str]] = None,
     max_calories: Optional[int] = None,
-    cuisine_type: Optional[str] = None
+    cuisine_type: Optional[str] = None,
+    include_reasoning: bool = False
+) -> Dict[str, Any]:
+    """
+    Synchronous wrapper around generate_meal_async for non-async callers.
+    """
+    return run_sync(generate_meal_async(
+        api_key=api_key,
+        meal_type=meal_type,
+        include_ingredients=include_ingredients,
+        dietary_preferences=dietary_preferences,
+        allergies=allergies,
+        max_calories=max_calories,
+        cuisine_type=cuisine_type,
+        include_reasoning=include_reasoning
+    ))
+
+
+@traced("generate_meal")
+async def generate_meal_async(
+    api_key: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    include_ingredients: Optional[List[str]] = None,
+    dietary_preferences: Optional[List[str]] = None,
+    allergies: Optional[List[str]] = None,
+    max_calories: Optional[int] = None,
+    cuisine_type: Optional[str] = None,
+    extra_requirements: Optional[List[str]] = None,
+    include_reasoning: bool = False
 ) -> Dict[str, Any]:
     """
     Generate a meal with dietary preferences and restrictions.
@@ -28,33 +73,176 @@ def generate_meal(
         allergies: List of allergies to avoid
         max_calories: Maximum calories per serving
         cuisine_type: Preferred cuisine type
+        extra_requirements: Additional requirement lines for the prompt (e.g. dishes to avoid)
+        include_reasoning: Also write the nutritional reasoning in the same completion,
+            saving the separate meal reasoning call
         
     Returns:
-        Dict with meal name, ingredients, instructions, and dietary info
+        Dict with meal name, ingredients, instructions, and dietary info, plus
+        "reasoning" highlights when include_reasoning is set. If the combined
+        answer leaves the reasoning out, it is requested separately; should
+        that fail too, the meal is still returned with "reasoning" set to
+        None and the failure in "reasoning_error".
     """
     # Get API key
-    key = api_key or os.getenv("OPENAI_API_KEY")
-    if not key:
-        raise ValueError("OpenAI API key is required")
+    key = resolve_api_key(api_key)
     
-    # Initialize OpenAI client
+    request_params = _build_meal_request(
+        meal_type, include_ingredients, dietary_preferences, allergies, max_calories, cuisine_type,
+        extra_requirements, include_reasoning
+    )
+
+    # Identical requests already in flight share one upstream call
+    flight_key = make_cache_key(
+        "generate_meal",
+        meal_type=normalize_text(meal_type),
+        include_ingredients=normalize_list(include_ingredients),
+        dietary_preferences=normalize_list(dietary_preferences),
+        allergies=normalize_list(allergies),
+        max_calories=max_calories,
+        cuisine_type=normalize_text(cuisine_type),
+        extra_requirements=[normalize_text(r) for r in extra_requirements or []],
+        include_reasoning=include_reasoning
+    )
+
     try:
-        client = OpenAI(api_key=key)
-    except TypeError as e:
-        if "proxies" in str(e):
-            # Render sometimes passes proxy settings that OpenAI client doesn't accept
-            # Initialize without any environment-based proxy settings
-            import openai
-            openai.api_key = key
-            client = openai.OpenAI()
-        else:
-            raise e
+        meal = await single_flight.do(
+            "generate_meal",
+            (key, flight_key),
+            lambda: _request_meal(key, request_params, include_reasoning)
+        )
+        
+    except UpstreamOverloadedError:
+        raise
+    except json.JSONDecodeError as e:
+        raise Exception(f"Failed to parse AI response as JSON: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Failed to generate meal: {str(e)}")
+
+    if include_reasoning and meal["reasoning"] is None:
+        # Blank highlights would look like a real answer; ask for them on their own
+        try:
+            reasoning = await generate_meal_reasoning_async(
+                api_key=key,
+                meal_name=meal["meal_name"],
+                ingredients=meal["ingredients"],
+                instructions=meal["instructions"],
+                dietary_preferences=dietary_preferences
+            )
+        except Exception as e:
+            # The meal itself is fine; only the highlights are unavailable
+            REASONING_FALLBACKS.inc(outcome="error")
+            return dict(meal, reasoning=None, reasoning_error=f"Failed to generate meal reasoning: {str(e)}")
+        REASONING_FALLBACKS.inc(outcome="ok")
+        meal = dict(meal, reasoning=reasoning["reasoning"])
+    return meal
+
+
+async def _request_meal(key: str, request_params: Dict[str, Any], include_reasoning: bool = False) -> Dict[str, Any]:
+    """One completion for one meal, with its reasoning when asked for."""
+    response = await create_chat_completion(key, stage="meal", **request_params)
+
+    # Parse JSON response
+    content = response.choices[0].message.content
+    meal_data = json.loads(content)
+    
+    # Validate required fields and provide defaults
+    return _normalize_meal(meal_data, include_reasoning)
+
+
+def stream_generate_meal(
+    api_key: Optional[str] = None,
+    meal_type: Optional[str] = None,
+    include_ingredients: Optional[List[str]] = None,
+    dietary_preferences: Optional[List[str]] = None,
+    allergies: Optional[List[str]] = None,
+    max_calories: Optional[int] = None,
+    cuisine_type: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of generate_meal_async.
+    
+    Returns an async iterator of events, each a dict with "event" and "data"
+    keys: "meal_name" once the name is complete, "ingredient" as each
+    ingredient closes, "instructions" with each new fragment of the
+    instructions text, and finally "done" with the full meal validated
+    against MealResponse.
     
+    Args:
+        Same as generate_meal_async
+    """
+    # Resolve the key up front so a missing key fails before streaming starts
+    key = resolve_api_key(api_key)
+    request_params = _build_meal_request(
+        meal_type, include_ingredients, dietary_preferences, allergies, max_calories, cuisine_type
+    )
+    return _stream_meal_events(key, request_params)
+
+
+async def _stream_meal_events(key: str, request_params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    parser = IncrementalJSONParser()
+    meal_data: Dict[str, Any] = {}
+
+    try:
+        async for fragment in stream_chat_completion(key, stage="meal", **request_params):
+            for event in parser.feed(fragment):
+                kind, field = event[0], event[1]
+                if kind == "field":
+                    meal_data[field] = event[2]
+                    if field == "meal_name":
+                        yield {"event": "meal_name", "data": {"meal_name": event[2]}}
+                elif kind == "item" and field == "ingredients":
+                    yield {"event": "ingredient", "data": {"index": event[2], "ingredient": event[3]}}
+                elif kind == "delta" and field == "instructions":
+                    yield {"event": "instructions", "data": {"delta": event[2]}}
+    except UpstreamOverloadedError:
+        raise
+    except json.JSONDecodeError as e:
+        raise Exception(f"Failed to parse AI response as JSON: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Failed to generate meal: {str(e)}")
+
+    if not parser.done:
+        raise Exception("Failed to parse AI response as JSON: incomplete object")
+
+    try:
+        meal = MealResponse(**_normalize_meal(meal_data))
+    except ValidationError as e:
+        raise Exception(f"Generated meal failed validation: {str(e)}")
+
+    yield {"event": "done", "data": meal.model_dump()}
+
+
+def _build_meal_request(
+    meal_type: Optional[str],
+    include_ingredients: Optional[List[str]],
+    dietary_preferences: Optional[List[str]],
+    allergies: Optional[List[str]],
+    max_calories: Optional[int],
+    cuisine_type: Optional[str],
+    extra_requirements: Optional[List[str]] = None,
+    include_reasoning: bool = False
+) -> Dict[str, Any]:
+    """Build the chat completion parameters for a meal recipe, optionally with its reasoning."""
     # Build dietary requirements text
     dietary_text = _build_dietary_requirements_text(
-        meal_type, include_ingredients, dietary_preferences, allergies, max_calories, cuisine_type
+        meal_type, include_ingredients, dietary_preferences, allergies, max_calories, cuisine_type,
+        extra_requirements
     )
     
+    # The reasoning rides along in the same object instead of a second call
+    # that would re-send the ingredient list
+    reasoning_format = ""
+    reasoning_text = ""
+    if include_reasoning:
+        reasoning_format = """,
+        "reasoning": {
+            "key_ingredient_choices": "Brief explanation of why key ingredients were selected and their nutritional significance",
+            "nutritional_benefits": "Key nutritional benefits of this meal, including macronutrient balance",
+            "dietary_alignment": "How this meal aligns with the specified dietary preferences"
+        }"""
+        reasoning_text = "    Keep each reasoning field to 1-2 concise, evidence-based sentences.\n"
+
     # Create JSON-structured prompt
     prompt = f"""
     Generate a meal recipe with the following requirements:
@@ -67,44 +255,49 @@ def generate_meal(
         "ingredients": ["ingredient 1 with quantity", "ingredient 2 with quantity"],
         "instructions": "Step-by-step cooking instructions in paragraph form",
         "estimated_calories": 400,
-        "dietary_info": "Brief explanation of how this meal meets the dietary requirements"
+        "dietary_info": "Brief explanation of how this meal meets the dietary requirements"{reasoning_format}
     }}
-
+{reasoning_text}
     Make sure the JSON is valid and follows this structure exactly.
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a nutritionist and chef who creates meals for specific dietary needs. Always respond with valid JSON only."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=700,
-            response_format={"type": "json_object"}
-        )
+    return {
+        "model": "gpt-3.5-turbo",
+        "messages": [
+            {
+                "role": "system",
+                "content": "You are a nutritionist and chef who creates meals for specific dietary needs. Always respond with valid JSON only."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        "temperature": 0.7,
+        "max_tokens": 1000 if include_reasoning else 700,
+        "response_format": {"type": "json_object"}
+    }
 
-        # Parse JSON response
-        content = response.choices[0].message.content
-        meal_data = json.loads(content)
-        
-        # Validate required fields and provide defaults
-        return {
-            "meal_name": meal_data.get("meal_name", "Untitled Meal"),
-            "ingredients": meal_data.get("ingredients", []),
-            "instructions": meal_data.get("instructions", "No instructions provided."),
-            "estimated_calories": meal_data.get("estimated_calories"),
-            "dietary_info": meal_data.get("dietary_info")
-        }
-        
-    except json.JSONDecodeError as e:
-        raise Exception(f"Failed to parse AI response as JSON: {str(e)}")
-    except Exception as e:
-        raise Exception(f"Failed to generate meal: {str(e)}")
+
+def _normalize_meal(meal_data: Dict[str, Any], include_reasoning: bool = False) -> Dict[str, Any]:
+    """
+    Fill defaults for any fields missing from the model output.
+
+    Reasoning is all or nothing: it is None unless every highlight is a
+    non-empty string, so callers can tell a missing answer from a real one.
+    """
+    meal = {
+        "meal_name": meal_data.get("meal_name", "Untitled Meal"),
+        "ingredients": meal_data.get("ingredients", []),
+        "instructions": meal_data.get("instructions", "No instructions provided."),
+        "estimated_calories": meal_data.get("estimated_calories"),
+        "dietary_info": meal_data.get("dietary_info")
+    }
+    if include_reasoning:
+        reasoning_data = meal_data.get("reasoning")
+        complete = isinstance(reasoning_data, dict) and all(
+            isinstance(reasoning_data.get(field), str) and reasoning_data[field].strip()
+            for field in _REASONING_FIELDS
+        )
+        meal["reasoning"] = {field: reasoning_data[field] for field in _REASONING_FIELDS} if complete else None
+    return meal
 
 
 def _build_dietary_requirements_text(
@@ -113,7 +306,8 @@ def _build_dietary_requirements_text(
     dietary_preferences: Optional[List[str]],
     allergies: Optional[List[str]],
     max_calories: Optional[int],
-    cuisine_type: Optional[str]
+    cuisine_type: Optional[str],
+    extra_requirements: Optional[List[str]] = None
 ) -> str:
     """Build the dietary requirements section of the prompt."""
     requirements = []
@@ -139,6 +333,9 @@ def _build_dietary_requirements_text(
     if cuisine_type:
         requirements.append(f"Cuisine style: {cuisine_type}")
     
+    if extra_requirements:
+        requirements.extend(extra_requirements)
+    
     if not requirements:
         return "No specific dietary restrictions."
     
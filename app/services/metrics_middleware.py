@@ -0,0 +1,56 @@
+# app/services/metrics_middleware.py
+import time
+from typing import Any, Dict
+
+from app.services.metrics import ERRORS, HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route.
+
+    Timing stops at the last body chunk, so streaming endpoints report their
+    full duration rather than time to headers. Routes are labelled by their
+    path template; unmatched paths share one label to keep cardinality low.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self._route_paths: Dict[Any, str] = {}
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = self._route_label(scope)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, method=scope["method"], route=route, status=str(status)
+            )
+            if status >= 500:
+                ERRORS.inc(component=f"http:{route}")
+
+    def _route_label(self, scope: Dict[str, Any]) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            path = self._route_paths[endpoint] = path or "unmatched"
+        return path
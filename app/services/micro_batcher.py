@@ -0,0 +1,120 @@
+# app/services/micro_batcher.py
+import time
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+
+from app.services.deadline import DeadlineExceededError, remaining
+
+
+class _PendingBatch:
+    """Items collected for one group while its window is open."""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.opened_at = time.monotonic()
+        self.timer = None
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent calls into batches handed to one handler call.
+
+    The first item for a group opens a window of window_ms; the batch is
+    flushed when the window closes or max_items have arrived, whichever is
+    first, so no caller waits more than window_ms before its batch is sent.
+    The handler receives the group and the list of items and must return a
+    list of the same length whose entries are results or Exception
+    instances; each caller gets its own entry.
+
+    The handler runs in a fresh context rather than the context of whichever
+    caller opened the window, so no caller's deadline or priority applies to
+    the whole batch; each caller stops waiting when its own deadline runs out.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+        window_ms: float = 20.0,
+        max_items: int = 16
+    ):
+        self.handler = handler
+        self.window = window_ms / 1000.0
+        self.max_items = max_items
+        self._pending: Dict[Tuple[Hashable, asyncio.AbstractEventLoop], _PendingBatch] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.total_wait = 0.0
+
+    async def submit(self, group: Hashable, item: Any) -> Any:
+        """Queue one item and wait for its share of the batch result."""
+        loop = asyncio.get_running_loop()
+        slot = (group, loop)
+        batch = self._pending.get(slot)
+        if batch is None:
+            batch = _PendingBatch()
+            batch.timer = loop.call_later(self.window, self._flush, slot)
+            self._pending[slot] = batch
+
+        future = loop.create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_items:
+            self._flush(slot)
+
+        try:
+            return await asyncio.wait_for(future, remaining())
+        except asyncio.TimeoutError:
+            if not future.cancelled():
+                raise
+            # wait_for cancelled the future, so the batch result is dropped for this caller
+            raise DeadlineExceededError("Request deadline exceeded") from None
+
+    def _flush(self, slot: Tuple[Hashable, asyncio.AbstractEventLoop]) -> None:
+        batch = self._pending.pop(slot, None)
+        if batch is None:
+            return
+        batch.timer.cancel()
+
+        self.batches += 1
+        self.items += len(batch.items)
+        self.largest_batch = max(self.largest_batch, len(batch.items))
+        self.total_wait += time.monotonic() - batch.opened_at
+
+        task = slot[1].create_task(self._run(slot[0], batch), context=contextvars.Context())
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, group: Hashable, batch: _PendingBatch) -> None:
+        try:
+            results = await self.handler(group, batch.items)
+        except Exception as e:
+            results = [e] * len(batch.items)
+        except BaseException:
+            # Cancelled (e.g. at shutdown); callers must not wait forever
+            for future in batch.futures:
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch was cancelled before it completed"))
+            raise
+
+        for future, result in zip(batch.futures, results):
+            # Callers that were cancelled no longer want their result
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch counts and sizes since startup."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "largest_batch": self.largest_batch,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "mean_window_wait_ms": round(self.total_wait / self.batches * 1000, 2) if self.batches else 0.0
+        }
@@ -0,0 +1,171 @@
+# app/services/model_router.py
+import os
+import json
+import random
+from typing import Any, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Pipeline stages that call the LLM; "*" in the table applies to any stage without its own entry
+STAGES = (
+    "intent",
+    "coach",
+    "summary",
+    "meal",
+    "reasoning",
+    "substitution",
+    "substitution_batch",
+    "voice",
+)
+
+_ROUTE_FIELDS = {"model", "max_tokens", "temperature", "base_url", "api_key_env", "candidates"}
+_TARGET_FIELDS = {"model", "base_url", "api_key_env"}
+
+
+class RouteTarget:
+    """One backend a stage can be sent to: a model, optionally on another base URL and key."""
+
+    __slots__ = ("model", "base_url", "api_key_env")
+
+    def __init__(self, model: Optional[str] = None, base_url: Optional[str] = None, api_key_env: Optional[str] = None):
+        self.model = model
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+
+    @property
+    def label(self) -> str:
+        return f"{self.base_url or 'default'}|{self.model or 'default'}"
+
+    def api_key(self) -> Optional[str]:
+        """Key for this backend when it needs its own, read from the named variable."""
+        return os.getenv(self.api_key_env) if self.api_key_env else None
+
+
+class StageRoute:
+    """Routing entry for one stage: generation overrides and the candidate backends."""
+
+    def __init__(
+        self,
+        targets: List[RouteTarget],
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None
+    ):
+        self.targets = targets
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+
+
+def parse_routes(config: Dict[str, Any]) -> Dict[str, StageRoute]:
+    """
+    Build the routing table from its JSON form.
+
+    Each stage maps to an object with any of model, max_tokens, temperature,
+    base_url and api_key_env, or with a "candidates" list of
+    {model, base_url, api_key_env} objects to choose between by latency.
+    Values not given keep the calling service's own defaults.
+    """
+    routes = {}
+    for stage, entry in config.items():
+        if stage != "*" and stage not in STAGES:
+            raise ValueError(f"Unknown model routing stage '{stage}'; expected one of {', '.join(STAGES)}")
+        unknown = set(entry) - _ROUTE_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown fields for stage '{stage}': {', '.join(sorted(unknown))}")
+        candidates = entry.get("candidates") or [{k: entry[k] for k in _TARGET_FIELDS if k in entry}]
+        targets = []
+        for candidate in candidates:
+            unknown = set(candidate) - _TARGET_FIELDS
+            if unknown:
+                raise ValueError(f"Unknown candidate fields for stage '{stage}': {', '.join(sorted(unknown))}")
+            targets.append(RouteTarget(**candidate))
+        routes[stage] = StageRoute(targets, entry.get("max_tokens"), entry.get("temperature"))
+    return routes
+
+
+class ModelRouter:
+    """
+    Picks the model, generation limits and backend for each pipeline stage.
+
+    With several candidates a stage goes to the one with the lowest moving
+    average latency for that stage. Candidates without observations are
+    tried first, and a small share of calls explores the others so their
+    averages stay current. Failed calls count as slow.
+    """
+
+    def __init__(self, routes: Dict[str, StageRoute], alpha: float = 0.2, explore_rate: float = 0.05):
+        self.routes = routes
+        self.alpha = alpha
+        self.explore_rate = explore_rate
+        self._latency: Dict[Tuple[str, str], float] = {}
+
+    def route(self, stage: Optional[str], params: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[RouteTarget]]:
+        """
+        Apply the stage's routing entry to a chat completion request.
+
+        Args:
+            stage: Pipeline stage making the call, or None for unrouted calls
+            params: chat.completions.create keyword arguments with the service defaults
+
+        Returns:
+            The adjusted parameters and the chosen target (None when the table has no entry)
+        """
+        entry = self.routes.get(stage) if stage else None
+        if entry is None:
+            entry = self.routes.get("*")
+        if entry is None:
+            return params, None
+
+        params = dict(params)
+        if entry.max_tokens is not None:
+            params["max_tokens"] = entry.max_tokens
+        if entry.temperature is not None:
+            params["temperature"] = entry.temperature
+        target = self._pick(stage or "*", entry.targets)
+        if target.model:
+            params["model"] = target.model
+        return params, target
+
+    def _pick(self, stage: str, targets: List[RouteTarget]) -> RouteTarget:
+        if len(targets) == 1:
+            return targets[0]
+        unobserved = [t for t in targets if (stage, t.label) not in self._latency]
+        if unobserved:
+            return unobserved[0]
+        if random.random() < self.explore_rate:
+            return random.choice(targets)
+        return min(targets, key=lambda t: self._latency[(stage, t.label)])
+
+    def observe(self, stage: Optional[str], target: Optional[RouteTarget], latency: float, ok: bool = True) -> None:
+        """Fold one call's latency into the stage's moving average for its target."""
+        if target is None:
+            return
+        key = (stage or "*", target.label)
+        previous = self._latency.get(key)
+        if not ok:
+            # A failure should push traffic away, not look like a fast answer
+            latency = max(latency, 2 * previous) if previous else max(latency, 1.0)
+        self._latency[key] = latency if previous is None else previous + self.alpha * (latency - previous)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"stage": stage, "target": label, "latency_ewma": latency}
+            for (stage, label), latency in sorted(self._latency.items())
+        ]
+
+
+def _load_routes() -> Dict[str, StageRoute]:
+    path = os.getenv("MODEL_ROUTES_FILE")
+    if path:
+        with open(path) as f:
+            return parse_routes(json.load(f))
+    raw = os.getenv("MODEL_ROUTES")
+    return parse_routes(json.loads(raw)) if raw else {}
+
+
+model_router = ModelRouter(
+    _load_routes(),
+    alpha=float(os.getenv("MODEL_ROUTE_LATENCY_ALPHA", "0.2")),
+    explore_rate=float(os.getenv("MODEL_ROUTE_EXPLORE_RATE", "0.05"))
+)
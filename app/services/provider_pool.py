@@ -0,0 +1,231 @@
+# app/services/provider_pool.py
+import os
+import json
+import time
+import random
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+from app.services.deadline import DeadlineExceededError
+from app.services.metrics import metrics
+from app.services.resilience import CircuitOpenError, counts_against_breaker
+
+# Load environment variables
+load_dotenv()
+
+ENDPOINT_REQUESTS = metrics.counter(
+    "dietdraft_endpoint_requests_total",
+    "Upstream attempts per pool endpoint and outcome.",
+    ["endpoint", "outcome"]
+)
+ENDPOINT_SECONDS = metrics.histogram(
+    "dietdraft_endpoint_request_duration_seconds",
+    "Upstream attempt latency per pool endpoint.",
+    ["endpoint"]
+)
+ENDPOINT_EJECTIONS = metrics.counter(
+    "dietdraft_endpoint_ejections_total",
+    "Times a pool endpoint was taken out of rotation, by reason.",
+    ["endpoint", "reason"]
+)
+
+
+class Endpoint:
+    """One OpenAI-compatible backend in the pool and its passive health state."""
+
+    def __init__(self, name: str, base_url: str, api_key_env: Optional[str] = None):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key_env = api_key_env
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def api_key(self) -> Optional[str]:
+        """Key for this backend when it needs its own, read from the named variable."""
+        return os.getenv(self.api_key_env) if self.api_key_env else None
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+
+class EndpointLease:
+    """One attempt on an endpoint; streams mark their first token so latency means time to first token."""
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        self.start = time.perf_counter()
+        self.latency: Optional[float] = None
+
+    def first_token(self) -> None:
+        if self.latency is None:
+            self.latency = time.perf_counter() - self.start
+
+    def elapsed(self) -> float:
+        return self.latency if self.latency is not None else time.perf_counter() - self.start
+
+
+class ProviderPool:
+    """
+    Spreads upstream calls over several OpenAI-compatible endpoints.
+
+    Each call goes to the available endpoint with the fewest requests in
+    flight, ties broken by lower moving-average latency. Health is tracked
+    passively from real traffic: `failure_threshold` upstream failures in a
+    row, or a moving average more than `slow_factor` times the fastest
+    other endpoint's (and above `slow_min_seconds`), takes an endpoint out
+    of rotation for `eject_seconds`. The last available endpoint is never
+    ejected, and if all are out the one due back soonest is used.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        failure_threshold: int = 3,
+        eject_seconds: float = 30.0,
+        slow_factor: float = 3.0,
+        slow_min_seconds: float = 1.0,
+        min_samples: int = 5,
+        alpha: float = 0.2
+    ):
+        self.endpoints = endpoints
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.slow_factor = slow_factor
+        self.slow_min_seconds = slow_min_seconds
+        self.min_samples = min_samples
+        self.alpha = alpha
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    def pick(self, usable: Optional[Callable[[Endpoint], bool]] = None) -> Endpoint:
+        """
+        Choose the endpoint for the next attempt.
+
+        Args:
+            usable: Optional extra filter, e.g. skipping endpoints whose circuit breaker is open
+        """
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.available(now) and (usable is None or usable(e))]
+        if not available:
+            return min(self.endpoints, key=lambda e: e.ejected_until)
+        return min(
+            available,
+            key=lambda e: (e.in_flight, e.latency if e.latency is not None else 0.0, random.random())
+        )
+
+    @asynccontextmanager
+    async def lease(self, endpoint: Endpoint) -> AsyncIterator[EndpointLease]:
+        """
+        Count one attempt against the endpoint and record how it went.
+
+        A unary call's latency is its full duration; a stream held for its
+        whole length should call first_token() so slow readers or long
+        answers are not mistaken for a slow endpoint. Attempts cut short by
+        our own deadline, or refused by the endpoint's circuit breaker before
+        being sent, say nothing about the endpoint and are not recorded.
+        """
+        endpoint.in_flight += 1
+        lease = EndpointLease(endpoint)
+        try:
+            yield lease
+        except (DeadlineExceededError, CircuitOpenError):
+            if lease.latency is not None:
+                self._record(endpoint, lease.latency, failed=False)
+            raise
+        except Exception as e:
+            self._record(endpoint, lease.elapsed(), failed=counts_against_breaker(e))
+            raise
+        else:
+            self._record(endpoint, lease.elapsed(), failed=False)
+        finally:
+            endpoint.in_flight -= 1
+
+    def _record(self, endpoint: Endpoint, elapsed: float, failed: bool) -> None:
+        ENDPOINT_REQUESTS.inc(endpoint=endpoint.name, outcome="error" if failed else "ok")
+        ENDPOINT_SECONDS.observe(elapsed, endpoint=endpoint.name)
+        if failed:
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.failure_threshold:
+                self._eject(endpoint, "errors")
+            return
+
+        endpoint.consecutive_failures = 0
+        endpoint.samples += 1
+        if endpoint.latency is None:
+            endpoint.latency = elapsed
+        else:
+            endpoint.latency += self.alpha * (elapsed - endpoint.latency)
+        if self._is_slow(endpoint):
+            self._eject(endpoint, "slow")
+
+    def _is_slow(self, endpoint: Endpoint) -> bool:
+        if endpoint.samples < self.min_samples or endpoint.latency < self.slow_min_seconds:
+            return False
+        now = time.monotonic()
+        others = [
+            e.latency for e in self.endpoints
+            if e is not endpoint and e.available(now) and e.latency is not None and e.samples >= self.min_samples
+        ]
+        return bool(others) and endpoint.latency > self.slow_factor * min(others)
+
+    def _eject(self, endpoint: Endpoint, reason: str) -> None:
+        now = time.monotonic()
+        if not any(e.available(now) for e in self.endpoints if e is not endpoint):
+            return
+        endpoint.ejected_until = now + self.eject_seconds
+        endpoint.ejections += 1
+        # Start over when it comes back so old numbers cannot re-eject it
+        endpoint.latency = None
+        endpoint.samples = 0
+        endpoint.consecutive_failures = 0
+        ENDPOINT_EJECTIONS.inc(endpoint=endpoint.name, reason=reason)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "endpoint": e.name,
+                "base_url": e.base_url,
+                "in_flight": e.in_flight,
+                "latency_ewma": e.latency,
+                "available": e.available(now),
+                "ejections": e.ejections
+            }
+            for e in self.endpoints
+        ]
+
+
+def parse_endpoints(raw: str) -> List[Endpoint]:
+    """
+    Read the endpoint list: a JSON array of {name, base_url, api_key_env}
+    objects, or a comma-separated list of base URLs.
+    """
+    raw = raw.strip()
+    if not raw:
+        return []
+    if raw.startswith("["):
+        entries = json.loads(raw)
+    else:
+        entries = [{"base_url": url.strip()} for url in raw.split(",") if url.strip()]
+    endpoints = []
+    for entry in entries:
+        name = entry.get("name") or urlparse(entry["base_url"]).netloc or entry["base_url"]
+        endpoints.append(Endpoint(name, entry["base_url"], entry.get("api_key_env")))
+    return endpoints
+
+
+provider_pool = ProviderPool(
+    parse_endpoints(os.getenv("LLM_ENDPOINTS", "")),
+    failure_threshold=int(os.getenv("LLM_ENDPOINT_FAILURE_THRESHOLD", "3")),
+    eject_seconds=float(os.getenv("LLM_ENDPOINT_EJECT_SECONDS", "30")),
+    slow_factor=float(os.getenv("LLM_ENDPOINT_SLOW_FACTOR", "3")),
+    slow_min_seconds=float(os.getenv("LLM_ENDPOINT_SLOW_MIN_SECONDS", "1"))
+)
@@ -1,10 +1,14 @@
 # app/services/reasoning_service.py
-import os
 import json
 from typing import Dict, List, Optional, Any
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from app.services.llm_client import create_chat_completion, resolve_api_key, run_sync
+from app.services.response_cache import make_cache_key, normalize_list, normalize_text, response_cache
+from app.services.single_flight import single_flight
+from app.services.tracing import traced
+from app.services.concurrency_limiter import UpstreamOverloadedError
+
 # Load environment variables
 load_dotenv()
 
@@ -14,6 +18,26 @@ def generate_meal_reasoning(
     ingredients: List[str] = [],
     instructions: Optional[str] = None,
     dietary_preferences: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Synchronous wrapper around generate_meal_reasoning_async for non-async callers.
+    """
+    return run_sync(generate_meal_reasoning_async(
+        api_key=api_key,
+        meal_name=meal_name,
+        ingredients=ingredients,
+        instructions=instructions,
+        dietary_preferences=dietary_preferences
+    ))
+
+
+@traced("meal_reasoning")
+async def generate_meal_reasoning_async(
+    api_key: Optional[str] = None,
+    meal_name: str = "",
+    ingredients: List[str] = [],
+    instructions: Optional[str] = None,
+    dietary_preferences: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Generate minimalistic reasoning about a meal.
@@ -29,22 +53,19 @@ def generate_meal_reasoning(
         Dict with meal name and reasoning highlights
     """
     # Get API key
-    key = api_key or os.getenv("OPENAI_API_KEY")
-    if not key:
-        raise ValueError("OpenAI API key is required")
+    key = resolve_api_key(api_key)
     
-    # Initialize OpenAI client
-    try:
-        client = OpenAI(api_key=key)
-    except TypeError as e:
-        if "proxies" in str(e):
-            # Render sometimes passes proxy settings that OpenAI client doesn't accept
-            # Initialize without any environment-based proxy settings
-            import openai
-            openai.api_key = key
-            client = openai.OpenAI()
-        else:
-            raise e
+    # Serve identical meals from the response cache
+    cache_key = make_cache_key(
+        "meal_reasoning",
+        meal_name=normalize_text(meal_name),
+        ingredients=normalize_list(ingredients),
+        instructions=normalize_text(instructions),
+        dietary_preferences=normalize_list(dietary_preferences)
+    )
+    cached = response_cache.get("meal_reasoning", cache_key)
+    if cached is not None:
+        return {"meal_name": meal_name, "reasoning": cached}
     
     # Format the ingredients for the prompt
     ingredients_text = "\n".join([f"- {ingredient}" for ingredient in ingredients])
@@ -78,33 +99,50 @@ def generate_meal_reasoning(
     """
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # Using the smaller model for efficiency
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a nutritionist who provides concise, evidence-based explanations about meals."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=300,  # Limiting tokens for brevity
-            response_format={"type": "json_object"}
+        # Identical meals already in flight share one upstream call
+        reasoning = await single_flight.do(
+            "meal_reasoning",
+            (key, cache_key),
+            lambda: _request_reasoning(key, prompt)
         )
-
-        # Parse JSON response
-        content = response.choices[0].message.content
-        reasoning_data = json.loads(content)
+        response_cache.set("meal_reasoning", cache_key, reasoning)
         
         # Return the structured response
         return {
             "meal_name": meal_name,
-            "reasoning": {
-                "key_ingredient_choices": reasoning_data.get("key_ingredient_choices", ""),
-                "nutritional_benefits": reasoning_data.get("nutritional_benefits", ""),
-                "dietary_alignment": reasoning_data.get("dietary_alignment", "")
-            }
+            "reasoning": reasoning
         }
         
+    except UpstreamOverloadedError:
+        raise
     except Exception as e:
-        raise Exception(f"Failed to generate reasoning: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Failed to generate reasoning: {str(e)}")
+
+
+async def _request_reasoning(key: str, prompt: str) -> Dict[str, str]:
+    """One completion for the reasoning highlights."""
+    response = await create_chat_completion(
+        key,
+        stage="reasoning",
+        model="gpt-3.5-turbo",  # Using the smaller model for efficiency
+        messages=[
+            {
+                "role": "system", 
+                "content": "You are a nutritionist who provides concise, evidence-based explanations about meals."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=300,  # Limiting tokens for brevity
+        response_format={"type": "json_object"}
+    )
+
+    # Parse JSON response
+    content = response.choices[0].message.content
+    reasoning_data = json.loads(content)
+    reasoning = {
+        "key_ingredient_choices": reasoning_data.get("key_ingredient_choices", ""),
+        "nutritional_benefits": reasoning_data.get("nutritional_benefits", ""),
+        "dietary_alignment": reasoning_data.get("dietary_alignment", "")
+    }
+    return reasoning
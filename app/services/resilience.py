@@ -0,0 +1,255 @@
+# app/services/resilience.py
+import os
+import time
+import random
+import asyncio
+import hashlib
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+import openai
+from dotenv import load_dotenv
+
+from app.services.concurrency_limiter import UpstreamOverloadedError
+from app.services.deadline import DeadlineExceededError, remaining
+from app.services.metrics import metrics
+
+# Load environment variables
+load_dotenv()
+
+T = TypeVar("T")
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "4"))
+# Wall-clock budget for one logical call, attempts and backoff included
+RETRY_BUDGET = float(os.getenv("LLM_RETRY_BUDGET_SECONDS", "60"))
+ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "45"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+LLM_RETRIES = metrics.counter(
+    "dietdraft_llm_retries_total",
+    "Upstream attempts retried, by error type.",
+    ["reason"]
+)
+BREAKER_TRANSITIONS = metrics.counter(
+    "dietdraft_circuit_breaker_transitions_total",
+    "Circuit breaker state changes.",
+    ["upstream", "key", "state"]
+)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(UpstreamOverloadedError):
+    """Raised without calling upstream while a key's circuit breaker is open."""
+
+    status_code = 503
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient upstream failures: rate limits, timeouts, dropped connections and 5xx."""
+    return isinstance(error, (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError
+    ))
+
+
+def counts_against_breaker(error: BaseException) -> bool:
+    """Failures that say the upstream or the key is unusable, as opposed to a bad request."""
+    return is_retryable(error) or isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError))
+
+
+def _retry_after_header(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, error: Optional[BaseException] = None) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it sent one."""
+    retry_after = _retry_after_header(error) if error is not None else None
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream key.
+
+    After `failure_threshold` failures in a row the breaker opens and calls
+    fail immediately for `reset_timeout` seconds. Then one probe call is let
+    through (half-open): success closes the breaker, failure reopens it.
+    """
+
+    def __init__(self, label: Tuple[str, str], failure_threshold: int, reset_timeout: float):
+        self.label = label
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        BREAKER_TRANSITIONS.inc(upstream=self.label[0], key=self.label[1], state=state)
+
+    def before_call(self) -> None:
+        if self.state == CLOSED:
+            return
+        open_for = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == OPEN and open_for <= 0:
+            self._transition(HALF_OPEN)
+        if self.state == OPEN or self._probing:
+            raise CircuitOpenError(
+                "Upstream is failing, not retrying until it recovers",
+                max(1, int(open_for + 0.999))
+            )
+        self._probing = True
+
+    def record_success(self) -> None:
+        self._probing = False
+        self.failures = 0
+        if self.state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            if self.state != OPEN:
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """End a call that told us nothing about upstream health."""
+        self._probing = False
+
+    def accepting(self) -> bool:
+        """Whether before_call would let a call through right now."""
+        if self.state == CLOSED:
+            return True
+        if self._probing:
+            return False
+        return self.state == HALF_OPEN or time.monotonic() >= self.opened_at + self.reset_timeout
+
+
+class CircuitBreakerRegistry:
+    """One breaker per (base URL, API key), labelled by a key fingerprint, never the key."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, api_key: str, base_url: str) -> CircuitBreaker:
+        key = (base_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8])
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = self._breakers[key] = CircuitBreaker(key, self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {"upstream": upstream, "key": key, "state": breaker.state, "failures": breaker.failures}
+            for (upstream, key), breaker in self._breakers.items()
+        ]
+
+
+circuit_breakers = CircuitBreakerRegistry(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS)
+
+
+@contextmanager
+def breaker_guard(breaker: CircuitBreaker, timeout: float) -> Iterator[None]:
+    """
+    Let one attempt through the breaker and record what it says about upstream health.
+
+    Args:
+        breaker: Breaker for the backend the attempt uses
+        timeout: Timeout the attempt was given, to tell a deadline cut-off from an upstream timeout
+    """
+    breaker.before_call()
+    # Only a timeout the request deadline imposed is ours; one set by the
+    # per-attempt limit or the retry budget means upstream was too slow
+    request_left = remaining()
+    deadline_bound = request_left is not None and request_left <= timeout
+    try:
+        yield
+    except asyncio.CancelledError:
+        breaker.release()
+        raise
+    except Exception as e:
+        if isinstance(e, openai.APITimeoutError) and deadline_bound:
+            # Our deadline ran out, which says nothing about upstream health
+            breaker.release()
+            raise DeadlineExceededError("Request deadline exceeded during the upstream call") from e
+        if counts_against_breaker(e):
+            breaker.record_failure()
+        elif isinstance(e, UpstreamOverloadedError):
+            breaker.release()
+        else:
+            # Upstream answered; the request itself was at fault
+            breaker.record_success()
+        raise
+    breaker.record_success()
+
+
+async def call_with_retries(
+    api_key: str,
+    base_url: Optional[str],
+    attempt: Callable[[float], Awaitable[T]]
+) -> T:
+    """
+    Run attempt(timeout) until it succeeds, retrying transient upstream errors.
+
+    Each attempt gets the smaller of the per-attempt timeout and what is
+    left of the budget, which never outlasts the request deadline; a retry
+    whose backoff would overrun the budget is not made. Outcomes feed the
+    circuit breaker for this key and base URL.
+
+    Args:
+        api_key: OpenAI API key the attempt uses
+        base_url: Upstream base URL the attempt uses, or None when each attempt
+            picks its own backend and guards that backend's breaker itself
+        attempt: Coroutine function making one upstream call with the given timeout
+
+    Returns:
+        The first successful attempt's result
+    """
+    breaker = circuit_breakers.get(api_key, base_url) if base_url is not None else None
+    deadline = time.monotonic() + RETRY_BUDGET
+    request_left = remaining()
+    if request_left is not None:
+        deadline = min(deadline, time.monotonic() + request_left)
+    number = 0
+    while True:
+        number += 1
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise DeadlineExceededError("Request deadline exceeded before the upstream call")
+        timeout = min(ATTEMPT_TIMEOUT, left)
+        try:
+            if breaker is None:
+                return await attempt(timeout)
+            with breaker_guard(breaker, timeout):
+                return await attempt(timeout)
+        except Exception as e:
+            delay = backoff_delay(number, e)
+            if (
+                not is_retryable(e)
+                or number >= RETRY_MAX_ATTEMPTS
+                or time.monotonic() + delay >= deadline
+                or (breaker is not None and breaker.state == OPEN)
+            ):
+                raise
+            LLM_RETRIES.inc(reason=type(e).__name__)
+            await asyncio.sleep(delay)
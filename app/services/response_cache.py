@@ -0,0 +1,229 @@
+# app/services/response_cache.py
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lower-case and collapse whitespace so trivially different inputs share a key."""
+    if not value:
+        return ""
+    return _WHITESPACE.sub(" ", value).strip().lower()
+
+
+def normalize_list(values: Optional[Iterable[str]]) -> list:
+    """Normalize, de-duplicate and sort a list of free-text values."""
+    return sorted({normalize_text(v) for v in values or [] if normalize_text(v)})
+
+
+def make_cache_key(endpoint: str, **inputs: Any) -> str:
+    """Build a content-addressed key from already-normalized inputs."""
+    payload = json.dumps({"endpoint": endpoint, "inputs": inputs}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Storage for serialized cache entries."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored value, or None if missing or expired."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> int:
+        """Store a value and return how many entries were evicted."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored entries."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU cache with a TTL and an entry cap."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 86400.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() > entry[0]:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str) -> int:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    SQLite-backed cache that survives restarts and is shared between workers.
+
+    Entries expire after the TTL; once the cap is exceeded the least
+    recently used entries are deleted.
+    """
+
+    def __init__(self, path: str = "dietdraft_cache.db", max_entries: int = 100000, ttl_seconds: float = 86400.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._connect().executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache (last_access);
+        """)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now > row[1]:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str) -> int:
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, now + self.ttl_seconds, now)
+        )
+        excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_access LIMIT ?)",
+            (excess,)
+        )
+        return excess
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Cache for LLM-derived service results with per-endpoint hit ratios.
+
+    Values are stored as JSON so every hit returns a fresh copy that
+    callers can modify freely.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend]):
+        self.backend = backend
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _endpoint_stats(self, endpoint: str) -> Dict[str, int]:
+        return self._stats.setdefault(endpoint, {"hits": 0, "misses": 0, "evictions": 0})
+
+    def get(self, endpoint: str, key: str) -> Optional[Any]:
+        """Return the cached value for a key, counting a hit or miss."""
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        stats = self._endpoint_stats(endpoint)
+        if value is None:
+            stats["misses"] += 1
+            return None
+        stats["hits"] += 1
+        return json.loads(value)
+
+    def set(self, endpoint: str, key: str, value: Any) -> None:
+        """Store a successful result."""
+        if self.backend is None:
+            return
+        self._endpoint_stats(endpoint)["evictions"] += self.backend.set(key, json.dumps(value))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return per-endpoint hits, misses, evictions and hit ratios."""
+        endpoints = {}
+        for endpoint, counts in self._stats.items():
+            lookups = counts["hits"] + counts["misses"]
+            endpoints[endpoint] = dict(counts, hit_ratio=round(counts["hits"] / lookups, 4) if lookups else 0.0)
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "entries": len(self.backend) if self.backend else 0,
+            "endpoints": endpoints
+        }
+
+
+def create_response_cache() -> ResponseCache:
+    """Build the response cache configured through the environment."""
+    backend_name = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+    max_entries = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+    if backend_name == "disk":
+        return ResponseCache(DiskCacheBackend(
+            path=os.getenv("RESPONSE_CACHE_PATH", "dietdraft_cache.db"),
+            max_entries=max_entries,
+            ttl_seconds=ttl
+        ))
+    if backend_name == "memory":
+        return ResponseCache(MemoryCacheBackend(max_entries=max_entries, ttl_seconds=ttl))
+    return ResponseCache(None)
+
+
+response_cache = create_response_cache()
@@ -0,0 +1,121 @@
+# app/services/single_flight.py
+import os
+import copy
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from dotenv import load_dotenv
+
+from app.services.deadline import DeadlineExceededError, no_deadline, remaining
+
+# Load environment variables
+load_dotenv()
+
+
+class _Flight:
+    """One upstream call and the callers waiting on it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.refs = 0
+
+
+async def _detached(func: Callable[[], Awaitable[Any]]) -> Any:
+    with no_deadline():
+        return await func()
+
+
+class SingleFlight:
+    """
+    Coalesce identical in-flight calls so only one reaches the upstream.
+
+    While a call for (endpoint, key) is running, later callers with the same
+    key await its result instead of starting their own. Unlike the response
+    cache nothing is kept once the call finishes, so it is safe to use when
+    caching is disabled.
+
+    The shared call runs in a copy of the first caller's context, keeping its
+    upstream priority and trace, but without its deadline: each caller
+    instead stops waiting when its own deadline runs out. The call is only
+    cancelled once every caller waiting on it has given up.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Tuple[str, Hashable, asyncio.AbstractEventLoop], _Flight] = {}
+        self._endpoint_stats: Dict[str, Dict[str, int]] = {}
+
+    async def do(self, endpoint: str, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func, or join an identical call already in flight.
+
+        Args:
+            endpoint: Name used to group metrics
+            key: Normalized request identity; include the API key so calls
+                are never shared across accounts
+            func: Zero-argument coroutine factory making the upstream call
+
+        Returns:
+            The call's result; callers that joined get their own deep copy
+        """
+        if not self.enabled:
+            return await func()
+
+        loop = asyncio.get_running_loop()
+        slot = (endpoint, key, loop)
+        stats = self._endpoint_stats.setdefault(
+            endpoint, {"leaders": 0, "coalesced": 0, "max_waiters": 0}
+        )
+
+        flight = self._flights.get(slot)
+        leader = flight is None
+        if leader:
+            flight = _Flight(loop.create_task(_detached(func)))
+            self._flights[slot] = flight
+            flight.task.add_done_callback(lambda task, slot=slot, flight=flight: self._finish(slot, flight))
+            stats["leaders"] += 1
+        else:
+            stats["coalesced"] += 1
+            stats["max_waiters"] = max(stats["max_waiters"], flight.refs)
+
+        flight.refs += 1
+        try:
+            result = await asyncio.wait_for(asyncio.shield(flight.task), remaining())
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if flight.task.done():
+                raise
+            flight.refs -= 1
+            if flight.refs == 0:
+                flight.task.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                raise DeadlineExceededError("Request deadline exceeded") from None
+            raise
+
+        return result if leader else copy.deepcopy(result)
+
+    def _finish(self, slot: Tuple[str, Hashable, asyncio.AbstractEventLoop], flight: _Flight) -> None:
+        # Later callers start a fresh call rather than reusing a finished one
+        if self._flights.get(slot) is flight:
+            del self._flights[slot]
+        # Retrieve the outcome so a failure nobody waited for is not logged as unhandled
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-endpoint leader and waiter counts plus the coalesce rate."""
+        endpoints = {}
+        for endpoint, counts in self._endpoint_stats.items():
+            total = counts["leaders"] + counts["coalesced"]
+            endpoints[endpoint] = dict(
+                counts,
+                coalesce_rate=round(counts["coalesced"] / total, 4) if total else 0.0
+            )
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "endpoints": endpoints
+        }
+
+
+single_flight = SingleFlight(
+    enabled=os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+)
@@ -0,0 +1,38 @@
+# app/services/sse_service.py
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+
+from app.services.concurrency_limiter import UpstreamOverloadedError
+from app.services.metrics import ERRORS
+
+
+def format_sse_event(event: str, data: Any) -> str:
+    """Serialize one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream_response(events: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """
+    Wrap an iterator of {"event", "data"} dicts in a text/event-stream response.
+
+    Errors raised after streaming has started can no longer change the
+    status code, so they are reported as a final "error" event instead.
+    """
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for item in events:
+                yield format_sse_event(item["event"], item["data"])
+        except UpstreamOverloadedError as e:
+            ERRORS.inc(component="stream")
+            yield format_sse_event("error", {"detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            ERRORS.inc(component="stream")
+            yield format_sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,16 +1,77 @@
 import os
 import json
-from typing import Dict, List, Any, Optional
-from openai import OpenAI
+import asyncio
+from typing import Dict, List, Any, Optional, Tuple
+from pydantic import ValidationError
 from dotenv import load_dotenv
 
+from app.models.substitution_models import SubstitutionOption
+from app.services.llm_client import create_chat_completion, resolve_api_key, run_sync
+from app.services.metrics import metrics
+from app.services.micro_batcher import MicroBatcher
+from app.services.response_cache import make_cache_key, normalize_text, response_cache
+from app.services.single_flight import single_flight
+from app.services.tracing import traced
+from app.services.concurrency_limiter import UpstreamOverloadedError
+
 load_dotenv()
 
+# Upstream calls one batch request may have in flight at once
+BATCH_CONCURRENCY = int(os.getenv("SUBSTITUTION_BATCH_CONCURRENCY", "8"))
+
+BATCH_MISSES = metrics.counter(
+    "dietdraft_substitution_batch_misses_total",
+    "Micro-batched substitution items the batch answer left out, retried on their own.",
+    ["reason"]
+)
+
+
+def canonical_substitution_request(
+    original_ingredient: str,
+    reason: str,
+    recipe_context: Optional[str] = None
+) -> Tuple[str, str, str]:
+    """Normalized (ingredient, reason, context) triple used for de-duplication and caching."""
+    return (
+        normalize_text(original_ingredient).rstrip(".!?"),
+        normalize_text(reason).rstrip(".!?"),
+        normalize_text(recipe_context).rstrip(".!?")
+    )
+
+
+def _substitution_cache_key(canonical: Tuple[str, str, str]) -> str:
+    ingredient, reason, context = canonical
+    return make_cache_key(
+        "find_substitutions",
+        original_ingredient=ingredient,
+        reason=reason,
+        recipe_context=context
+    )
+
+
 def find_substitutions(
     original_ingredient: str,
     reason: str,
     recipe_context: Optional[str] = None,
     api_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Synchronous wrapper around find_substitutions_async for non-async callers.
+    """
+    return run_sync(find_substitutions_async(
+        original_ingredient=original_ingredient,
+        reason=reason,
+        recipe_context=recipe_context,
+        api_key=api_key
+    ))
+
+
+@traced("find_substitutions")
+async def find_substitutions_async(
+    original_ingredient: str,
+    reason: str,
+    recipe_context: Optional[str] = None,
+    api_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Find ingredient substitutions using OpenAI.
@@ -25,21 +86,74 @@ def find_substitutions(
         Dict with substitution alternatives
     """
     # Get API key
-    key = api_key or os.getenv("OPENAI_API_KEY")
-    if not key:
-        raise ValueError("OpenAI API key is required")
+    key = resolve_api_key(api_key)
     
-    # Initialize OpenAI client
-    try:
-        client = OpenAI(api_key=key)
-    except TypeError as e:
-        if "proxies" in str(e):
-            import openai
-            openai.api_key = key
-            client = openai.OpenAI()
-        else:
-            raise e
+    # Serve common ingredient/reason pairs from the response cache
+    cache_key = _substitution_cache_key(
+        canonical_substitution_request(original_ingredient, reason, recipe_context)
+    )
+    cached = response_cache.get("find_substitutions", cache_key)
+    if cached is not None:
+        return {
+            "original_ingredient": original_ingredient,
+            "reason": reason,
+            "substitutions": cached
+        }
     
+    return await _find_substitutions_uncached(key, cache_key, original_ingredient, reason, recipe_context)
+
+
+async def _find_substitutions_uncached(
+    key: str,
+    cache_key: str,
+    original_ingredient: str,
+    reason: str,
+    recipe_context: Optional[str]
+) -> Dict[str, Any]:
+    """Fetch and cache substitutions for a lookup the caller already missed in the cache."""
+    try:
+        # Identical lookups already in flight share one upstream call
+        substitutions = await single_flight.do(
+            "find_substitutions",
+            (key, cache_key),
+            lambda: _request_substitutions(key, original_ingredient, reason, recipe_context)
+        )
+        response_cache.set("find_substitutions", cache_key, substitutions)
+        
+        # Return the structured response
+        return {
+            "original_ingredient": original_ingredient,
+            "reason": reason,
+            "substitutions": substitutions
+        }
+        
+    except UpstreamOverloadedError:
+        raise
+    except json.JSONDecodeError as e:
+        raise Exception(f"Failed to parse substitution response as JSON: {str(e)}")
+    except Exception as e:
+        raise Exception(f"Failed to find substitutions: {str(e)}")
+
+
+async def _request_substitutions(
+    key: str,
+    original_ingredient: str,
+    reason: str,
+    recipe_context: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Ask the model for substitutions, through the micro-batcher when it is enabled."""
+    if MICRO_BATCHING:
+        return await substitution_batcher.submit(key, (original_ingredient, reason, recipe_context))
+    return await _request_substitutions_single(key, original_ingredient, reason, recipe_context)
+
+
+async def _request_substitutions_single(
+    key: str,
+    original_ingredient: str,
+    reason: str,
+    recipe_context: Optional[str]
+) -> List[Dict[str, Any]]:
+    """One completion for one ingredient."""
     # Build context information
     context_text = f"Recipe context: {recipe_context}" if recipe_context else ""
     
@@ -72,33 +186,226 @@ def find_substitutions(
     Make the notes practical and specific about usage.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a culinary expert who provides practical ingredient substitutions. Always respond with valid JSON only."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=400,
-            response_format={"type": "json_object"}
+    response = await create_chat_completion(
+        key,
+        stage="substitution",
+        model="gpt-3.5-turbo",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a culinary expert who provides practical ingredient substitutions. Always respond with valid JSON only."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=400,
+        response_format={"type": "json_object"}
+    )
+
+    # Parse JSON response
+    content = response.choices[0].message.content
+    substitution_data = json.loads(content)
+    return substitution_data.get("substitutions", [])
+
+
+async def _request_substitution_batch(
+    key: str,
+    items: List[Tuple[str, str, Optional[str]]]
+) -> List[Any]:
+    """
+    One completion for several ingredients, answered as a JSON map keyed by item number.
+    
+    Items the model leaves out or malforms are retried on their own, so a
+    partial answer never fails the whole batch.
+    """
+    if len(items) == 1:
+        return [await _request_substitutions_single(key, *items[0])]
+    
+    lines = []
+    for number, (ingredient, reason, context) in enumerate(items, start=1):
+        context_text = f" (recipe context: {context})" if context else ""
+        lines.append(f"{number}. {ingredient} - reason: {reason}{context_text}")
+    items_text = "\n    ".join(lines)
+    
+    prompt = f"""
+    Find ingredient substitutions for each numbered item below:
+    
+    {items_text}
+    
+    For every item provide 3-5 alternative ingredients that address its 
+    substitution reason while maintaining the dish's integrity.
+    
+    Respond with valid JSON in this format, with one key per item number:
+    {{
+        "results": {{
+            "1": {{
+                "substitutions": [
+                    {{
+                        "ingredient": "coconut cream",
+                        "notes": "Use same amount. Provides richness but adds subtle coconut flavor."
+                    }}
+                ]
+            }}
+        }}
+    }}
+    
+    Make the notes practical and specific about usage.
+    """
+    
+    response = await create_chat_completion(
+        key,
+        stage="substitution_batch",
+        model="gpt-3.5-turbo",
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a culinary expert who provides practical ingredient substitutions for a numbered list of ingredients. Always respond with valid JSON only."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.7,
+        max_tokens=min(4000, 100 + 300 * len(items)),
+        response_format={"type": "json_object"}
+    )
+    
+    # A truncated or invalid answer is treated as answering nothing, so
+    # every item takes the per-item retry below
+    choice = response.choices[0]
+    answered: Dict[str, Any] = {}
+    reason = "missing"
+    if choice.finish_reason == "length":
+        reason = "truncated"
+    else:
+        try:
+            parsed = json.loads(choice.message.content or "")
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict) and isinstance(parsed.get("results"), dict):
+            answered = parsed["results"]
+        else:
+            reason = "invalid"
+    
+    results: List[Any] = [None] * len(items)
+    missing = []
+    for index in range(len(items)):
+        entry = answered.get(str(index + 1))
+        substitutions = entry.get("substitutions") if isinstance(entry, dict) else None
+        if isinstance(substitutions, list):
+            results[index] = substitutions
+        else:
+            missing.append(index)
+    
+    if missing:
+        BATCH_MISSES.inc(len(missing), reason=reason)
+        retried = await asyncio.gather(
+            *(_request_substitutions_single(key, *items[index]) for index in missing),
+            return_exceptions=True
         )
+        for index, result in zip(missing, retried):
+            results[index] = result
+    
+    return results
 
-        # Parse JSON response
-        content = response.choices[0].message.content
-        substitution_data = json.loads(content)
-        
-        # Return the structured response
-        return {
-            "original_ingredient": original_ingredient,
-            "reason": reason,
-            "substitutions": substitution_data.get("substitutions", [])
-        }
+
+# Opt-in: coalesce concurrent substitution lookups into one completion per window
+MICRO_BATCHING = os.getenv("SUBSTITUTION_MICRO_BATCHING", "false").lower() in ("1", "true", "yes")
+
+substitution_batcher = MicroBatcher(
+    _request_substitution_batch,
+    window_ms=float(os.getenv("SUBSTITUTION_MICROBATCH_WINDOW_MS", "20")),
+    max_items=int(os.getenv("SUBSTITUTION_MICROBATCH_MAX_ITEMS", "16"))
+)
+
+
+def _validated_options(options: Any) -> List[Dict[str, Any]]:
+    """Check substitution options against SubstitutionOption, raising on the first bad one."""
+    if not isinstance(options, list):
+        raise ValueError("Malformed substitutions in AI response: expected a list")
+    try:
+        return [SubstitutionOption.model_validate(option).model_dump() for option in options]
+    except ValidationError as e:
+        raise ValueError(f"Malformed substitution in AI response: {e.errors()[0]['msg']}") from e
+
+
+@traced("find_substitutions_batch")
+async def find_substitutions_batch_async(
+    requests: List[Dict[str, Any]],
+    api_key: Optional[str] = None,
+    max_concurrency: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Find substitutions for many ingredients in one call.
+    
+    Requests are canonicalized and de-duplicated, cached answers are served
+    directly, and the remaining unique requests run concurrently with at
+    most max_concurrency upstream calls in flight. A failing item gets its
+    own error instead of failing the batch.
+    
+    Args:
+        requests: Dicts with "original_ingredient", "reason" and optional "recipe_context"
+        api_key: OpenAI API key
+        max_concurrency: Cap on concurrent upstream calls (defaults to BATCH_CONCURRENCY)
         
-    except json.JSONDecodeError as e:
-        raise Exception(f"Failed to parse substitution response as JSON: {str(e)}")
-    except Exception as e:
-        raise Exception(f"Failed to find substitutions: {str(e)}")
\ No newline at end of file
+    Returns:
+        Dict with "results" in input order and batch counts
+    """
+    key = resolve_api_key(api_key)
+    semaphore = asyncio.Semaphore(max_concurrency or BATCH_CONCURRENCY)
+    
+    # Group input positions by canonical request
+    groups: Dict[Tuple[str, str, str], List[int]] = {}
+    for index, item in enumerate(requests):
+        canonical = canonical_substitution_request(
+            item.get("original_ingredient", ""), item.get("reason", ""), item.get("recipe_context")
+        )
+        groups.setdefault(canonical, []).append(index)
+    
+    outcomes: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    pending = []
+    for canonical in groups:
+        cached = response_cache.get("find_substitutions", _substitution_cache_key(canonical))
+        if cached is not None:
+            try:
+                outcomes[canonical] = {"substitutions": _validated_options(cached), "error": None, "cached": True}
+            except Exception as e:
+                outcomes[canonical] = {"substitutions": [], "error": str(e), "cached": True}
+        else:
+            pending.append(canonical)
+    
+    async def fetch(canonical: Tuple[str, str, str]) -> None:
+        first = requests[groups[canonical][0]]
+        try:
+            async with semaphore:
+                # Already missed the cache above; looking again would count a second miss
+                result = await _find_substitutions_uncached(
+                    key,
+                    _substitution_cache_key(canonical),
+                    first.get("original_ingredient", ""),
+                    first.get("reason", ""),
+                    first.get("recipe_context")
+                )
+            # One malformed answer must fail only its own item, not the batch response
+            substitutions = _validated_options(result["substitutions"])
+            outcomes[canonical] = {"substitutions": substitutions, "error": None, "cached": False}
+        except Exception as e:
+            outcomes[canonical] = {"substitutions": [], "error": str(e), "cached": False}
+    
+    await asyncio.gather(*(fetch(canonical) for canonical in pending))
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    for canonical, indexes in groups.items():
+        for index in indexes:
+            item = requests[index]
+            results[index] = {
+                "original_ingredient": item.get("original_ingredient", ""),
+                "reason": item.get("reason", ""),
+                "recipe_context": item.get("recipe_context"),
+                **outcomes[canonical]
+            }
+    
+    return {
+        "results": results,
+        "unique_requests": len(groups),
+        "cache_hits": len(groups) - len(pending),
+        "upstream_calls": len(pending)
+    }
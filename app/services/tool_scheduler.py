@@ -0,0 +1,132 @@
+# app/services/tool_scheduler.py
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ToolFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class ToolOutcome:
+    """Result of a single scheduled tool call."""
+    result: Any = None
+    error: Optional[str] = None
+    skipped: bool = False
+    timed_out: bool = False
+    elapsed: float = 0.0  # seconds spent in the tool itself, excluding dependency waits
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+
+class ToolScheduler:
+    """
+    Run async tool calls as a small dependency graph.
+
+    Tools without dependencies start immediately and run concurrently; a
+    dependent tool starts as soon as everything it depends on has finished.
+    A failing tool records its error without affecting unrelated tools, and
+    tools depending on it are skipped. Tools still running when the timeout
+    expires are cancelled and reported as timed out.
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, ToolFunc] = {}
+        self._depends_on: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tools)
+
+    def add(self, name: str, func: ToolFunc, depends_on: Optional[List[str]] = None) -> None:
+        """
+        Register a tool.
+
+        Args:
+            name: Unique tool name
+            func: Coroutine function receiving a dict of dependency results
+            depends_on: Names of previously added tools this one needs
+        """
+        if name in self._tools:
+            raise ValueError(f"Tool '{name}' is already scheduled")
+        depends_on = depends_on or []
+        missing = [dep for dep in depends_on if dep not in self._tools]
+        if missing:
+            # Requiring dependencies to be added first keeps the graph acyclic
+            raise ValueError(f"Tool '{name}' depends on unknown tools: {', '.join(missing)}")
+        self._tools[name] = func
+        self._depends_on[name] = depends_on
+
+    async def run(
+        self,
+        on_complete: Optional[Callable[[str, "ToolOutcome"], None]] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, ToolOutcome]:
+        """
+        Execute all tools and return their outcomes keyed by name.
+
+        Args:
+            on_complete: Optional callback invoked with each tool's name and
+                outcome as soon as that tool finishes
+            timeout: Seconds to wait for all tools; None waits for every one
+
+        Returns:
+            Dict mapping tool names to outcomes
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        run_start = time.perf_counter()
+
+        async def run_tool(name: str) -> ToolOutcome:
+            outcome = await execute(name)
+            if on_complete is not None:
+                on_complete(name, outcome)
+            return outcome
+
+        async def execute(name: str) -> ToolOutcome:
+            dependency_results = {}
+            for dep in self._depends_on[name]:
+                outcome = await tasks[dep]
+                if not outcome.ok:
+                    return ToolOutcome(skipped=True)
+                dependency_results[dep] = outcome.result
+            start = time.perf_counter()
+            try:
+                result = await self._tools[name](dependency_results)
+            except Exception as e:
+                return ToolOutcome(error=str(e), elapsed=time.perf_counter() - start)
+            return ToolOutcome(result=result, elapsed=time.perf_counter() - start)
+
+        for name in self._tools:
+            tasks[name] = asyncio.create_task(run_tool(name))
+
+        if not tasks:
+            return {}
+        try:
+            _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        outcomes = {}
+        for name, task in tasks.items():
+            if task not in pending:
+                outcomes[name] = task.result()
+            elif any(tasks[dep] in pending for dep in self._depends_on[name]):
+                # Never started; its dependency is the one that timed out
+                outcomes[name] = ToolOutcome(skipped=True)
+            else:
+                outcomes[name] = ToolOutcome(
+                    error="Timed out before the request deadline",
+                    timed_out=True,
+                    elapsed=time.perf_counter() - run_start
+                )
+                if on_complete is not None:
+                    on_complete(name, outcomes[name])
+        return outcomes
@@ -0,0 +1,181 @@
+# app/services/tracing.py
+import os
+import re
+import time
+import uuid
+import random
+import functools
+import itertools
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Fraction of requests that record spans; the rest only get a trace ID
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("dietdraft_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("dietdraft_span", default=None)
+
+T = TypeVar("T")
+
+_INVALID_METRIC_CHARS = re.compile(r"[^A-Za-z0-9_.\-]")
+
+
+class Span:
+    """One timed operation inside a trace."""
+
+    __slots__ = ("name", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, span_id: int, parent_id: Optional[int], start: float):
+        self.name = name
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = start
+        self.end: Optional[float] = None
+        self.attributes: Dict[str, Any] = {}
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+
+class Trace:
+    """Spans recorded for one request."""
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+
+    def new_span(self, name: str, parent: Optional[Span], start: Optional[float] = None) -> Span:
+        span = Span(name, next(self._ids), parent.span_id if parent else None, start or time.perf_counter())
+        self.spans.append(span)
+        return span
+
+    def server_timing(self) -> str:
+        """
+        Render finished spans as a Server-Timing header value.
+
+        Spans sharing a name are summed, with the count in the description.
+        """
+        totals: Dict[str, List[float]] = {}
+        for span in self.spans:
+            if span.end is None:
+                continue
+            entry = totals.setdefault(span.name, [0.0, 0])
+            entry[0] += span.duration
+            entry[1] += 1
+
+        parts = []
+        for name, (duration, count) in totals.items():
+            part = f"{_INVALID_METRIC_CHARS.sub('-', name)};dur={duration * 1000:.1f}"
+            if count > 1:
+                part += f';desc="x{count}"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Span tree in a JSON-friendly form, times in milliseconds from request start."""
+        return {
+            "trace_id": self.trace_id,
+            "sampled": self.sampled,
+            "spans": [
+                {
+                    "id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "name": span.name,
+                    "start_ms": round((span.start - self.start) * 1000, 2),
+                    "duration_ms": round(span.duration * 1000, 2),
+                    "attributes": span.attributes
+                }
+                for span in self.spans
+            ]
+        }
+
+
+def start_trace(trace_id: Optional[str] = None, sampled: Optional[bool] = None) -> Trace:
+    """Begin a trace for the current context (normally called by TracingMiddleware)."""
+    if sampled is None:
+        sampled = TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+    trace = Trace(trace_id or uuid.uuid4().hex, sampled)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def force_sample() -> Optional[Trace]:
+    """Record spans for the rest of this request regardless of the sample rate."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.sampled = True
+    return trace
+
+
+class span:
+    """
+    Context manager timing a block as a child of the current span.
+
+    Costs one context variable lookup when the request is not sampled.
+    Works in async code with a plain `with`; tasks created inside the block
+    inherit it as their parent span.
+    """
+
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+
+    def __enter__(self) -> Optional[Span]:
+        trace = _current_trace.get()
+        if trace is None or not trace.sampled:
+            return None
+        self._span = trace.new_span(self.name, _current_span.get())
+        self._span.attributes.update(self.attributes)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._span is None:
+            return
+        self._span.end = time.perf_counter()
+        if exc_type is not None:
+            self._span.attributes["error"] = exc_type.__name__
+        _current_span.reset(self._token)
+
+
+def record_span(name: str, start: float, **attributes: Any) -> None:
+    """
+    Record an already-finished span that began at start (a perf_counter value).
+
+    For async generators, which may resume in a different context and so
+    cannot hold the current-span variable across yields.
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        return
+    recorded = trace.new_span(name, _current_span.get(), start)
+    recorded.end = time.perf_counter()
+    recorded.attributes.update(attributes)
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorator wrapping an async function's whole call in a span."""
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,45 @@
+# app/services/tracing_middleware.py
+import re
+from typing import Any, Dict
+
+from app.services.tracing import start_trace
+
+_TRACE_ID = re.compile(r"^[A-Za-z0-9\-]{8,64}$")
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware giving every request a trace.
+
+    Every response carries X-Trace-Id (reusing a well-formed incoming
+    X-Trace-Id). Sampled requests, chosen by TRACE_SAMPLE_RATE or forced
+    with an "X-Debug-Trace: 1" request header, also get a Server-Timing
+    header with the spans finished before the headers were sent; for
+    streaming endpoints that is only the work done before the first event.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        incoming_id = headers.get(b"x-trace-id", b"").decode("latin-1")
+        trace = start_trace(
+            trace_id=incoming_id if _TRACE_ID.match(incoming_id) else None,
+            sampled=True if headers.get(b"x-debug-trace") == b"1" else None
+        )
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = list(message.get("headers", []))
+                response_headers.append((b"x-trace-id", trace.trace_id.encode("latin-1")))
+                if trace.sampled:
+                    response_headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = dict(message, headers=response_headers)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -2,18 +2,44 @@
 import os
 import json
 from typing import Dict, List, Any, Optional
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from app.services.llm_client import create_chat_completion, resolve_api_key, run_sync
+from app.services.response_cache import normalize_text
+from app.services.single_flight import single_flight
+from app.services.tracing import traced
+from app.services.voice_rule_parser import parse_voice_rules
+from app.services.concurrency_limiter import UpstreamOverloadedError
+
 # Load environment variables
 load_dotenv()
 
+# Rule-based parses at or above this confidence skip the LLM
+RULE_CONFIDENCE_THRESHOLD = float(os.getenv("VOICE_RULE_CONFIDENCE_THRESHOLD", "0.85"))
+
 def parse_voice_to_json(
     voice_text: str,
     api_key: Optional[str] = None
 ) -> Dict[str, Any]:
     """
-    Use LLM to parse voice text into structured meal request JSON.
+    Synchronous wrapper around parse_voice_to_json_async for non-async callers.
+    """
+    return run_sync(parse_voice_to_json_async(
+        voice_text=voice_text,
+        api_key=api_key
+    ))
+
+
+@traced("parse_voice")
+async def parse_voice_to_json_async(
+    voice_text: str,
+    api_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Parse voice text into structured meal request JSON.
+    
+    A local rule-based parser runs first; the LLM is only called when its
+    confidence is below RULE_CONFIDENCE_THRESHOLD.
     
     Args:
         voice_text: Raw text transcribed from voice input
@@ -23,22 +49,13 @@ def parse_voice_to_json(
         Dict with structured meal request parameters
     """
     # Get API key
-    key = api_key or os.getenv("OPENAI_API_KEY")
-    if not key:
-        raise ValueError("OpenAI API key is required")
+    key = resolve_api_key(api_key)
     
-    # Initialize OpenAI client
-    try:
-        client = OpenAI(api_key=key)
-    except TypeError as e:
-        if "proxies" in str(e):
-            # Render sometimes passes proxy settings that OpenAI client doesn't accept
-            # Initialize without any environment-based proxy settings
-            import openai
-            openai.api_key = key
-            client = openai.OpenAI()
-        else:
-            raise e
+    # Fast path: lexicon parser answers easy utterances without a round-trip
+    parsed_data, confidence = parse_voice_rules(voice_text)
+    if confidence >= RULE_CONFIDENCE_THRESHOLD:
+        parsed_data["parsed_text"] = generate_human_readable_summary(parsed_data)
+        return parsed_data
     
     # Create prompt for the LLM
     prompt = f"""
@@ -58,34 +75,49 @@ def parse_voice_to_json(
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",  # Could use a smaller/cheaper model for this task
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a helpful assistant that parses voice commands into structured JSON for a recipe API."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,  # Lower temperature for more deterministic parsing
-            max_tokens=300,
-            response_format={"type": "json_object"}
+        # Identical utterances already in flight share one upstream call
+        return await single_flight.do(
+            "parse_voice",
+            (key, normalize_text(voice_text)),
+            lambda: _request_voice_parse(key, prompt)
         )
-
-        # Parse JSON response
-        content = response.choices[0].message.content
-        parsed_data = json.loads(content)
-        
-        # Add a human-readable summary
-        parsed_data["parsed_text"] = generate_human_readable_summary(parsed_data)
-        
-        return parsed_data
         
+    except UpstreamOverloadedError:
+        raise
     except json.JSONDecodeError as e:
         raise Exception(f"Failed to parse LLM response as JSON: {str(e)}")
     except Exception as e:
         raise Exception(f"Failed to parse voice input: {str(e)}")
 
+
+async def _request_voice_parse(key: str, prompt: str) -> Dict[str, Any]:
+    """One completion for one utterance."""
+    response = await create_chat_completion(
+        key,
+        stage="voice",
+        model="gpt-3.5-turbo",  # Could use a smaller/cheaper model for this task
+        messages=[
+            {
+                "role": "system", 
+                "content": "You are a helpful assistant that parses voice commands into structured JSON for a recipe API."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,  # Lower temperature for more deterministic parsing
+        max_tokens=300,
+        response_format={"type": "json_object"}
+    )
+
+    # Parse JSON response
+    content = response.choices[0].message.content
+    parsed_data = json.loads(content)
+    
+    # Add a human-readable summary
+    parsed_data["parsed_text"] = generate_human_readable_summary(parsed_data)
+    
+    return parsed_data
+
+
 def generate_human_readable_summary(parsed_data: Dict[str, Any]) -> str:
     """Generate a human-readable summary of the parsed data."""
     summary = []
@@ -0,0 +1,234 @@
+# app/services/voice_rule_parser.py
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Same meal types MealRequest.validate_meal_type accepts, plus spoken synonyms
+MEAL_TYPES = {
+    "breakfast": "breakfast",
+    "lunch": "lunch",
+    "dinner": "dinner",
+    "supper": "dinner",
+    "snack": "snack",
+    "dessert": "dessert",
+}
+
+CUISINES = {
+    "italian": "Italian", "mexican": "Mexican", "chinese": "Chinese", "japanese": "Japanese",
+    "thai": "Thai", "indian": "Indian", "french": "French", "greek": "Greek", "spanish": "Spanish",
+    "korean": "Korean", "vietnamese": "Vietnamese", "mediterranean": "Mediterranean",
+    "middle eastern": "Middle Eastern", "american": "American", "cajun": "Cajun",
+    "caribbean": "Caribbean", "moroccan": "Moroccan", "turkish": "Turkish", "lebanese": "Lebanese",
+    "ethiopian": "Ethiopian", "brazilian": "Brazilian", "german": "German", "british": "British",
+}
+
+DIETS = {
+    "vegetarian": "vegetarian", "vegan": "vegan", "plant based": "plant-based",
+    "pescatarian": "pescatarian", "keto": "keto", "ketogenic": "keto", "paleo": "paleo",
+    "whole30": "whole30", "gluten free": "gluten-free", "dairy free": "dairy-free",
+    "lactose free": "lactose-free", "low carb": "low-carb", "high protein": "high-protein",
+    "low fat": "low-fat", "low sodium": "low-sodium", "low sugar": "low-sugar",
+    "sugar free": "sugar-free", "high fiber": "high-fiber", "pre diabetic": "pre-diabetic",
+    "prediabetic": "pre-diabetic", "diabetic": "diabetic", "heart healthy": "heart-healthy",
+    "halal": "halal", "kosher": "kosher", "healthy": "healthy",
+}
+
+ALLERGENS = {
+    "nuts": "nuts", "nut": "nuts", "tree nuts": "tree nuts", "peanuts": "peanuts", "peanut": "peanuts",
+    "shellfish": "shellfish", "shrimp": "shellfish", "dairy": "dairy", "milk": "dairy",
+    "lactose": "dairy", "eggs": "eggs", "egg": "eggs", "soy": "soy", "wheat": "wheat",
+    "gluten": "gluten", "fish": "fish", "sesame": "sesame", "mustard": "mustard", "celery": "celery",
+}
+
+INGREDIENTS = {
+    "chicken", "chicken breast", "chicken thighs", "turkey", "beef", "ground beef", "steak", "pork",
+    "bacon", "ham", "sausage", "lamb", "salmon", "tuna", "cod", "tilapia", "shrimp", "prawns",
+    "tofu", "tempeh", "seitan", "eggs", "egg", "beans", "black beans", "kidney beans", "chickpeas",
+    "lentils", "rice", "brown rice", "quinoa", "pasta", "noodles", "bread", "oats", "oatmeal",
+    "potatoes", "potato", "sweet potatoes", "sweet potato", "broccoli", "spinach", "kale", "lettuce",
+    "cabbage", "carrots", "carrot", "peppers", "bell peppers", "onions", "onion", "garlic",
+    "tomatoes", "tomato", "mushrooms", "zucchini", "eggplant", "cauliflower", "corn", "peas",
+    "green beans", "asparagus", "avocado", "cucumber", "celery", "squash", "pumpkin",
+    "apples", "apple", "bananas", "banana", "berries", "strawberries", "blueberries", "lemon",
+    "lime", "mango", "pineapple", "cheese", "feta", "mozzarella", "parmesan", "yogurt",
+    "greek yogurt", "milk", "butter", "cream", "almonds", "walnuts", "peanut butter",
+    "chocolate", "honey", "coconut", "coconut milk", "olive oil", "ginger", "basil", "cilantro",
+}
+
+# Words that carry no meal parameters and are ignored for confidence. Negation
+# words are deliberately absent: _NEGATION claims the ones it understands, and
+# any it cannot place must pull confidence down so the LLM gets the utterance.
+FILLER = {
+    "a", "an", "the", "me", "my", "i", "i'd", "id", "we", "us", "you", "can", "could", "would",
+    "please", "make", "cook", "give", "get", "want", "need", "like", "love", "have", "something",
+    "some", "recipe", "recipes", "meal", "meals", "dish", "for", "with", "and", "or", "using",
+    "including", "include", "of", "to", "that", "is", "it", "be", "quick", "easy", "simple",
+    "tonight", "today", "tomorrow", "idea", "ideas", "food", "style", "in", "on", "what", "how",
+    "about", "maybe", "also", "but", "let's", "lets", "cuisine", "diet", "friendly", "dish",
+    "plus", "per", "serving", "up", "at", "most", "than", "less", "under", "below", "max",
+    "maximum", "around", "calories", "calorie", "kcal", "cal", "more", "allergy", "allergies",
+    "im", "i'm", "am", "lots", "lot", "extra", "fresh", "just", "should", "eat", "eating", "suggest",
+}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_CALORIES = re.compile(
+    r"(?:under|less than|below|max(?:imum)?(?: of)?|no more than|at most|up to|around)?\s*"
+    r"(\d{2,4})\s*(?:k?cals?|calories|calorie)\b"
+)
+_NEGATION = re.compile(
+    r"\b(?:allergic to|allergy to|no|without|avoid|avoiding|free of|not any|hold the)\s+"
+    r"([a-z' ]+?)(?=\s+(?:(?:and|or|nor|with|for|but|please)\b|\d)|[,.;!?]|$)"
+)
+# Any way of ruling something out, handled by _NEGATION or not
+_NEGATION_WORD = re.compile(
+    r"\b(?:no|not|don't|dont|doesn't|never|without|avoid|avoiding|except|skip|hold|"
+    r"allergic|allergy|free|hate|dislike|can't|cannot)\b"
+)
+# Further items of a negated list: "without mushrooms, onions or garlic"
+_LIST_SEPARATOR = re.compile(r"\s*,\s*(?:(?:and|or|nor)\s+)?|\s+(?:and|or|nor)\s+")
+_LIST_ITEM = re.compile(
+    r"(?:(?:the|any)\s+)?([a-z' ]+?)(?=\s+(?:(?:and|or|nor|with|for|but|please)\b|\d)|[,.;!?]|$)"
+)
+
+
+def _phrase_pattern(phrases) -> re.Pattern:
+    # Longest phrases first so "sweet potato" wins over "potato"
+    alternatives = sorted(phrases, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(p) for p in alternatives) + r")(?:s|es)?\b")
+
+
+_MEAL_TYPE_PATTERN = _phrase_pattern(MEAL_TYPES)
+_CUISINE_PATTERN = _phrase_pattern(CUISINES)
+_DIET_PATTERN = _phrase_pattern(DIETS)
+_ALLERGEN_PATTERN = _phrase_pattern(ALLERGENS)
+_INGREDIENT_PATTERN = _phrase_pattern(INGREDIENTS)
+
+
+def _negated_spans(text: str, negation: re.Match) -> List[Tuple[int, int]]:
+    """
+    Spans a negation covers: its first item, then every following list item
+    that is only a known ingredient or allergen, so "hold the cheese and
+    tomatoes" excludes both rather than asking for tomatoes.
+    """
+    spans = [(negation.start(1), negation.end(1))]
+    pos = negation.end(1)
+    while True:
+        separator = _LIST_SEPARATOR.match(text, pos)
+        item = separator and _LIST_ITEM.match(text, separator.end())
+        if not item or not any(
+            pattern.fullmatch(text, item.start(1), item.end(1))
+            for pattern in (_ALLERGEN_PATTERN, _INGREDIENT_PATTERN)
+        ):
+            return spans
+        spans.append((item.start(1), item.end(1)))
+        pos = item.end(1)
+
+
+class _Text:
+    """Normalized utterance with per-character bookkeeping of explained spans."""
+
+    def __init__(self, voice_text: str):
+        self.text = re.sub(r"[-_/]", " ", voice_text.lower())
+        self.tokens = [(m.start(), m.end(), m.group(0)) for m in _TOKEN.finditer(self.text)]
+        self.claimed: List[Tuple[int, int]] = []
+
+    def is_claimed(self, start: int, end: int) -> bool:
+        return any(start < c_end and c_start < end for c_start, c_end in self.claimed)
+
+    def claim(self, start: int, end: int) -> None:
+        self.claimed.append((start, end))
+
+    def find(self, pattern: re.Pattern, start: int = 0, end: Optional[int] = None):
+        end = len(self.text) if end is None else end
+        for match in pattern.finditer(self.text, start, end):
+            if not self.is_claimed(match.start(), match.end()):
+                yield match
+
+    def unhandled_negation(self) -> bool:
+        return any(not self.is_claimed(m.start(), m.end()) for m in _NEGATION_WORD.finditer(self.text))
+
+    def confidence(self) -> float:
+        content = [t for t in self.tokens if t[2] not in FILLER]
+        if not content:
+            return 0.0
+        explained = [t for t in content if self.is_claimed(t[0], t[1])]
+        return len(explained) / len(content)
+
+
+def parse_voice_rules(voice_text: str) -> Tuple[Dict[str, Any], float]:
+    """
+    Parse a voice utterance with lexicons and regexes, without any LLM call.
+
+    Args:
+        voice_text: Raw text transcribed from voice input
+
+    Returns:
+        Tuple of (parsed fields matching VoiceInputResponse minus parsed_text,
+        confidence between 0 and 1). Confidence is the share of meaningful
+        words the lexicons could account for.
+    """
+    result, confidence, _ = parse_rules_with_negation(voice_text)
+    return result, confidence
+
+
+def parse_rules_with_negation(voice_text: str) -> Tuple[Dict[str, Any], float, bool]:
+    """
+    Same as parse_voice_rules, plus whether the text rules something out in
+    a way the rules did not understand ("I don't want mushrooms"), in which
+    case the parsed ingredients may include what the user asked to avoid.
+    """
+    text = _Text(voice_text)
+    result: Dict[str, Any] = {
+        "meal_type": None,
+        "include_ingredients": [],
+        "dietary_preferences": [],
+        "allergies": [],
+        "max_calories": None,
+        "cuisine_type": None,
+    }
+
+    for match in _CALORIES.finditer(text.text):
+        result["max_calories"] = int(match.group(1))
+        text.claim(match.start(), match.end())
+        break
+
+    # Diet phrases first so "dairy free" is a preference, not an allergy
+    for match in text.find(_DIET_PATTERN):
+        diet = DIETS[match.group(1)]
+        if diet not in result["dietary_preferences"]:
+            result["dietary_preferences"].append(diet)
+        text.claim(match.start(), match.end())
+
+    allergies: Set[str] = set()
+    for negation in _NEGATION.finditer(text.text):
+        found = False
+        for start, end in _negated_spans(text.text, negation):
+            for pattern, lexicon in ((_ALLERGEN_PATTERN, ALLERGENS), (_INGREDIENT_PATTERN, None)):
+                for match in text.find(pattern, start, end):
+                    value = lexicon[match.group(1)] if lexicon else match.group(0)
+                    if value not in allergies:
+                        allergies.add(value)
+                        result["allergies"].append(value)
+                    text.claim(match.start(), match.end())
+                    found = True
+        if found:
+            text.claim(negation.start(), negation.start(1))
+
+    for match in text.find(_MEAL_TYPE_PATTERN):
+        if result["meal_type"] is None:
+            result["meal_type"] = MEAL_TYPES[match.group(1)]
+            text.claim(match.start(), match.end())
+
+    for match in text.find(_CUISINE_PATTERN):
+        if result["cuisine_type"] is None:
+            result["cuisine_type"] = CUISINES[match.group(1)]
+            text.claim(match.start(), match.end())
+
+    for match in text.find(_INGREDIENT_PATTERN):
+        ingredient = match.group(0)
+        if ingredient not in result["include_ingredients"]:
+            result["include_ingredients"].append(ingredient)
+        text.claim(match.start(), match.end())
+
+    if not any(result.values()):
+        return result, 0.0, text.unhandled_negation()
+    return result, text.confidence(), text.unhandled_negation()
@@ -0,0 +1,94 @@
+# benchmarks/bench_async_throughput.py
+"""
+Measure concurrent throughput of a single uvicorn worker against the fake OpenAI server.
+
+Usage:
+    python -m benchmarks.bench_async_throughput --concurrency 50 --requests 200
+
+Starts the fake upstream and one API worker as subprocesses, fires concurrent
+/find-substitutions requests and probes /docs while the load is running.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from typing import List
+
+import httpx
+
+from benchmarks.harness import start_process, stop_process, wait_ready
+
+
+async def _run_load(api_url: str, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    payload = {"original_ingredient": "heavy cream", "reason": "dairy-free"}
+
+    async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=concurrency + 5)) as client:
+        async def one() -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(f"{api_url}/find-substitutions", json=payload)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        async def probe_docs() -> float:
+            await asyncio.sleep(0.2)
+            start = time.perf_counter()
+            await client.get(f"{api_url}/docs")
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        docs_task = asyncio.create_task(probe_docs())
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        docs_latency = await docs_task
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+        "docs_latency_under_load_ms": round(docs_latency * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Single-worker throughput benchmark")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--api-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["OPENAI_API_KEY"] = "sk-fake"
+    env["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.fake_port}/v1"
+
+    fake = start_process(["-m", "benchmarks.fake_openai_server", "--port", str(args.fake_port),
+                   "--latency-ms", str(args.latency_ms)], env)
+    api = start_process(["-m", "uvicorn", "app.main:app", "--port", str(args.api_port),
+                  "--workers", "1", "--log-level", "warning"], env)
+    try:
+        api_url = f"http://127.0.0.1:{args.api_port}"
+        asyncio.run(wait_ready(f"http://127.0.0.1:{args.fake_port}/docs"))
+        asyncio.run(wait_ready(f"{api_url}/docs"))
+        result = asyncio.run(_run_load(api_url, args.requests, args.concurrency))
+        result["upstream_latency_ms"] = args.latency_ms
+        print(json.dumps(result, indent=2))
+    finally:
+        stop_process(api)
+        stop_process(fake)
+
+
+if __name__ == "__main__":
+    main()
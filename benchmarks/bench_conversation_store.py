@@ -0,0 +1,86 @@
+# benchmarks/bench_conversation_store.py
+"""
+Append and recent-history read latency for the conversation stores.
+
+Usage:
+    python -m benchmarks.bench_conversation_store --sessions 100000 --backend sqlite
+
+Populates the store with the given number of sessions, then times random
+appends and last-N reads (the query the diet coach context builders use).
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+from typing import Callable, Dict, List
+
+from app.services.conversation_store import (
+    ConversationStore,
+    InMemoryConversationStore,
+    SQLiteConversationStore,
+    make_message
+)
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1e6
+    return {"p50_us": round(pick(0.50), 1), "p95_us": round(pick(0.95), 1), "p99_us": round(pick(0.99), 1)}
+
+
+def _time_ops(op: Callable[[int], None], count: int) -> List[float]:
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        op(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(store: ConversationStore, sessions: int, messages_per_session: int, samples: int) -> Dict[str, object]:
+    content = "I want something healthy for dinner with chicken and broccoli, nothing too spicy."
+
+    start = time.perf_counter()
+    for i in range(sessions):
+        for j in range(messages_per_session):
+            store.append(f"user{i}:conv", make_message("user" if j % 2 == 0 else "assistant", content))
+    populate_s = time.perf_counter() - start
+
+    keys = [f"user{random.randrange(sessions)}:conv" for _ in range(samples)]
+    appends = _time_ops(lambda i: store.append(keys[i], make_message("user", content)), samples)
+    reads = _time_ops(lambda i: store.get_history(keys[i], limit=5), samples)
+
+    return {
+        "sessions": sessions,
+        "messages_per_session": messages_per_session,
+        "populate_s": round(populate_s, 2),
+        "append": _percentiles(appends),
+        "read_last_5": _percentiles(reads),
+        "stats": store.stats()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Conversation store latency benchmark")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="sqlite")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--messages-per-session", type=int, default=4)
+    parser.add_argument("--samples", type=int, default=5000)
+    parser.add_argument("--db-path", default=None)
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        path = args.db_path or os.path.join(tempfile.mkdtemp(), "conversations.db")
+        store: ConversationStore = SQLiteConversationStore(path=path, vacuum_interval=0)
+    else:
+        store = InMemoryConversationStore(max_sessions=args.sessions * 2, max_bytes=2 ** 40)
+
+    result = run(store, args.sessions, args.messages_per_session, args.samples)
+    result["backend"] = args.backend
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
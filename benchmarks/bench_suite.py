@@ -0,0 +1,363 @@
+# benchmarks/bench_suite.py
+"""
+End-to-end load benchmark for every endpoint against the fake OpenAI server.
+
+Usage:
+    python -m benchmarks.bench_suite --concurrency 20 --requests 200 --output baseline.json
+    python -m benchmarks.bench_suite --output current.json --compare baseline.json
+
+Starts the fake upstream and one API worker as subprocesses, then drives
+/generate-meal, /meal-reasoning, /find-substitutions, /parse-voice and
+multi-turn /diet-coach conversations in turn. For each scenario it reports
+p50/p95/p99 latency, throughput, errors, upstream calls per request (from
+the fake server's /v1/_stats) and the API worker's resident memory growth.
+
+The report is JSON so runs can be diffed; --compare exits non-zero when a
+scenario's p95 latency or throughput regresses by more than
+--max-regression percent against a previous report.
+
+--record CASSETTE captures every upstream completion of a run; a later run
+with --replay CASSETTE answers them from the file instead of the fake
+server, with the recorded latencies, so a new build can be measured
+against byte-identical model output. Requests that were not recorded fail.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.harness import latency_summary, rss_kb, start_process, stop_process, wait_ready
+
+_INGREDIENTS = ["heavy cream", "butter", "eggs", "white rice", "pasta", "sour cream", "bacon", "sugar", "flour", "milk"]
+_REASONS = ["dairy-free", "vegan", "lower calorie", "gluten-free", "low sodium"]
+_MEAL_TYPES = ["breakfast", "lunch", "dinner", "snack"]
+_DIETS = [["vegetarian"], ["high-protein"], ["keto"], ["pre-diabetic"], []]
+_CUISINES = ["Mediterranean", "Mexican", "Japanese", "Indian", None]
+
+# Rule-parseable utterances mixed with ones that need the LLM
+_VOICE = [
+    "vegetarian dinner with rice and beans",
+    "quick gluten-free breakfast under 400 calories",
+    "something my kids would like that isn't too spicy and uses the leftover roast",
+    "mexican lunch with chicken, no dairy",
+    "uh I dunno, whatever is healthy I guess but I hate mushrooms",
+]
+
+_COACH_TURNS = [
+    "I want a healthy dinner with chicken",
+    "Can you make it dairy-free?",
+    "What's a good substitute for butter in that?",
+    "How much protein does it have?",
+    "Thanks! Something lighter for lunch tomorrow?",
+    "Make it vegetarian please",
+]
+
+
+def _meal_payload(i: int) -> Dict[str, Any]:
+    return {
+        "meal_type": _MEAL_TYPES[i % len(_MEAL_TYPES)],
+        "dietary_preferences": _DIETS[i % len(_DIETS)],
+        "include_ingredients": [_INGREDIENTS[i % len(_INGREDIENTS)]],
+        "cuisine_type": _CUISINES[i % len(_CUISINES)],
+        "max_calories": 300 + (i % 50) * 10
+    }
+
+
+def _reasoning_payload(i: int) -> Dict[str, Any]:
+    return {
+        "meal_name": f"Test Meal {i}",
+        "ingredients": ["150g chicken breast", "1 cup broccoli", _INGREDIENTS[i % len(_INGREDIENTS)]],
+        "dietary_preferences": _DIETS[i % len(_DIETS)]
+    }
+
+
+def _substitution_payload(i: int) -> Dict[str, Any]:
+    return {
+        "original_ingredient": f"{_INGREDIENTS[i % len(_INGREDIENTS)]} {i // len(_INGREDIENTS)}",
+        "reason": _REASONS[i % len(_REASONS)],
+        "recipe_context": "weeknight dinner"
+    }
+
+
+def _voice_payload(i: int) -> Dict[str, Any]:
+    return {"voice_text": f"{_VOICE[i % len(_VOICE)]} {'please ' * (i // len(_VOICE) % 3)}".strip()}
+
+
+# name -> (path, payload factory); diet coach is handled separately as conversations
+SCENARIOS: Dict[str, Any] = {
+    "generate_meal": ("/generate-meal", _meal_payload),
+    "meal_reasoning": ("/meal-reasoning", _reasoning_payload),
+    "find_substitutions": ("/find-substitutions", _substitution_payload),
+    "parse_voice": ("/parse-voice", _voice_payload),
+    "diet_coach": ("/diet-coach", None),
+}
+
+
+async def _fake_stats(client: httpx.AsyncClient, fake_url: str) -> Dict[str, Any]:
+    response = await client.get(f"{fake_url}/v1/_stats")
+    return response.json()
+
+
+async def _run_requests(
+    client: httpx.AsyncClient,
+    api_url: str,
+    path: str,
+    payload: Callable[[int], Dict[str, Any]],
+    total: int,
+    concurrency: int,
+    distinct: int,
+    offset: int
+) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        body = payload(offset + (i % distinct if distinct else i))
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{api_url}{path}", json=body)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return {"elapsed": time.perf_counter() - start, "latencies": latencies, "errors": errors, "requests": total}
+
+
+async def _run_conversations(
+    client: httpx.AsyncClient,
+    api_url: str,
+    total: int,
+    concurrency: int,
+    turns: int,
+    offset: int
+) -> Dict[str, Any]:
+    """total is the number of turns; each conversation runs its turns in order."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    conversations = max(1, total // turns)
+
+    async def conversation(c: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            conversation_id = None
+            user_id = f"bench-user-{offset + c}"
+            for turn in range(turns):
+                body = {"message": _COACH_TURNS[turn % len(_COACH_TURNS)], "user_id": user_id}
+                if conversation_id:
+                    body["conversation_id"] = conversation_id
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"{api_url}/diet-coach", json=body)
+                    if response.status_code == 200:
+                        conversation_id = response.json().get("conversation_id")
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(conversation(c) for c in range(conversations)))
+    return {
+        "elapsed": time.perf_counter() - start,
+        "latencies": latencies,
+        "errors": errors,
+        "requests": conversations * turns
+    }
+
+
+async def run_suite(
+    api_url: str,
+    fake_url: str,
+    api_pid: int,
+    scenarios: List[str],
+    total: int,
+    concurrency: int,
+    distinct: int,
+    turns: int,
+    warmup: int
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=concurrency + 5)
+    async with httpx.AsyncClient(timeout=120.0, limits=limits) as client:
+        for index, name in enumerate(scenarios):
+            path, payload = SCENARIOS[name]
+            # Offsets keep warm-up and measured inputs (and scenarios) apart
+            offset = (index + 1) * 1_000_000
+
+            if name == "diet_coach":
+                await _run_conversations(client, api_url, warmup * turns, concurrency, turns, offset - 100_000)
+            else:
+                await _run_requests(client, api_url, path, payload, warmup, concurrency, 0, offset - 100_000)
+
+            upstream_before = await _fake_stats(client, fake_url)
+            rss_before = rss_kb(api_pid)
+            if name == "diet_coach":
+                run = await _run_conversations(client, api_url, total, concurrency, turns, offset)
+            else:
+                run = await _run_requests(client, api_url, path, payload, total, concurrency, distinct, offset)
+            rss_after = rss_kb(api_pid)
+            upstream_after = await _fake_stats(client, fake_url)
+
+            upstream_calls = {
+                kind: count - upstream_before["requests"].get(kind, 0)
+                for kind, count in upstream_after["requests"].items()
+                if count - upstream_before["requests"].get(kind, 0)
+            }
+            completion_tokens = (
+                upstream_after["tokens"]["completion_tokens"] - upstream_before["tokens"]["completion_tokens"]
+            )
+            results[name] = {
+                "requests": run["requests"],
+                "errors": run["errors"],
+                "elapsed_s": round(run["elapsed"], 3),
+                "throughput_rps": round(run["requests"] / run["elapsed"], 2) if run["elapsed"] else 0.0,
+                **latency_summary(run["latencies"]),
+                "upstream_calls": upstream_calls,
+                "upstream_calls_per_request": round(sum(upstream_calls.values()) / run["requests"], 3),
+                "completion_tokens_per_request": round(completion_tokens / run["requests"], 1),
+                "rss_before_kb": rss_before,
+                "rss_after_kb": rss_after,
+                "rss_growth_kb": rss_after - rss_before if rss_before and rss_after else None
+            }
+            print(f"{name}: p50 {results[name]['p50_ms']} ms, p95 {results[name]['p95_ms']} ms, "
+                  f"{results[name]['throughput_rps']} req/s", file=sys.stderr)
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Return a line per scenario whose p95 or throughput regressed beyond max_regression percent."""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        if before["p95_ms"] and (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 > max_regression:
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+        if before["throughput_rps"] and (before["throughput_rps"] - now["throughput_rps"]) / before["throughput_rps"] * 100 > max_regression:
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end DietDraft benchmark suite")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of scenarios")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests (or coach turns) per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct payloads per scenario; 0 makes every request unique")
+    parser.add_argument("--turns", type=int, default=4, help="Turns per diet coach conversation")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--latency-dist", default="lognormal", choices=["fixed", "uniform", "lognormal", "exponential"])
+    parser.add_argument("--latency-jitter", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of upstream requests the fake fails")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--api-port", type=int, default=8100)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--compare", default=None, help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Allowed regression in percent")
+    parser.add_argument("--record", default=None, metavar="CASSETTE", help="Record upstream traffic to this cassette file")
+    parser.add_argument("--replay", default=None, metavar="CASSETTE", help="Serve upstream traffic from this cassette file")
+    parser.add_argument("--replay-latency", default="recorded", help="Cassette replay latency: none, recorded or milliseconds")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+
+    env = dict(os.environ)
+    env["OPENAI_API_KEY"] = "sk-fake"
+    env["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.fake_port}/v1"
+    if args.record or args.replay:
+        env["LLM_CASSETTE_MODE"] = "record" if args.record else "replay"
+        env["LLM_CASSETTE_PATH"] = args.record or args.replay
+        env["LLM_CASSETTE_REPLAY_LATENCY"] = args.replay_latency
+
+    fake = start_process([
+        "-m", "benchmarks.fake_openai_server", "--port", str(args.fake_port),
+        "--latency-ms", str(args.latency_ms), "--latency-dist", args.latency_dist,
+        "--latency-jitter", str(args.latency_jitter), "--tokens-per-second", str(args.tokens_per_second),
+        "--seed", str(args.seed), "--error-rate", str(args.error_rate), "--error-status", str(args.error_status)
+    ], env)
+    api = start_process(["-m", "uvicorn", "app.main:app", "--port", str(args.api_port),
+                         "--workers", "1", "--log-level", "warning"], env)
+    try:
+        api_url = f"http://127.0.0.1:{args.api_port}"
+        fake_url = f"http://127.0.0.1:{args.fake_port}"
+        asyncio.run(wait_ready(f"{fake_url}/docs"))
+        asyncio.run(wait_ready(f"{api_url}/docs"))
+        results = asyncio.run(run_suite(
+            api_url, fake_url, api.pid, scenarios, args.requests,
+            args.concurrency, args.distinct, args.turns, args.warmup
+        ))
+    finally:
+        stop_process(api)
+        stop_process(fake)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "distinct": args.distinct,
+            "turns": args.turns,
+            "latency_ms": args.latency_ms,
+            "latency_dist": args.latency_dist,
+            "latency_jitter": args.latency_jitter,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+            "error_status": args.error_status,
+            "cassette": {"mode": env.get("LLM_CASSETTE_MODE", "off"), "path": env.get("LLM_CASSETTE_PATH")}
+        },
+        "scenarios": results
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/eval_intent_classifier.py
+"""
+Offline evaluation of the local intent classifier against the LLM.
+
+Usage:
+    python -m benchmarks.eval_intent_classifier [--messages benchmarks/data/intent_eval_messages.txt]
+
+Runs every message through the local classifier and through the LLM
+intent analysis (set OPENAI_BASE_URL to use the fake server), then reports
+intent and tool agreement, the share of turns the local classifier would
+answer on its own, and the latency that saves. --dump-labels writes the
+LLM's answers as JSONL for retraining with train_intent_classifier.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from typing import Any, Dict, List
+
+from app.services.diet_coach_services import LOCAL_INTENT_CONFIDENCE_THRESHOLD, analyze_user_intent_with_context
+from app.services.intent_classifier import classify_intent
+from app.services.llm_client import resolve_api_key
+
+
+async def evaluate(messages: List[str], api_key: str, threshold: float) -> Dict[str, Any]:
+    rows = []
+    for message in messages:
+        history = [{"role": "user", "content": message}]
+
+        start = time.perf_counter()
+        local = classify_intent(message, history)
+        local_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        remote = await analyze_user_intent_with_context(message, history, api_key, use_local_classifier=False)
+        remote_s = time.perf_counter() - start
+
+        rows.append({
+            "message": message,
+            "local_intent": local["intent"],
+            "local_tools": sorted(local["tools_needed"]),
+            "confidence": local["confidence"],
+            "intent": remote.get("intent"),
+            "tools": sorted(remote.get("tools_needed", [])),
+            "local_s": local_s,
+            "remote_s": remote_s
+        })
+
+    answered = [r for r in rows if r["confidence"] >= threshold]
+    agree = lambda subset, field, other: (
+        round(sum(r[field] == r[other] for r in subset) / len(subset), 3) if subset else None
+    )
+    mean_remote_ms = sum(r["remote_s"] for r in rows) / len(rows) * 1000
+    return {
+        "messages": len(rows),
+        "threshold": threshold,
+        "answered_locally": len(answered),
+        "answered_locally_ratio": round(len(answered) / len(rows), 3),
+        "intent_agreement_all": agree(rows, "local_intent", "intent"),
+        "intent_agreement_answered": agree(answered, "local_intent", "intent"),
+        "tools_agreement_answered": agree(answered, "local_tools", "tools"),
+        "mean_local_us": round(sum(r["local_s"] for r in rows) / len(rows) * 1e6, 1),
+        "mean_llm_ms": round(mean_remote_ms, 1),
+        "mean_saved_ms_per_turn": round(len(answered) / len(rows) * mean_remote_ms, 1),
+        "disagreements": [
+            {k: r[k] for k in ("message", "local_intent", "confidence", "intent")}
+            for r in answered if r["local_intent"] != r["intent"]
+        ],
+        "rows": rows
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluate the local intent classifier against the LLM")
+    parser.add_argument("--messages", default=os.path.join(os.path.dirname(__file__), "data", "intent_eval_messages.txt"))
+    parser.add_argument("--threshold", type=float, default=LOCAL_INTENT_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--dump-labels", default=None, help="Write LLM labels as JSONL to this path")
+    args = parser.parse_args()
+
+    with open(args.messages) as f:
+        messages = [line.strip() for line in f if line.strip()]
+
+    report = asyncio.run(evaluate(messages, resolve_api_key(), args.threshold))
+
+    if args.dump_labels:
+        with open(args.dump_labels, "w") as f:
+            for row in report["rows"]:
+                f.write(json.dumps({"message": row["message"], "intent": row["intent"]}) + "\n")
+
+    report.pop("rows")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
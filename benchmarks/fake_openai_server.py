@@ -0,0 +1,309 @@
+# benchmarks/fake_openai_server.py
+"""
+Local OpenAI-compatible stub for benchmarking DietDraft without real API calls.
+
+Run standalone:
+    python -m benchmarks.fake_openai_server --port 9100 --latency-ms 500
+
+Then point the API at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1.
+
+Latency can follow a distribution (--latency-dist lognormal --latency-jitter 0.5)
+and replies can take time proportional to their length (--tokens-per-second 50).
+--error-rate 0.2 --error-status 429 fails that fraction of requests, to
+exercise retries and circuit breaking.
+GET /v1/_stats reports upstream requests per prompt type and tokens served.
+"""
+import os
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Canned JSON bodies per prompt type, matched against the system prompt
+CANNED_RESPONSES = {
+    "nutritionist and chef": {
+        "meal_name": "Lemon Herb Chicken Bowl",
+        "ingredients": ["150g chicken breast", "1 cup broccoli", "1/2 cup brown rice"],
+        "instructions": "Season the chicken, roast for 20 minutes, steam the broccoli and serve over rice.",
+        "estimated_calories": 450,
+        "dietary_info": "High in protein and fiber."
+    },
+    "culinary expert": {
+        "substitutions": [
+            {"ingredient": "coconut cream", "notes": "Use same amount."},
+            {"ingredient": "cashew cream", "notes": "Blend 1 cup cashews with 1 cup water."}
+        ]
+    },
+    "concise, evidence-based": {
+        "key_ingredient_choices": "Chicken provides lean protein.",
+        "nutritional_benefits": "Balanced macronutrients with fiber.",
+        "dietary_alignment": "Fits a high-protein plan."
+    },
+    "parses voice commands": {
+        "meal_type": "dinner",
+        "include_ingredients": ["rice", "beans"],
+        "dietary_preferences": ["vegetarian"],
+        "allergies": [],
+        "max_calories": None,
+        "cuisine_type": None
+    },
+    "intent analysis": {
+        "intent": "generate_recipe",
+        "tools_needed": ["generate_meal"],
+        "extracted_info": {"ingredients": ["chicken"], "meal_type": "dinner"},
+        "confidence": 0.9,
+        "context_understanding": "User wants a chicken dinner"
+    },
+}
+
+# Meal replies rotate through distinct dishes so plan de-duplication can be exercised
+_PROTEINS = ["chicken breast", "tofu", "salmon", "lentils", "turkey", "chickpeas", "eggs"]
+_SIDES = ["broccoli", "spinach", "bell peppers", "zucchini", "kale", "carrots", "green beans"]
+_STYLES = ["Bowl", "Skillet", "Salad"]
+_meal_counter = itertools.count()
+
+COACH_TEXT = "Here's a balanced dinner idea for you. Let me know if you'd like any swaps!"
+
+
+# Short names for the prompt types, used in /v1/_stats
+PROMPT_KINDS = {
+    "nutritionist and chef": "meal",
+    "culinary expert": "substitution",
+    "concise, evidence-based": "reasoning",
+    "parses voice commands": "voice",
+    "intent analysis": "intent",
+}
+
+
+def _pick_content(messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """Choose a canned reply based on the system prompt; returns (kind, content)."""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if "numbered list of ingredients" in system:
+        user = " ".join(m.get("content", "") for m in messages if m.get("role") == "user")
+        numbers = re.findall(r"^\s*(\d+)\. ", user, flags=re.MULTILINE)
+        canned = CANNED_RESPONSES["culinary expert"]
+        return "substitution_batch", json.dumps({"results": {number: canned for number in numbers}})
+    for marker, body in CANNED_RESPONSES.items():
+        if marker in system:
+            if marker == "nutritionist and chef":
+                body = _rotating_meal(body)
+                user = " ".join(m.get("content", "") for m in messages if m.get("role") == "user")
+                if '"reasoning"' in user:
+                    # Combined meal and reasoning mode
+                    body["reasoning"] = CANNED_RESPONSES["concise, evidence-based"]
+            return PROMPT_KINDS[marker], json.dumps(body)
+    if "running summaries" in system:
+        return "summary", "User wants healthy high-protein dinners and has asked about chicken and tofu."
+    return "coach", COACH_TEXT
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class LatencyModel:
+    """
+    Samples upstream latency and token generation time.
+
+    Distributions (latency_ms is the median):
+    - fixed: always latency_ms
+    - uniform: latency_ms * (1 +/- jitter)
+    - lognormal: heavy right tail, jitter is sigma (0.5 gives p99 around 3x median)
+    - exponential: memoryless, mean latency_ms
+    tokens_per_second > 0 adds generation time proportional to the reply length.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 500.0,
+        dist: str = "fixed",
+        jitter: float = 0.0,
+        tokens_per_second: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        if dist not in ("fixed", "uniform", "lognormal", "exponential"):
+            raise ValueError(f"Unknown latency distribution: {dist}")
+        self.latency_ms = latency_ms
+        self.dist = dist
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self._random = random.Random(seed)
+
+    def first_token_delay(self) -> float:
+        if self.dist == "uniform":
+            value = self.latency_ms * (1 + self._random.uniform(-self.jitter, self.jitter))
+        elif self.dist == "lognormal":
+            value = self.latency_ms * math.exp(self._random.gauss(0.0, self.jitter))
+        elif self.dist == "exponential":
+            value = self._random.expovariate(1.0 / self.latency_ms) if self.latency_ms > 0 else 0.0
+        else:
+            value = self.latency_ms
+        return max(0.0, value) / 1000.0
+
+    def generation_time(self, tokens: int) -> float:
+        return tokens / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+def _rotating_meal(base: Dict[str, Any]) -> Dict[str, Any]:
+    """Vary the canned meal: 21 distinct dishes before names repeat."""
+    index = next(_meal_counter) % 21
+    protein = _PROTEINS[index % 7]
+    side = _SIDES[(index * 3) % 7]
+    style = _STYLES[index // 7]
+    return dict(
+        base,
+        meal_name=f"{protein.title()} and {side.title()} {style}",
+        ingredients=[f"150g {protein}", f"1 cup {side}", "1 tbsp olive oil"]
+    )
+
+
+def _stream_chunks(model: str, content: str, chunk_chars: int, chunk_delay: float, usage: Dict[str, int]):
+    """Yield SSE chunks in the OpenAI streaming format, ending with a usage chunk."""
+    async def generate():
+        for start in range(0, len(content), chunk_chars):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": content[start:start + chunk_chars]},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(chunk_delay)
+        final = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            "usage": usage
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+    return generate()
+
+
+def create_app(
+    latency_ms: float = 500.0,
+    chunk_delay_ms: float = 20.0,
+    latency_dist: str = "fixed",
+    latency_jitter: float = 0.0,
+    tokens_per_second: float = 0.0,
+    seed: Optional[int] = None,
+    error_rate: float = 0.0,
+    error_status: int = 500
+) -> FastAPI:
+    """
+    Build the stub app.
+
+    Without tokens_per_second, streamed chunks are spaced chunk_delay_ms
+    apart and non-streamed replies arrive after the sampled latency only.
+    A fraction error_rate of requests fail with error_status instead.
+    """
+    app = FastAPI(title="Fake OpenAI")
+    latency = LatencyModel(latency_ms, latency_dist, latency_jitter, tokens_per_second, seed)
+    request_counts: Dict[str, int] = {}
+    token_counts = {"prompt_tokens": 0, "completion_tokens": 0}
+    error_rng = random.Random(seed)
+    error_count = {"errors": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        kind, content = _pick_content(messages)
+        model = body.get("model", "gpt-3.5-turbo")
+
+        prompt_tokens = _estimate_tokens(" ".join(str(m.get("content", "")) for m in messages))
+        completion_tokens = _estimate_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        request_counts[kind] = request_counts.get(kind, 0) + 1
+        token_counts["prompt_tokens"] += prompt_tokens
+        token_counts["completion_tokens"] += completion_tokens
+
+        await asyncio.sleep(latency.first_token_delay())
+        if error_rate > 0 and error_rng.random() < error_rate:
+            error_count["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "fake_error", "code": error_status}},
+                status_code=error_status,
+                headers={"retry-after": "0"} if error_status == 429 else None
+            )
+        if body.get("stream"):
+            chunk_chars = 8
+            if tokens_per_second > 0:
+                chunk_delay = latency.generation_time(_estimate_tokens("x" * chunk_chars))
+            else:
+                chunk_delay = chunk_delay_ms / 1000.0
+            return StreamingResponse(
+                _stream_chunks(model, content, chunk_chars, chunk_delay, usage),
+                media_type="text/event-stream"
+            )
+
+        await asyncio.sleep(latency.generation_time(completion_tokens))
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model", "owned_by": "fake"}]}
+
+    @app.get("/v1/_stats")
+    async def stats():
+        """Upstream requests by prompt type and tokens served, for benchmark reports."""
+        return {"requests": dict(request_counts), "tokens": dict(token_counts), "errors": error_count["errors"]}
+
+    return app
+
+
+app = create_app(float(os.getenv("FAKE_OPENAI_LATENCY_MS", "500")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local fake OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Median time to first token")
+    parser.add_argument("--latency-dist", default="fixed", choices=["fixed", "uniform", "lognormal", "exponential"])
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Spread for uniform, sigma for lognormal")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Generation speed; 0 disables")
+    parser.add_argument("--chunk-delay-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status for injected failures")
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(
+            args.latency_ms, args.chunk_delay_ms, args.latency_dist,
+            args.latency_jitter, args.tokens_per_second, args.seed,
+            args.error_rate, args.error_status
+        ),
+        host=args.host, port=args.port, log_level="warning"
+    )
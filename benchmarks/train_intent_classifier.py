@@ -0,0 +1,186 @@
+# benchmarks/train_intent_classifier.py
+"""
+Train the local intent classifier and write app/services/data/intent_model.json.
+
+Usage:
+    python -m benchmarks.train_intent_classifier [--data benchmarks/data/intent_train.jsonl]
+
+Without --data the model is trained on a template-generated seed corpus.
+Labelled production traffic (one {"message", "intent"} object per line,
+for example produced by eval_intent_classifier --dump-labels) can be
+passed instead to retrain on real phrasing. Pure Python, no numpy needed.
+"""
+import os
+import json
+import math
+import random
+import argparse
+from typing import Dict, List, Tuple
+
+from app.services.intent_classifier import MODEL_PATH, tokenize
+
+INGREDIENTS = ["chicken", "salmon", "tofu", "rice", "quinoa", "broccoli", "spinach", "beef", "eggs",
+               "lentils", "pasta", "sweet potato", "chickpeas", "shrimp", "oats", "avocado"]
+SWAPPABLE = ["butter", "heavy cream", "eggs", "milk", "sugar", "flour", "sour cream", "cheese",
+             "mayonnaise", "white rice", "soy sauce", "peanut butter", "honey", "bacon"]
+DIETS = ["vegan", "dairy-free", "gluten-free", "keto", "low-carb", "vegetarian", "paleo", "high-protein"]
+MEALS = ["breakfast", "lunch", "dinner", "snack", "dessert"]
+
+TEMPLATES = {
+    "generate_recipe": [
+        "give me a {diet} {meal} with {ing}",
+        "i want something healthy for {meal} with {ing}",
+        "can you make me a {meal} using {ing} and {ing2}",
+        "suggest a {diet} recipe with {ing}",
+        "what should i cook for {meal} tonight",
+        "i need a quick {meal} idea",
+        "recipe for a {diet} {meal} please",
+        "make a {meal} with {ing} under 500 calories",
+        "any ideas for a {diet} {meal}",
+        "i'd like a {meal} that has {ing} in it",
+        "cook something with {ing} and {ing2} for {meal}",
+        "plan me a {diet} {meal}",
+    ],
+    "find_substitutions": [
+        "what can i use instead of {swap}",
+        "substitute {swap} for something {diet}",
+        "i need a {diet} replacement for {swap}",
+        "how do i replace {swap} in baking",
+        "what's a good {swap} substitute",
+        "swap out the {swap}, i'm {diet}",
+        "alternatives to {swap} that are {diet}",
+        "i ran out of {swap}, what else works",
+        "can i replace {swap} with something healthier",
+        "is there a {diet} alternative for {swap}",
+    ],
+    "analyze_nutrition": [
+        "how many calories are in {ing}",
+        "is {ing} healthy",
+        "what are the nutritional benefits of {ing}",
+        "how much protein is in {ing}",
+        "tell me the macros for {ing} and {ing2}",
+        "is a {diet} diet good for weight loss",
+        "how healthy is {ing} for {meal}",
+        "what nutrients does {ing} have",
+        "does {ing} have a lot of carbs",
+        "explain the nutrition of {ing}",
+    ],
+    "general_question": [
+        "how much water should i drink a day",
+        "what is intermittent fasting",
+        "hi there",
+        "thanks for the help",
+        "how do i stay motivated to eat well",
+        "what does {diet} mean",
+        "can you help me lose weight",
+        "hello coach",
+        "what time should i stop eating at night",
+        "how often should i eat snacks",
+        "is it ok to skip breakfast",
+        "what are good habits for meal prep",
+    ],
+    "follow_up": [
+        "can you make it {diet}",
+        "make that one {diet} instead",
+        "what about a {diet} version of that",
+        "can i have another one",
+        "can you do it without {ing}",
+        "same thing but for {meal}",
+        "i don't like that, give me something else",
+        "use {ing} instead",
+        "make it spicier",
+        "can you explain that recipe again",
+    ],
+}
+
+
+def generate_seed_corpus(per_template: int = 6, seed: int = 7) -> List[Tuple[str, str]]:
+    """Fill each template with random lexicon values."""
+    rng = random.Random(seed)
+    rows = []
+    for intent, templates in TEMPLATES.items():
+        for template in templates:
+            for _ in range(per_template):
+                ing, ing2 = rng.sample(INGREDIENTS, 2)
+                rows.append((template.format(
+                    ing=ing, ing2=ing2, swap=rng.choice(SWAPPABLE),
+                    diet=rng.choice(DIETS), meal=rng.choice(MEALS)
+                ), intent))
+    return rows
+
+
+def train(rows: List[Tuple[str, str]], epochs: int = 200, lr: float = 0.5, l2: float = 1e-4, min_df: int = 2) -> Dict:
+    """Fit multinomial logistic regression on TF-IDF features with batch gradient descent."""
+    classes = sorted({intent for _, intent in rows})
+    doc_freq: Dict[str, int] = {}
+    for text, _ in rows:
+        for token in set(tokenize(text)):
+            doc_freq[token] = doc_freq.get(token, 0) + 1
+    n_docs = len(rows)
+    idf = {t: math.log((1 + n_docs) / (1 + df)) + 1.0 for t, df in doc_freq.items() if df >= min_df}
+
+    def vectorize(text: str) -> Dict[str, float]:
+        counts: Dict[str, float] = {}
+        for token in tokenize(text):
+            if token in idf:
+                counts[token] = counts.get(token, 0.0) + 1.0
+        vector = {t: c * idf[t] for t, c in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {t: v / norm for t, v in vector.items()}
+
+    data = [(vectorize(text), classes.index(intent)) for text, intent in rows]
+    weights = [dict.fromkeys(idf, 0.0) for _ in classes]
+    bias = [0.0] * len(classes)
+
+    for _ in range(epochs):
+        grad_w = [dict() for _ in classes]
+        grad_b = [0.0] * len(classes)
+        for vector, label in data:
+            scores = [bias[k] + sum(weights[k][t] * v for t, v in vector.items()) for k in range(len(classes))]
+            top = max(scores)
+            exp = [math.exp(s - top) for s in scores]
+            total = sum(exp)
+            for k in range(len(classes)):
+                error = exp[k] / total - (1.0 if k == label else 0.0)
+                grad_b[k] += error
+                for t, v in vector.items():
+                    grad_w[k][t] = grad_w[k].get(t, 0.0) + error * v
+        for k in range(len(classes)):
+            bias[k] -= lr * grad_b[k] / n_docs
+            for t in weights[k]:
+                weights[k][t] -= lr * (grad_w[k].get(t, 0.0) / n_docs + l2 * weights[k][t])
+
+    return {
+        "classes": classes,
+        "idf": {t: round(v, 5) for t, v in idf.items()},
+        "weights": {
+            label: {t: round(w, 5) for t, w in weights[k].items() if abs(w) >= 1e-3}
+            for k, label in enumerate(classes)
+        },
+        "bias": {label: round(bias[k], 5) for k, label in enumerate(classes)},
+        "training_examples": n_docs
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the local intent classifier")
+    parser.add_argument("--data", default=None, help="JSONL file with message/intent pairs")
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--epochs", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.data:
+        with open(args.data) as f:
+            rows = [(row["message"], row["intent"]) for row in map(json.loads, f) if row.get("intent")]
+    else:
+        rows = generate_seed_corpus()
+
+    model = train(rows, epochs=args.epochs)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(model, f, separators=(",", ":"), sort_keys=True)
+    print(f"Trained on {len(rows)} examples, {len(model['idf'])} features -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
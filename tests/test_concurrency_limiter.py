@@ -0,0 +1,94 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.services.concurrency_limiter import AdaptiveConcurrencyLimiter, UpstreamOverloadedError
+from app.services.deadline import DeadlineExceededError, deadline_scope
+
+
+async def _hold(limiter, release, started=None):
+    async with limiter.slot(priority=1):
+        if started is not None:
+            started.set()
+        await release.wait()
+
+
+def test_calls_over_the_limit_queue_in_priority_order():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1)
+    order = []
+
+    async def call(priority):
+        async with limiter.slot(priority=priority):
+            order.append(priority)
+
+    async def main():
+        release, started = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release, started))
+        await started.wait()
+        waiters = [asyncio.create_task(call(p)) for p in (3, 0, 2, 1)]
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["queued"] == 4
+        release.set()
+        await asyncio.gather(holder, *waiters)
+
+    asyncio.run(main())
+    assert order == [0, 1, 2, 3]
+
+
+def test_full_queue_sheds_with_retry_after():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_queue=1)
+
+    async def main():
+        release, started = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release, started))
+        await started.wait()
+        queued = asyncio.create_task(_hold(limiter, release))
+        await asyncio.sleep(0.01)
+        with pytest.raises(UpstreamOverloadedError) as error:
+            async with limiter.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, queued)
+        return error.value
+
+    error = asyncio.run(main())
+    assert error.retry_after >= 1
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_queue_wait_is_bounded():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=1, min_limit=1, max_wait=0.02)
+
+    async def main():
+        release, started = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(_hold(limiter, release, started))
+        await started.wait()
+        with pytest.raises(UpstreamOverloadedError):
+            async with limiter.slot():
+                pass
+        # A request deadline shorter than max_wait is reported as the deadline
+        limiter.max_wait = 5.0
+        with deadline_scope(0.02), pytest.raises(DeadlineExceededError):
+            async with limiter.slot():
+                pass
+        release.set()
+        await holder
+
+    asyncio.run(main())
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["queued"] == 0
+
+
+def test_overload_cuts_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=10, backoff=0.5)
+    request = httpx.Request("POST", "https://example.invalid")
+
+    async def main():
+        with pytest.raises(openai.APITimeoutError):
+            async with limiter.slot():
+                raise openai.APITimeoutError(request)
+
+    asyncio.run(main())
+    assert limiter.limit == 5
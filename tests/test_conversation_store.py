@@ -0,0 +1,88 @@
+from app.services.conversation_store import InMemoryConversationStore, SQLiteConversationStore, make_message
+
+
+def _append(store, key, *contents):
+    for content in contents:
+        store.append(key, make_message("user", content))
+
+
+def _contents(history):
+    return [message["content"] for message in history]
+
+
+def test_least_recently_used_session_is_evicted():
+    store = InMemoryConversationStore(max_sessions=2)
+    _append(store, "a", "1")
+    _append(store, "b", "2")
+    store.get_history("a")
+    _append(store, "c", "3")
+    assert store.get_history("b") is None
+    assert _contents(store.get_history("a")) == ["1"]
+    assert store.stats()["evictions"]["capacity"] == 1
+
+
+def test_message_cap_drops_oldest():
+    store = InMemoryConversationStore(max_messages=3)
+    _append(store, "a", "1", "2", "3", "4")
+    assert _contents(store.get_history("a")) == ["2", "3", "4"]
+
+
+def test_byte_budget_evicts_whole_sessions():
+    store = InMemoryConversationStore(max_bytes=400)
+    _append(store, "a", "x" * 150)
+    _append(store, "b", "y" * 150)
+    _append(store, "c", "z" * 150)
+    assert store.get_history("a") is None
+    assert store.stats()["resident_bytes"] <= 400
+
+
+def test_idle_sessions_expire():
+    store = InMemoryConversationStore(ttl_seconds=60)
+    _append(store, "old", "1")
+    _append(store, "new", "2")
+    store._sessions["old"].last_access -= 120
+    assert store.get_history("old") is None
+    assert _contents(store.get_history("new")) == ["2"]
+    assert store.stats()["evictions"]["ttl"] == 1
+
+
+def test_message_ids_increase():
+    store = InMemoryConversationStore()
+    _append(store, "a", "1", "2")
+    first, second = store.get_history("a")
+    assert first["id"] < second["id"]
+
+
+def test_sqlite_expired_session_starts_over(tmp_path):
+    store = SQLiteConversationStore(str(tmp_path / "c.db"), ttl_seconds=60, vacuum_interval=0)
+    _append(store, "a", "1")
+    store.set_summary("a", {"text": "old", "through": 1})
+    store._connect().execute("UPDATE sessions SET last_access = last_access - 120")
+    assert store.get_history("a") is None
+    assert store.get_summary("a") is None
+    _append(store, "a", "2")
+    assert _contents(store.get_history("a")) == ["2"]
+    assert store.get_summary("a") is None
+
+
+def test_sqlite_vacuum_removes_expired_sessions(tmp_path):
+    store = SQLiteConversationStore(str(tmp_path / "c.db"), ttl_seconds=60, vacuum_interval=0, vacuum_batch=2)
+    for key in "abcde":
+        _append(store, key, "old")
+    store._connect().execute("UPDATE sessions SET last_access = last_access - 120")
+    _append(store, "live", "new")
+    assert store.vacuum() == 5
+    assert store.stats()["sessions"] == 1
+    assert store.stats()["messages"] == 1
+
+
+def test_older_summary_does_not_replace_newer(tmp_path):
+    for store in (
+        InMemoryConversationStore(),
+        SQLiteConversationStore(str(tmp_path / "c.db"), vacuum_interval=0)
+    ):
+        _append(store, "a", "1", "2", "3")
+        ids = [message["id"] for message in store.get_history("a")]
+        store.set_summary("a", {"text": "newer", "through": ids[2]})
+        store.set_summary("a", {"text": "older", "through": ids[0]})
+        assert store.get_summary("a")["text"] == "newer"
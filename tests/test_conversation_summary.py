@@ -0,0 +1,33 @@
+from app.services import conversation_summary
+from app.services.conversation_summary import build_conversation_context
+
+
+def _history(count):
+    history = [
+        {"id": n, "role": "user" if n % 2 else "assistant", "content": f"message {n}"}
+        for n in range(1, count + 1)
+    ]
+    return history + [{"id": count + 1, "role": "user", "content": "current"}]
+
+
+def test_messages_not_yet_summarized_are_included():
+    context = build_conversation_context(_history(8), {"text": "Likes fish.", "through": 2}, 1000)
+    assert "Likes fish." in context
+    assert "message 2\n" not in context
+    for n in range(3, 9):
+        assert f"message {n}" in context
+    assert "current" not in context
+
+
+def test_zero_recent_messages_still_includes_the_gap(monkeypatch):
+    monkeypatch.setattr(conversation_summary, "RECENT_MESSAGES", 0)
+    context = build_conversation_context(_history(3), {"text": "Vegan.", "through": 2}, 1000)
+    assert "message 3" in context
+    assert "message 1" not in context
+    assert build_conversation_context(_history(2), {"text": "Vegan.", "through": 2}, 1000).count("message") == 0
+
+
+def test_budget_keeps_the_newest_messages():
+    context = build_conversation_context(_history(40), None, 30)
+    assert "message 40" in context
+    assert "message 1\n" not in context
@@ -0,0 +1,15 @@
+from app.services.diet_coach_services import LOCAL_INTENT_CONFIDENCE_THRESHOLD
+from app.services.intent_classifier import classify_intent
+
+
+def test_intent_with_unparsed_negation_defers_to_llm():
+    for message in ("make me dinner but not with beef", "I don't want mushrooms, make me a pasta dinner"):
+        analysis = classify_intent(message, [])
+        assert analysis["confidence"] < LOCAL_INTENT_CONFIDENCE_THRESHOLD, message
+
+
+def test_intent_with_parsed_negation_stays_local():
+    analysis = classify_intent("make me a chicken dinner without nuts", [])
+    assert analysis["intent"] == "generate_recipe"
+    assert analysis["extracted_info"]["allergies"] == ["nuts"]
+    assert analysis["confidence"] >= LOCAL_INTENT_CONFIDENCE_THRESHOLD
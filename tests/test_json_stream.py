@@ -0,0 +1,66 @@
+import json
+import random
+
+from app.services.json_stream import IncrementalJSONParser
+
+MEAL = {
+    "meal_name": "Lemon \"Herb\" Chicken",
+    "ingredients": ["2 chicken breasts", "1 lemon, juiced", "fresh thyme – a handful"],
+    "instructions": "Season the chicken.\nRoast at 200°C for 25 minutes \U0001F373 then rest.",
+    "estimated_calories": 420,
+    "nutrition": {"protein_g": 48, "tags": ["high-protein", "low-carb"]},
+    "dietary_info": None
+}
+
+
+def _parse(chunks):
+    parser = IncrementalJSONParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    return parser, events
+
+
+def _chunked(text, sizes):
+    pos = 0
+    for size in sizes:
+        yield text[pos:pos + size]
+        pos += size
+    yield text[pos:]
+
+
+def _check(parser, events):
+    assert parser.done
+    fields = {event[1]: event[2] for event in events if event[0] == "field"}
+    assert fields == MEAL
+    items = [event[3] for event in events if event[0] == "item" and event[1] == "ingredients"]
+    assert items == MEAL["ingredients"]
+    deltas = "".join(event[2] for event in events if event[0] == "delta" and event[1] == "instructions")
+    assert deltas == MEAL["instructions"]
+
+
+def test_one_character_at_a_time():
+    # ensure_ascii splits escapes like 🍳 across many chunks
+    text = json.dumps(MEAL, indent=2)
+    _check(*_parse(text))
+
+
+def test_random_chunk_sizes():
+    rng = random.Random(7)
+    for text in (json.dumps(MEAL), json.dumps(MEAL, ensure_ascii=False)):
+        for _ in range(50):
+            sizes = [rng.randint(1, 12) for _ in range(len(text))]
+            _check(*_parse(_chunked(text, sizes)))
+
+
+def test_name_is_available_before_the_object_closes():
+    text = json.dumps(MEAL)
+    cut = text.index('"ingredients"')
+    _, events = _parse([text[:cut]])
+    assert ("field", "meal_name", MEAL["meal_name"]) in events
+
+
+def test_trailing_text_is_ignored():
+    parser, events = _parse([json.dumps({"a": 1}) + "\n\nextra"])
+    assert parser.done
+    assert events == [("field", "a", 1)]
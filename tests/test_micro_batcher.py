@@ -0,0 +1,104 @@
+import time
+import asyncio
+
+from app.services.micro_batcher import MicroBatcher
+
+
+def test_items_in_one_window_share_a_batch():
+    batches = []
+
+    async def handler(group, items):
+        batches.append((group, list(items)))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(handler, window_ms=30, max_items=10)
+
+    async def main():
+        start = time.monotonic()
+        results = await asyncio.gather(*(batcher.submit("g", n) for n in (1, 2, 3)))
+        return results, time.monotonic() - start
+
+    results, waited = asyncio.run(main())
+    assert results == [10, 20, 30]
+    assert batches == [("g", [1, 2, 3])]
+    # The batch was held for the window, not sent with the first item
+    assert waited >= 0.025
+
+
+def test_full_batch_flushes_before_window_closes():
+    sizes = []
+
+    async def handler(group, items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(handler, window_ms=1000, max_items=2)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit("g", n) for n in range(4))), 0.5)
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+    assert sizes == [2, 2]
+
+
+def test_groups_are_batched_separately():
+    seen = []
+
+    async def handler(group, items):
+        seen.append((group, sorted(items)))
+        return items
+
+    batcher = MicroBatcher(handler, window_ms=10)
+
+    async def main():
+        await asyncio.gather(batcher.submit("a", 1), batcher.submit("b", 2), batcher.submit("a", 3))
+
+    asyncio.run(main())
+    assert sorted(seen) == [("a", [1, 3]), ("b", [2])]
+
+
+def test_each_caller_gets_its_own_error():
+    async def handler(group, items):
+        return [ValueError(f"bad {item}") if item == "bad" else item.upper() for item in items]
+
+    batcher = MicroBatcher(handler, window_ms=10)
+
+    async def main():
+        return await asyncio.gather(
+            batcher.submit("g", "a"), batcher.submit("g", "bad"), batcher.submit("g", "c"),
+            return_exceptions=True
+        )
+
+    first, second, third = asyncio.run(main())
+    assert (first, third) == ("A", "C")
+    assert isinstance(second, ValueError)
+
+
+def test_handler_failure_fails_every_item():
+    async def handler(group, items):
+        raise RuntimeError("upstream down")
+
+    batcher = MicroBatcher(handler, window_ms=10)
+
+    async def main():
+        return await asyncio.gather(*(batcher.submit("g", n) for n in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_cancelled_batch_does_not_strand_callers():
+    async def handler(group, items):
+        await asyncio.sleep(10)
+
+    batcher = MicroBatcher(handler, window_ms=1)
+
+    async def main():
+        callers = [asyncio.ensure_future(batcher.submit("g", n)) for n in range(2)]
+        await asyncio.sleep(0.02)
+        for task in list(batcher._running):
+            task.cancel()
+        return await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), 1)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
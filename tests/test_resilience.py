@@ -0,0 +1,90 @@
+import time
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.services.deadline import DeadlineExceededError, deadline_scope
+from app.services.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, breaker_guard
+)
+
+_REQUEST = httpx.Request("POST", "https://example.invalid/v1/chat/completions")
+
+
+def _fail(breaker, error=None):
+    with pytest.raises(Exception):
+        with breaker_guard(breaker, timeout=1.0):
+            raise error or openai.APIConnectionError(request=_REQUEST)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(("upstream", "key"), failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        _fail(breaker)
+    assert breaker.state == CLOSED
+    _fail(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after >= 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(("upstream", "key"), failure_threshold=2, reset_timeout=60)
+    _fail(breaker)
+    with breaker_guard(breaker, timeout=1.0):
+        pass
+    _fail(breaker)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(("upstream", "key"), failure_threshold=1, reset_timeout=0.02)
+    _fail(breaker)
+    assert breaker.state == OPEN
+    time.sleep(0.03)
+
+    # One probe goes through; a second caller is refused while it runs
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.03)
+    with breaker_guard(breaker, timeout=1.0):
+        pass
+    assert breaker.state == CLOSED
+
+
+def test_bad_requests_do_not_count_against_the_breaker():
+    breaker = CircuitBreaker(("upstream", "key"), failure_threshold=1, reset_timeout=60)
+    response = httpx.Response(400, request=_REQUEST)
+    _fail(breaker, openai.BadRequestError("bad", response=response, body=None))
+    assert breaker.state == CLOSED
+
+
+def test_timeouts_count_unless_the_request_deadline_cut_them_short():
+    breaker = CircuitBreaker(("upstream", "key"), failure_threshold=1, reset_timeout=60)
+
+    async def cut_short():
+        with deadline_scope(0.5):
+            with breaker_guard(breaker, timeout=0.5):
+                raise openai.APITimeoutError(_REQUEST)
+
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(cut_short())
+    assert breaker.state == CLOSED
+
+    # The same timeout with time left on the request is the upstream's fault
+    async def slow_upstream():
+        with deadline_scope(30):
+            with breaker_guard(breaker, timeout=0.5):
+                raise openai.APITimeoutError(_REQUEST)
+
+    with pytest.raises(openai.APITimeoutError):
+        asyncio.run(slow_upstream())
+    assert breaker.state == OPEN
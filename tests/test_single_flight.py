@@ -0,0 +1,50 @@
+import asyncio
+
+from app.services import concurrency_limiter
+from app.services.deadline import deadline_scope, remaining
+from app.services.single_flight import SingleFlight
+from app.services.tracing import current_trace, span, start_trace
+
+
+def test_identical_calls_share_one_upstream_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": 1}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("meal", "key", call) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{"value": 1}] * 5
+    # Joiners get copies, so one caller mutating its result cannot affect another
+    assert results[0] is not results[1]
+    assert flights.stats()["endpoints"]["meal"]["coalesced"] == 4
+
+
+def test_shared_call_keeps_priority_and_trace_but_not_deadline():
+    flights = SingleFlight()
+    seen = {}
+
+    async def call():
+        seen["priority"] = concurrency_limiter._request_priority.get()
+        seen["deadline"] = remaining()
+        with span("llm"):
+            await asyncio.sleep(0)
+        return "ok"
+
+    async def main():
+        trace = start_trace(sampled=True)
+        concurrency_limiter._request_priority.set(0)
+        with deadline_scope(5.0), span("handler"):
+            await flights.do("parse_voice", "key", call)
+        return trace
+
+    trace = asyncio.run(main())
+    assert seen == {"priority": 0, "deadline": None}
+    names = {s.name: s for s in trace.spans}
+    assert names["llm"].parent_id == names["handler"].span_id
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from app.services.tool_scheduler import ToolScheduler
+
+
+def test_independent_tools_run_concurrently_and_dependents_get_results():
+    scheduler = ToolScheduler()
+
+    async def slow(value):
+        await asyncio.sleep(0.05)
+        return value
+
+    scheduler.add("a", lambda deps: slow(1))
+    scheduler.add("b", lambda deps: slow(2))
+    scheduler.add("sum", lambda deps: slow(deps["a"] + deps["b"]), depends_on=["a", "b"])
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        outcomes = await scheduler.run()
+        return outcomes, loop.time() - start
+
+    outcomes, elapsed = asyncio.run(main())
+    assert outcomes["sum"].result == 3
+    assert elapsed < 0.14
+
+
+def test_failure_skips_dependents_only():
+    scheduler = ToolScheduler()
+
+    async def fail(deps):
+        raise ValueError("no meal")
+
+    async def ok(deps):
+        return "fine"
+
+    scheduler.add("meal", fail)
+    scheduler.add("reasoning", ok, depends_on=["meal"])
+    scheduler.add("substitution", ok)
+
+    outcomes = asyncio.run(scheduler.run())
+    assert outcomes["meal"].error == "no meal"
+    assert outcomes["reasoning"].skipped
+    assert outcomes["substitution"].result == "fine"
+
+
+def test_timeout_cancels_slow_tools_and_skips_their_dependents():
+    scheduler = ToolScheduler()
+    completed = []
+    cancelled = []
+
+    async def slow(deps):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def fast(deps):
+        return "done"
+
+    scheduler.add("slow", slow)
+    scheduler.add("after_slow", fast, depends_on=["slow"])
+    scheduler.add("fast", fast)
+
+    outcomes = asyncio.run(scheduler.run(
+        on_complete=lambda name, outcome: completed.append(name),
+        timeout=0.05
+    ))
+    assert outcomes["slow"].timed_out
+    assert outcomes["after_slow"].skipped
+    assert outcomes["fast"].result == "done"
+    assert cancelled == ["slow"]
+    # Skipped tools are not reported as completed
+    assert sorted(completed) == ["fast", "slow"]
+
+
+def test_dependencies_must_be_added_first():
+    scheduler = ToolScheduler()
+    with pytest.raises(ValueError):
+        scheduler.add("reasoning", lambda deps: None, depends_on=["meal"])
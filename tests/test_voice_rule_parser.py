@@ -0,0 +1,41 @@
+from app.services.voice_parser_service import RULE_CONFIDENCE_THRESHOLD
+from app.services.voice_rule_parser import parse_voice_rules
+
+
+def test_unparsed_negation_defers_to_llm():
+    parsed, confidence = parse_voice_rules("I want pasta but not with mushrooms")
+    assert "pasta" in parsed["include_ingredients"]
+    assert confidence < RULE_CONFIDENCE_THRESHOLD
+
+
+def test_hold_the_excludes_ingredient():
+    parsed, confidence = parse_voice_rules("I want pasta but hold the mushrooms")
+    assert parsed["include_ingredients"] == ["pasta"]
+    assert parsed["allergies"] == ["mushrooms"]
+    assert confidence >= RULE_CONFIDENCE_THRESHOLD
+
+
+def test_recognized_negation_keeps_confidence():
+    parsed, confidence = parse_voice_rules("chicken dinner without nuts")
+    assert parsed["include_ingredients"] == ["chicken"]
+    assert parsed["allergies"] == ["nuts"]
+    assert confidence == 1.0
+
+
+def test_negation_covers_whole_list():
+    cases = {
+        "chicken dinner without mushrooms or onions": (["chicken"], ["mushrooms", "onions"]),
+        "hold the cheese and tomatoes": ([], ["cheese", "tomatoes"]),
+        "without tofu, mushrooms": ([], ["tofu", "mushrooms"]),
+        "pasta without nuts, onions, and garlic please": (["pasta"], ["nuts", "onions", "garlic"]),
+    }
+    for text, (included, excluded) in cases.items():
+        parsed, _ = parse_voice_rules(text)
+        assert parsed["include_ingredients"] == included, text
+        assert parsed["allergies"] == excluded, text
+
+
+def test_negated_list_stops_at_next_clause():
+    parsed, _ = parse_voice_rules("no dairy, I want chicken")
+    assert parsed["include_ingredients"] == ["chicken"]
+    assert parsed["allergies"] == ["dairy"]